@@ -83,6 +83,31 @@ function findProjectFolder(idOrName: string): string | null {
     }
 });
 
+// Helper: Read the revision counter of the workspace snapshot (0 if missing/corrupt)
+function readSnapshotRevision(): number {
+    try {
+        return Number(JSON.parse(fs.readFileSync(SNAPSHOT_FILE, "utf-8"))?.revision) || 0;
+    } catch (e) {
+        return 0;
+    }
+}
+
+// Helper: Atomically write the workspace snapshot (temp file + rename) and bump its revision.
+// Mirrors tools/core/snapshot_store.py so the SSE watcher never reads a half-written file.
+function writeSnapshotFile(snapshot: any, currentRevision: number = readSnapshotRevision()): number {
+    const revision = currentRevision + 1;
+    const tmpPath = `${SNAPSHOT_FILE}.${process.pid}.tmp`;
+    const fd = fs.openSync(tmpPath, "w");
+    try {
+        fs.writeSync(fd, JSON.stringify({ ...snapshot, revision }, null, 2));
+        fs.fsyncSync(fd);
+    } finally {
+        fs.closeSync(fd);
+    }
+    fs.renameSync(tmpPath, SNAPSHOT_FILE);
+    return revision;
+}
+
 // Helper: Backup current snapshot to history
 function backupSnapshot() {
     if (!fs.existsSync(SNAPSHOT_FILE)) return;
@@ -234,7 +259,7 @@ function loadProjectToWorkspace(projectId: string) {
     // Backup current workspace first
     backupSnapshot();
     // Copy project snapshot to workspace
-    fs.copyFileSync(newestPath, SNAPSHOT_FILE);
+    writeSnapshotFile(JSON.parse(fs.readFileSync(newestPath, "utf-8")));
 
     // Switch materials link to this project
     const targetFolder = folderName || projectId;
@@ -696,7 +721,7 @@ export async function POST(request: NextRequest) {
                     
                     // 同时更新 workspace snapshot
                     backupSnapshot();
-                    fs.writeFileSync(SNAPSHOT_FILE, JSON.stringify(snapshotData, null, 2));
+                    writeSnapshotFile(snapshotData);
                     
                     // 通知前端刷新项目列表
                     fs.writeFileSync(SYNC_FILE, JSON.stringify({
@@ -750,6 +775,17 @@ export async function POST(request: NextRequest) {
                         } catch (e) { /* ignore corrupt */ }
                     }
 
+                    // Compare-and-swap: reject writers that read an older revision (lost update)
+                    const currentRevision = Number(currentSnapshot.revision) || 0;
+                    if (data?.expectedRevision !== undefined && data.expectedRevision !== currentRevision) {
+                        return NextResponse.json({
+                            success: false,
+                            error: "Snapshot revision conflict",
+                            expectedRevision: data.expectedRevision,
+                            revision: currentRevision,
+                        }, { status: 409 });
+                    }
+
                     // Merge incoming data (Project & Tracks) with existing Assets
                     const mergedData = {
                         ...currentSnapshot,
@@ -764,8 +800,8 @@ export async function POST(request: NextRequest) {
                         assets: data.assets || currentSnapshot.assets || []
                     };
 
-                    fs.writeFileSync(SNAPSHOT_FILE, JSON.stringify(mergedData, null, 2));
-                    return NextResponse.json({ success: true });
+                    const revision = writeSnapshotFile(mergedData, currentRevision);
+                    return NextResponse.json({ success: true, revision });
                 } catch (e) {
                     return NextResponse.json({ success: false, error: "Failed to save snapshot" }, { status: 500 });
                 }
@@ -814,7 +850,7 @@ export async function POST(request: NextRequest) {
                         tracks: data?.tracks || existingSnapshot.tracks,
                     };
 
-                    fs.writeFileSync(SNAPSHOT_FILE, JSON.stringify(newSnapshot, null, 2));
+                    writeSnapshotFile(newSnapshot);
                     console.log(`[API] Saved snapshot for project ${data?.project?.name || 'unknown'}`);
                     return NextResponse.json({ success: true, message: "Snapshot saved" });
                 } catch (e) {
@@ -906,7 +942,7 @@ export async function POST(request: NextRequest) {
 
                     try {
                         backupSnapshot();
-                        fs.writeFileSync(SNAPSHOT_FILE, JSON.stringify(newSnapshot, null, 2));
+                        writeSnapshotFile(newSnapshot);
                         // Immediately archive it to create the folder structure on disk
                         archiveToProject(newProjectId);
                         // Also switch materials link to the new folder
@@ -8,6 +8,14 @@
  * - quality: "low" | "medium" | "high" | "very_high"
  * - exportId: unique ID for progress tracking
  * - media_[id]: actual media files
+ *
+ * or a JSON body { projectData, format, quality, exportId } without uploads.
+ *
+ * A mediaMetadata entry with a workspace `relativePath` or an absolute `filePath`
+ * is not uploaded: `relativePath` is resolved against the current workspace root
+ * (falling back to `filePath`), the result is validated against the media roots
+ * (see lib/media-paths) and the renderer reads the file in place through
+ * /api/media/serve with HTTP Range requests.
  */
 
 import { NextRequest, NextResponse } from "next/server";
@@ -16,13 +24,13 @@ import { renderMedia, selectComposition } from "@remotion/renderer";
 import path from "path";
 import fs from "fs";
 import os from "os";
+import { Readable } from "stream";
+import { pipeline } from "stream/promises";
+import { EXPORT_TEMP_DIR, getServeUrl, resolveAssetPath } from "@/lib/media-paths";
 import { setExportProgress } from "./progress/route";
 
 export const maxDuration = 300; // 5 minutes max
 
-// Temp directory for export media files
-const EXPORT_TEMP_DIR = path.join(os.tmpdir(), "aicut-export-media");
-
 // Get optimal concurrency based on CPU cores
 const getOptimalConcurrency = () => {
     const cpus = os.cpus().length;
@@ -35,23 +43,35 @@ export async function POST(request: NextRequest) {
     let exportId: string | null = null;
 
     try {
-        // Parse FormData
-        const formData = await request.formData();
-
-        const projectDataStr = formData.get("projectData") as string;
-        const format = (formData.get("format") as string) || "mp4";
-        const quality = (formData.get("quality") as string) || "medium";
-        exportId = (formData.get("exportId") as string) || null;
+        // Parse FormData, or a JSON body when every asset is referenced by relativePath/filePath
+        const isJson = (request.headers.get("content-type") || "").includes("application/json");
+        let formData: FormData | null = null;
+        let projectData: any;
+        let format: string;
+        let quality: string;
+
+        if (isJson) {
+            const body = await request.json();
+            projectData = body.projectData;
+            format = body.format || "mp4";
+            quality = body.quality || "medium";
+            exportId = body.exportId || null;
+        } else {
+            formData = await request.formData();
+            const projectDataStr = formData.get("projectData") as string;
+            projectData = projectDataStr ? JSON.parse(projectDataStr) : null;
+            format = (formData.get("format") as string) || "mp4";
+            quality = (formData.get("quality") as string) || "medium";
+            exportId = (formData.get("exportId") as string) || null;
+        }
 
-        if (!projectDataStr) {
+        if (!projectData) {
             return NextResponse.json(
                 { error: "No project data provided" },
                 { status: 400 }
             );
         }
 
-        const projectData = JSON.parse(projectDataStr);
-
         console.log("Export request received");
         console.log("Duration:", projectData.durationInFrames, "frames");
         console.log("Media files:", projectData.mediaMetadata?.length || 0);
@@ -79,20 +99,41 @@ export async function POST(request: NextRequest) {
             httpUrl: string;
         }> = [];
 
+        const rejectedPaths: string[] = [];
+
         for (const meta of projectData.mediaMetadata || []) {
             const fileKey = `media_${meta.id}`;
-            const file = formData.get(fileKey) as File | null;
+            const file = formData ? (formData.get(fileKey) as File | null) : null;
+
+            // Zero-copy: render straight from the original file on disk
+            if (meta.filePath || meta.relativePath) {
+                const localPath = resolveAssetPath(meta);
+                if (localPath) {
+                    mediaFilesData.push({
+                        id: meta.id,
+                        name: meta.name,
+                        type: meta.type,
+                        filePath: localPath,
+                        httpUrl: getServeUrl(origin, localPath),
+                    });
+                    console.log(`Linked: ${localPath}`);
+                    continue;
+                }
+                if (!file) {
+                    rejectedPaths.push(meta.filePath || meta.relativePath);
+                    continue;
+                }
+            }
 
             if (file) {
                 const ext = path.extname(meta.name) || `.${meta.type === 'video' ? 'mp4' : meta.type === 'audio' ? 'mp3' : 'png'}`;
                 const filePath = path.join(EXPORT_TEMP_DIR, `${meta.id}${ext}`);
 
-                const arrayBuffer = await file.arrayBuffer();
-                fs.writeFileSync(filePath, Buffer.from(arrayBuffer));
+                await pipeline(Readable.fromWeb(file.stream() as any), fs.createWriteStream(filePath));
 
                 savedFiles.push(filePath);
 
-                const httpUrl = `${origin}/api/media/${meta.id}`;
+                const httpUrl = getServeUrl(origin, filePath);
 
                 mediaFilesData.push({
                     id: meta.id,
@@ -102,10 +143,30 @@ export async function POST(request: NextRequest) {
                     httpUrl,
                 });
 
-                console.log(`Saved: ${filePath} (${(arrayBuffer.byteLength / 1024 / 1024).toFixed(2)} MB)`);
+                console.log(`Saved: ${filePath} (${(file.size / 1024 / 1024).toFixed(2)} MB)`);
             }
         }
 
+        if (rejectedPaths.length > 0) {
+            for (const file of savedFiles) {
+                try {
+                    fs.unlinkSync(file);
+                } catch (e) {
+                    // Ignore
+                }
+            }
+            if (exportId) {
+                setExportProgress(exportId, 0, "error", "Media path not allowed");
+            }
+            return NextResponse.json(
+                {
+                    error: "Media path not allowed",
+                    details: `Not inside a media root (set AICUT_MEDIA_ROOTS to allow): ${rejectedPaths.join(", ")}`,
+                },
+                { status: 403 }
+            );
+        }
+
         if (exportId) {
             setExportProgress(exportId, 10, "bundling");
         }
@@ -214,11 +275,12 @@ export async function POST(request: NextRequest) {
             setExportProgress(exportId, 98, "finalizing");
         }
 
-        // Read the file
-        const videoBuffer = fs.readFileSync(outputPath);
+        // Stream the file back instead of buffering it; it is removed once sent
+        const outputSize = fs.statSync(outputPath).size;
+        const outputStream = fs.createReadStream(outputPath);
+        outputStream.on("close", () => fs.unlink(outputPath, () => {}));
 
         // Clean up temp files
-        fs.unlinkSync(outputPath);
         for (const file of savedFiles) {
             try {
                 fs.unlinkSync(file);
@@ -232,11 +294,11 @@ export async function POST(request: NextRequest) {
         }
 
         // Return the video file
-        return new NextResponse(videoBuffer, {
+        return new NextResponse(Readable.toWeb(outputStream) as ReadableStream, {
             headers: {
                 "Content-Type": format === "webm" ? "video/webm" : "video/mp4",
                 "Content-Disposition": `attachment; filename="export.${format}"`,
-                "Content-Length": videoBuffer.length.toString(),
+                "Content-Length": outputSize.toString(),
             },
         });
     } catch (error) {
@@ -5,9 +5,7 @@
 import { NextRequest, NextResponse } from "next/server";
 import path from "path";
 import fs from "fs";
-import os from "os";
-
-const EXPORT_TEMP_DIR = path.join(os.tmpdir(), "aicut-export-media");
+import { EXPORT_TEMP_DIR } from "@/lib/media-paths";
 
 export async function GET(
     request: NextRequest,
@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from "next/server";
 import * as fs from "fs";
 import * as path from "path";
+import { Readable } from "stream";
+import { resolveServablePath, resolveWorkspacePath } from "@/lib/media-paths";
 
 // MIME type mapping
 const MIME_TYPES: Record<string, string> = {
@@ -23,28 +25,48 @@ const MIME_TYPES: Record<string, string> = {
     ".svg": "image/svg+xml",
 };
 
+// Streams a byte range of a file without loading it into memory
+function fileStream(filePath: string, start?: number, end?: number): ReadableStream {
+    return Readable.toWeb(fs.createReadStream(filePath, { start, end })) as ReadableStream;
+}
+
 /**
  * GET /api/media/serve?path=<encoded_absolute_path>
+ * GET /api/media/serve?rel=<encoded_workspace_relative_path>[&path=<fallback>]
  * Serves a file from an absolute path on disk.
- * This enables "linked" files that are not copied to the project directory.
+ * `rel` is resolved against the current workspace root, and an absolute path
+ * that no longer exists is looked up by the snapshot asset's relativePath, so
+ * URLs saved before the workspace was moved keep working.
+ * Only files under a media root, recorded in the snapshot, uploaded for an
+ * export or in the proxy cache are served (see lib/media-paths); anything else
+ * gets 403.
+ * This enables "linked" files that are not copied to the project directory,
+ * and lets the export renderer read multi-GB sources in place via Range requests.
  */
 export async function GET(req: NextRequest) {
     try {
         const { searchParams } = new URL(req.url);
-        const filePath = searchParams.get("path");
+        const relativePath = searchParams.get("rel");
+        const requestedPath = searchParams.get("path");
 
-        if (!filePath) {
+        if (!requestedPath && !relativePath) {
             return NextResponse.json({ error: "Missing path parameter" }, { status: 400 });
         }
 
         // Security: Validate path is an absolute path
-        if (!path.isAbsolute(filePath)) {
+        if (requestedPath && !path.isAbsolute(requestedPath)) {
             return NextResponse.json({ error: "Path must be absolute" }, { status: 400 });
         }
 
-        // Check file exists
-        if (!fs.existsSync(filePath)) {
-            console.error(`[Serve API] File not found: ${filePath}`);
+        // Security: only allowed locations (a stale absolute path is re-resolved through the snapshot)
+        const filePath = resolveWorkspacePath(relativePath) ?? resolveServablePath(requestedPath);
+        if (!filePath) {
+            const requested = requestedPath || relativePath;
+            if (requestedPath && fs.existsSync(requestedPath)) {
+                console.error(`[Serve API] Path not allowed: ${requested}`);
+                return NextResponse.json({ error: "Path not allowed" }, { status: 403 });
+            }
+            console.error(`[Serve API] File not found: ${requested}`);
             return NextResponse.json({ error: "File not found" }, { status: 404 });
         }
 
@@ -57,19 +79,25 @@ export async function GET(req: NextRequest) {
         const rangeHeader = req.headers.get("range");
 
         if (rangeHeader && (mimeType.startsWith("video") || mimeType.startsWith("audio"))) {
-            // Parse range header
-            const parts = rangeHeader.replace(/bytes=/, "").split("-");
-            const start = parseInt(parts[0], 10);
-            const end = parts[1] ? parseInt(parts[1], 10) : stats.size - 1;
-            const chunkSize = end - start + 1;
+            // Parse range header ("bytes=start-end", "bytes=start-" or suffix "bytes=-length")
+            const parts = rangeHeader.replace(/bytes=/, "").split(",")[0].split("-");
+            let start = parseInt(parts[0], 10);
+            let end = parts[1] ? parseInt(parts[1], 10) : stats.size - 1;
+            if (isNaN(start)) {
+                start = Math.max(0, stats.size - end);
+                end = stats.size - 1;
+            }
+            end = Math.min(end, stats.size - 1);
 
-            // Read the specific range
-            const fileHandle = fs.openSync(filePath, "r");
-            const buffer = Buffer.alloc(chunkSize);
-            fs.readSync(fileHandle, buffer, 0, chunkSize, start);
-            fs.closeSync(fileHandle);
+            if (isNaN(end) || start > end || start >= stats.size) {
+                return new NextResponse(null, {
+                    status: 416, // Range Not Satisfiable
+                    headers: { "Content-Range": `bytes */${stats.size}` },
+                });
+            }
+            const chunkSize = end - start + 1;
 
-            return new NextResponse(buffer, {
+            return new NextResponse(fileStream(filePath, start, end), {
                 status: 206, // Partial Content
                 headers: {
                     "Content-Type": mimeType,
@@ -81,10 +109,8 @@ export async function GET(req: NextRequest) {
             });
         }
 
-        // Read entire file for non-range requests (images, small files)
-        const fileBuffer = fs.readFileSync(filePath);
-
-        return new NextResponse(fileBuffer, {
+        // Stream entire file for non-range requests
+        return new NextResponse(fileStream(filePath), {
             status: 200,
             headers: {
                 "Content-Type": mimeType,
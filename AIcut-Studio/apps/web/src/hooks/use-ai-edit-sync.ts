@@ -571,6 +571,7 @@ export function useAIEditSync(enabled: boolean = true) {
                 const needsUpdate =
                     (remoteAsset.url && existingAsset.url !== remoteAsset.url) ||
                     (remoteAsset.thumbnailUrl && existingAsset.thumbnailUrl !== remoteAsset.thumbnailUrl) ||
+                    (remoteAsset.proxyUrl && existingAsset.proxyUrl !== remoteAsset.proxyUrl) ||
                     (remoteAsset.duration && existingAsset.duration !== remoteAsset.duration);
 
                 if (needsUpdate) {
@@ -923,7 +924,9 @@ export function useAIEditSync(enabled: boolean = true) {
                     isLinked = true;
                     if (a.url && a.url.startsWith("blob:")) {
                         // Convert to persistent URL
-                        persistentUrl = `/api/media/serve?path=${encodeURIComponent(a.filePath)}`;
+                        persistentUrl = a.relativePath
+                            ? `/api/media/serve?rel=${encodeURIComponent(a.relativePath)}&path=${encodeURIComponent(a.filePath)}`
+                            : `/api/media/serve?path=${encodeURIComponent(a.filePath)}`;
                     }
                 }
 
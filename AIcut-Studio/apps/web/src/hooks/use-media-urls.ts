@@ -11,12 +11,14 @@ export function useMediaUrls(mediaFiles: MediaFile[]) {
 
         // Create URLs for new files
         mediaFiles.forEach((file) => {
-            if (!newUrls[file.id]) {
-                if (file.url) {
-                    // Use existing URL (linked asset)
-                    newUrls[file.id] = file.url;
-                    changed = true;
-                } else if (file.file) {
+            // Preview prefers the proxy; it may appear after the asset was first linked
+            const linkedUrl = file.proxyUrl || file.url;
+            if (linkedUrl && newUrls[file.id] !== linkedUrl && !newUrls[file.id]?.startsWith("blob:")) {
+                // Use existing URL (linked asset)
+                newUrls[file.id] = linkedUrl;
+                changed = true;
+            } else if (!newUrls[file.id]) {
+                if (file.file) {
                     // Create blob URL for uploaded files
                     const url = URL.createObjectURL(file.file);
                     newUrls[file.id] = url;
@@ -133,36 +133,44 @@ export async function exportProject(
       isHidden: false,
     }));
 
-    // Prepare media metadata
+    // Prepare media metadata. Assets with a local relativePath/filePath are
+    // rendered in place by the server instead of being uploaded.
     const mediaMetadata = mediaFiles.map((m) => ({
       id: m.id,
       name: m.name,
       type: m.type,
+      filePath: m.filePath,
+      relativePath: m.relativePath,
     }));
 
-    // Build FormData
-    const formData = new FormData();
-
-    formData.append("projectData", JSON.stringify({
-      tracks: exportTracks,
-      mediaMetadata,
-      fps,
-      width: canvasWidth,
-      height: canvasHeight,
-      durationInFrames,
-      backgroundColor,
-    }));
-
-    formData.append("format", options.format);
-    formData.append("quality", options.quality);
-    formData.append("exportId", exportId);
-
-    // Add media files
-    for (const media of mediaFiles) {
-      if (media.file) {
-        formData.append(`media_${media.id}`, media.file, media.name);
+    // Build FormData. Linked media is left out unless uploadLinked is set
+    // (retry after the server refused to read a linked path).
+    const buildFormData = (uploadLinked: boolean) => {
+      const formData = new FormData();
+
+      formData.append("projectData", JSON.stringify({
+        tracks: exportTracks,
+        mediaMetadata,
+        fps,
+        width: canvasWidth,
+        height: canvasHeight,
+        durationInFrames,
+        backgroundColor,
+      }));
+
+      formData.append("format", options.format);
+      formData.append("quality", options.quality);
+      formData.append("exportId", exportId);
+
+      // Add media files (only those the server cannot read from disk)
+      for (const media of mediaFiles) {
+        const linked = Boolean(media.filePath || media.relativePath);
+        if (media.file && (uploadLinked || !linked)) {
+          formData.append(`media_${media.id}`, media.file, media.name);
+        }
       }
-    }
+      return formData;
+    };
 
     console.log("Starting export...");
     console.log("Duration:", durationInFrames, "frames @", fps, "fps");
@@ -170,11 +178,22 @@ export async function exportProject(
     console.log("Export ID:", exportId);
 
     // Call the export API
-    const response = await fetch("/api/export", {
+    let response = await fetch("/api/export", {
       method: "POST",
-      body: formData,
+      body: buildFormData(false),
     });
 
+    // 403: a linked path is outside the server's media roots. The server still
+    // prefers linked paths it may read, so retry once with the files attached.
+    const canUploadLinked = mediaFiles.some((m) => m.file && (m.filePath || m.relativePath));
+    if (response.status === 403 && canUploadLinked) {
+      console.warn("Linked media not readable by the server, retrying with uploads");
+      response = await fetch("/api/export", {
+        method: "POST",
+        body: buildFormData(true),
+      });
+    }
+
     // Close SSE connection
     if (eventSource) {
       eventSource.close();
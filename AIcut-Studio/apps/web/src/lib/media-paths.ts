@@ -0,0 +1,129 @@
+/**
+ * Local media path validation (server-side only)
+ *
+ * Export requests may reference assets by their absolute `filePath` instead of
+ * uploading them. A path is accepted when it resolves (symlinks included) to a
+ * regular file that is either
+ * - inside one of the media roots: the workspace root, plus any directories
+ *   listed in AICUT_MEDIA_ROOTS (separated by path.delimiter), or
+ * - exactly the `filePath` the project snapshot records for an asset
+ *   (linked files imported from elsewhere on disk).
+ *
+ * Assets inside the workspace also carry a `relativePath` (workspace-relative,
+ * `/`-separated; see tools/core/asset_paths.py). It is resolved against the
+ * current WORKSPACE_ROOT first, so exports and previews keep working after the
+ * whole workspace is moved and the recorded `filePath` has gone stale.
+ */
+
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+
+const WORKSPACE_ROOT = path.resolve(process.cwd(), "../../..");
+const SNAPSHOT_FILE = path.join(WORKSPACE_ROOT, "ai_workspace", "project-snapshot.json");
+/** Uploads saved by /api/export for the renderer */
+export const EXPORT_TEMP_DIR = path.join(os.tmpdir(), "aicut-export-media");
+/** Preview proxies written by tools/media/proxy.py */
+export const PROXY_CACHE_DIR = path.join(WORKSPACE_ROOT, "ai_workspace", "cache", "proxies");
+
+function realpathOrNull(p: string): string | null {
+    try {
+        return fs.realpathSync(p);
+    } catch {
+        return null;
+    }
+}
+
+// Windows paths are case-insensitive
+function normalizeForCompare(p: string): string {
+    const resolved = path.resolve(p);
+    return process.platform === "win32" ? resolved.toLowerCase() : resolved;
+}
+
+function isInside(child: string, parent: string): boolean {
+    const rel = path.relative(normalizeForCompare(parent), normalizeForCompare(child));
+    return rel === "" || (rel.split(path.sep)[0] !== ".." && !path.isAbsolute(rel));
+}
+
+export function getMediaRoots(): string[] {
+    const extra = (process.env.AICUT_MEDIA_ROOTS || "").split(path.delimiter).filter(Boolean);
+    return [WORKSPACE_ROOT, ...extra].map((root) => realpathOrNull(root) ?? path.resolve(root));
+}
+
+function readSnapshotAssets(): any[] {
+    try {
+        return JSON.parse(fs.readFileSync(SNAPSHOT_FILE, "utf-8")).assets || [];
+    } catch {
+        // No snapshot: only the media roots apply
+        return [];
+    }
+}
+
+function getSnapshotFilePaths(): Set<string> {
+    const paths = new Set<string>();
+    for (const asset of readSnapshotAssets()) {
+        const real = asset.filePath ? realpathOrNull(asset.filePath) : null;
+        if (real) paths.add(normalizeForCompare(real));
+    }
+    return paths;
+}
+
+/**
+ * Returns the real path of a workspace-relative asset path, or null when it is
+ * absolute, missing, not a regular file or resolves outside every media root.
+ */
+export function resolveWorkspacePath(relativePath: string | undefined | null): string | null {
+    if (!relativePath || path.isAbsolute(relativePath) || path.win32.isAbsolute(relativePath)) return null;
+
+    const real = realpathOrNull(path.join(WORKSPACE_ROOT, ...relativePath.split("/")));
+    if (!real || !fs.statSync(real).isFile()) return null;
+    return getMediaRoots().some((root) => isInside(real, root)) ? real : null;
+}
+
+/** Current path of a snapshot asset whose recorded `filePath` no longer exists (workspace moved) */
+export function resolveMovedPath(filePath: string): string | null {
+    const target = normalizeForCompare(filePath);
+    const asset = readSnapshotAssets().find(
+        (a) => a.filePath && a.relativePath && normalizeForCompare(a.filePath) === target
+    );
+    return asset ? resolveWorkspacePath(asset.relativePath) : null;
+}
+
+/**
+ * Returns the real path of an allowed local media file, or null when the path
+ * is relative, missing, not a regular file or outside every allowed location.
+ */
+export function resolveLocalMediaPath(filePath: string | undefined | null): string | null {
+    if (!filePath || !path.isAbsolute(filePath)) return null;
+
+    const real = realpathOrNull(filePath);
+    if (!real) return resolveMovedPath(filePath);
+    if (!fs.statSync(real).isFile()) return null;
+
+    if (getMediaRoots().some((root) => isInside(real, root))) return real;
+    return getSnapshotFilePaths().has(normalizeForCompare(real)) ? real : null;
+}
+
+/**
+ * Real path of a file /api/media/serve may stream: an allowed local media file
+ * (see resolveLocalMediaPath), an export upload or a preview proxy; null otherwise.
+ */
+export function resolveServablePath(filePath: string | undefined | null): string | null {
+    const allowed = resolveLocalMediaPath(filePath);
+    if (allowed || !filePath || !path.isAbsolute(filePath)) return allowed;
+
+    const real = realpathOrNull(filePath);
+    if (!real || !fs.statSync(real).isFile()) return null;
+    const dirs = [EXPORT_TEMP_DIR, PROXY_CACHE_DIR].map((dir) => realpathOrNull(dir) ?? dir);
+    return dirs.some((dir) => isInside(real, dir)) ? real : null;
+}
+
+/** Resolves an asset by `relativePath` first, then by its (possibly stale) `filePath` */
+export function resolveAssetPath(asset: { filePath?: string | null; relativePath?: string | null }): string | null {
+    return resolveWorkspacePath(asset.relativePath) ?? resolveLocalMediaPath(asset.filePath);
+}
+
+/** URL of a local file on the range-capable /api/media/serve route */
+export function getServeUrl(origin: string, filePath: string): string {
+    return `${origin}/api/media/serve?path=${encodeURIComponent(filePath)}`;
+}
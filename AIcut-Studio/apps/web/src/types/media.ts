@@ -13,7 +13,10 @@ export interface MediaFile {
   height?: number; // For video/image height
   fps?: number; // For video frame rate
   filePath?: string; // Absolute path on disk (Electron only)
+  relativePath?: string; // Workspace-relative path, "/"-separated (tools/core/asset_paths.py); survives workspace moves
   originalPath?: string; // Linked file source path (Electron only)
+  proxyUrl?: string; // Low-res all-intra proxy used by the preview (export keeps the original)
+  proxyPath?: string; // Absolute path of the proxy file (tools/media/proxy.py)
   isLinked?: boolean; // True when linked to external file path
   // Ephemeral items are used by timeline directly and should not appear in the media library or be persisted
   ephemeral?: boolean;
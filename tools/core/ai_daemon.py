@@ -7,6 +7,7 @@ import sys
 import tempfile
 from typing import List, Dict, Optional
 from aicut_sdk import AIcutClient
+from asset_paths import resolve_asset
 from dotenv import load_dotenv
 import asyncio
 import edge_tts
@@ -135,10 +136,16 @@ class AIDaemon:
 
         return beats
 
-    def find_local_file(self, filename, target_duration=None, hint_path=None):
+    def find_local_file(self, filename, target_duration=None, hint_path=None, asset=None):
         skip_dirs = {'.git', 'node_modules', '.next', 'dist-electron', 'dist', 'bin', 'obj', 'ai_workspace'}
         target_name = filename.strip()
-        
+
+        # 0. 快照素材记录: 相对路径 + 内容指纹，经查找表解析 (项目移动后也能找到)
+        if asset:
+            resolved = resolve_asset(asset)
+            if resolved:
+                return resolved
+
         # 1. 如果有通过媒体信息传来的绝对路径，优先使用
         if hint_path and os.path.exists(hint_path):
             self.log(f"Using absolute path from project assets: {hint_path}")
@@ -148,14 +155,11 @@ class AIDaemon:
         if os.path.isabs(target_name) and os.path.exists(target_name):
             return target_name
 
-        # 2. 构造搜索根目录 (包含更深层的查找)
-        # 如果工作区在 f:\桌面\开发\AIcut, 我们希望搜到 f:\桌面 的内容
+        # 2. 构造搜索根目录 (只用于没有素材记录的按名称查找；工作区外的素材由指纹查找表解析)
         search_roots = [
             self.workspace_root,
             os.path.join(self.workspace_root, 'public'),
             os.path.join(self.workspace_root, 'AIcut-Studio', 'apps', 'web', 'public'),
-            os.path.dirname(self.workspace_root), # f:\桌面\开发
-            os.path.dirname(os.path.dirname(self.workspace_root)) # f:\桌面
         ]
 
         # self.log(f"Searching for file: '{target_name}' in {search_roots}")
@@ -574,14 +578,11 @@ class AIDaemon:
                                         break
                                         
                             if el_config:
-                                m_path_hint = None
+                                m_asset = None
                                 if snap:
-                                    for asset in snap.get("assets", []):
-                                        if asset["id"] == m_id:
-                                            m_path_hint = asset.get("filePath")
-                                            break
-                                
-                                file_path = self.find_local_file(m_name, m_dur, m_path_hint)
+                                    m_asset = next((a for a in snap.get("assets", []) if a["id"] == m_id), None)
+
+                                file_path = self.find_local_file(m_name, m_dur, m_asset and m_asset.get("filePath"), m_asset)
                                 if file_path:
                                     self.recognize_and_sync(file_path, e_id, el_config)
                                 else:
@@ -599,16 +600,15 @@ class AIDaemon:
                             m_name = data.get("mediaName")
                             m_id = data.get("mediaId")
                             m_path_hint = data.get("filePath")
+                            m_asset = None
 
                             snap_resp = self.get_snapshot()
                             snap = snap_resp.get("snapshot") if snap_resp and snap_resp.get("success") else None
-                            if snap and m_id and not m_path_hint:
-                                for asset in snap.get("assets", []):
-                                    if asset.get("id") == m_id:
-                                        m_path_hint = asset.get("filePath")
-                                        if not m_name:
-                                            m_name = asset.get("name")
-                                        break
+                            if snap and m_id:
+                                m_asset = next((a for a in snap.get("assets", []) if a.get("id") == m_id), None)
+                                if m_asset:
+                                    m_path_hint = m_path_hint or m_asset.get("filePath")
+                                    m_name = m_name or m_asset.get("name")
 
                             if not m_name and snap:
                                 for asset in snap.get("assets", []):
@@ -616,11 +616,12 @@ class AIDaemon:
                                         m_name = asset.get("name")
                                         if not m_path_hint:
                                             m_path_hint = asset.get("filePath")
+                                        m_asset = m_asset or asset
                                         break
 
                             file_path = None
-                            if m_name or m_path_hint:
-                                file_path = self.find_local_file(m_name or "", None, m_path_hint)
+                            if m_name or m_path_hint or m_asset:
+                                file_path = self.find_local_file(m_name or "", None, m_path_hint, m_asset)
 
                             if file_path:
                                 self.log(f"Analyzing BGM beats: {os.path.basename(file_path)}")
@@ -16,8 +16,28 @@ AIcut Python SDK - 用于程序化编辑视频项目
     ])
 """
 
+import os
+import re
+import sys
 import requests
 from typing import List, Dict, Optional
+from snapshot_store import SnapshotConflictError, get_revision
+from asset_paths import asset_record, resolve_asset
+from timeline_ops import apply_ducking, ripple_delete, source_to_timeline
+
+# import_media 等读-改-写操作在 revision 冲突时的最大重试次数
+SNAPSHOT_WRITE_RETRIES = 3
+
+# 轨道 id/名称匹配此规则的音频轨视为背景音乐，其余音频轨视为人声
+BGM_TRACK_PATTERN = re.compile(r"bgm|music|背景|音乐", re.IGNORECASE)
+
+MEDIA_TOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media")
+
+
+def _use_media_tools():
+    """分析类接口依赖 tools/media (numpy + ffmpeg)，按需加入导入路径"""
+    if MEDIA_TOOLS_DIR not in sys.path:
+        sys.path.append(MEDIA_TOOLS_DIR)
 
 
 class AIcutClient:
@@ -190,9 +210,23 @@ class AIcutClient:
             raise Exception(f"获取快照失败: {res.get('error')}")
         return res.get("snapshot", {})
 
-    def update_snapshot(self, snapshot: Dict) -> Dict:
-        """全量更新项目快照"""
-        return self._post("updateSnapshot", snapshot)
+    def update_snapshot(self, snapshot: Dict, expected_revision: Optional[int] = None) -> Dict:
+        """全量更新项目快照
+        
+        Args:
+            snapshot: 完整快照
+            expected_revision: 读取快照时的 revision；若服务端已被其他写入方更新，
+                抛出 SnapshotConflictError 而不是静默覆盖
+        """
+        data = dict(snapshot)
+        if expected_revision is not None:
+            data["expectedRevision"] = expected_revision
+        resp = requests.post(self.api_url, json={"action": "updateSnapshot", "data": data})
+        if resp.status_code == 409:
+            body = resp.json()
+            raise SnapshotConflictError(expected_revision, body.get("revision", 0))
+        resp.raise_for_status()
+        return resp.json()
 
     def import_media(self, file_path: str, media_type: str = "video", name: str = None, start_time: float = 0, duration: float = None, track_id: str = None, track_name: str = None) -> Dict:
         """导入媒体文件 (模仿 demo_file_driven 逻辑)
@@ -201,18 +235,11 @@ class AIcutClient:
         """
         import os
         import urllib.parse
-        import uuid
-        import time
 
         abs_path = os.path.abspath(file_path)
         file_name = name or os.path.basename(abs_path)
         
-        # 1. 获取当前状态
-        snapshot = self.get_snapshot()
-        assets = snapshot.get("assets", [])
-        tracks = snapshot.get("tracks", [])
-        
-        # 2. 构造 Asset
+        # 1. 构造 Asset
         asset_id = f"asset_{hash(abs_path) % 1000000}_{int(os.path.getmtime(abs_path) if os.path.exists(abs_path) else 0)}"
         
         # 路径编码
@@ -238,9 +265,34 @@ class AIcutClient:
                 duration = 5.0
             else:
                 duration = self._get_media_duration(abs_path)
-        
+
+        # 可移植路径: 工作区相对路径 + 内容指纹 (文件不存在时只记录 filePath)
+        path_record = asset_record(abs_path) if os.path.isfile(abs_path) else {"filePath": abs_path}
+
+        # 2. 读-改-写快照；若期间有其他写入方 (前端/守护进程) 更新了快照，重新读取后重试
+        for attempt in range(SNAPSHOT_WRITE_RETRIES):
+            try:
+                return self._insert_media(path_record, file_name, media_type, asset_id, serve_url,
+                                          thumbnail_url, start_time, duration, track_id, track_name)
+            except SnapshotConflictError:
+                if attempt == SNAPSHOT_WRITE_RETRIES - 1:
+                    raise
+
+    def _insert_media(self, path_record: Dict, file_name: str, media_type: str, asset_id: str, serve_url: str,
+                      thumbnail_url: str, start_time: float, duration: Optional[float],
+                      track_id: Optional[str], track_name: Optional[str]) -> Dict:
+        """把素材和对应元素写入当前快照 (单次尝试，revision 冲突时抛出 SnapshotConflictError)"""
+        import uuid
+
+        snapshot = self.get_snapshot()
+        base_revision = get_revision(snapshot)
+        assets = snapshot.get("assets", [])
+        tracks = snapshot.get("tracks", [])
+
         # 检查是否已存在
-        existing_asset = next((a for a in assets if a.get("filePath") == abs_path or a.get("id") == asset_id), None)
+        fingerprint = path_record.get("fingerprint")
+        existing_asset = next((a for a in assets if a.get("filePath") == path_record["filePath"] or a.get("id") == asset_id
+                               or (fingerprint and a.get("fingerprint") == fingerprint)), None)
         if not existing_asset:
             new_asset = {
                 "id": asset_id,
@@ -248,7 +300,7 @@ class AIcutClient:
                 "type": media_type,
                 "url": serve_url,
                 "thumbnailUrl": thumbnail_url, # 使用生成的缩略图
-                "filePath": abs_path,
+                **path_record,
                 "duration": duration or 0,
                 "isLinked": True
             }
@@ -318,7 +370,7 @@ class AIcutClient:
         target_track["elements"].append(new_element)
         
         # 5. 回写状态
-        return self.update_snapshot(snapshot)
+        return self.update_snapshot(snapshot, expected_revision=base_revision)
 
     def import_video(self, file_path: str, name: str = None, start_time: float = 0, track_id: str = None) -> Dict:
         """导入视频"""
@@ -328,6 +380,139 @@ class AIcutClient:
         """导入图片"""
         return self.import_media(file_path, "image", name, start_time, duration, track_id=track_id)
 
+    def _asset_file_path(self, asset_id: str) -> str:
+        """根据素材 ID 在快照中查找本地文件路径 (经 asset_paths 解析，工作区移动后依然有效)"""
+        for asset in self.get_snapshot().get("assets", []):
+            if asset.get("id") == asset_id:
+                file_path = resolve_asset(asset)
+                if not file_path:
+                    raise Exception(f"素材 {asset_id} 的本地文件不存在: {asset.get('filePath')}")
+                return file_path
+        raise Exception(f"未找到素材: {asset_id}")
+
+    def get_scene_cuts(self, asset_id: str, threshold: float = None, min_scene_len: float = None) -> List[float]:
+        """获取视频素材的镜头切换点 (秒)
+        
+        首次调用时流式解码一遍视频并计算切点，结果按文件内容缓存在
+        ai_workspace/cache/analysis 下，之后的调用直接读缓存。
+        
+        Args:
+            asset_id: 快照中的素材 ID
+            threshold: 切点判定阈值 (0-1，越大越保守)
+            min_scene_len: 最短镜头时长 (秒)
+        """
+        _use_media_tools()
+        import scenes
+
+        kwargs = {}
+        if threshold is not None:
+            kwargs["threshold"] = threshold
+        if min_scene_len is not None:
+            kwargs["min_scene_len"] = min_scene_len
+        return scenes.detect_scene_cuts(self._asset_file_path(asset_id), **kwargs)
+
+    def get_silences(self, asset_id: str, include_fillers: bool = False, **kwargs) -> List[List[float]]:
+        """获取音/视频素材中的静音区间 [[start, end], ...] (素材内时间，秒)
+        
+        Args:
+            asset_id: 快照中的素材 ID
+            include_fillers: 同时合并缓存的 ASR 词级时间戳中的语气词 (嗯/呃/um...)
+            **kwargs: 透传给 silence.detect_silences (enter_db, exit_db, min_silence, pad)
+        """
+        _use_media_tools()
+        import silence
+
+        return silence.cut_list(self._asset_file_path(asset_id), include_fillers=include_fillers, **kwargs)
+
+    def remove_silences(self, asset_id: str, include_fillers: bool = True, **kwargs) -> Dict:
+        """删除素材在时间轴上的所有静音/语气词片段 (波纹删除)
+        
+        所有区间在本地快照上一次性计算，作为一次带 revision 校验的快照更新提交，
+        而不是逐个元素调用 API；期间若快照被其他写入方修改则重新计算后重试。
+        
+        Returns:
+            {"removedSeconds": 删除总时长, "cuts": 删除的时间轴区间数, ...API 响应}
+        """
+        intervals = self.get_silences(asset_id, include_fillers=include_fillers, **kwargs)
+        result = {"removedSeconds": 0.0, "cuts": 0}
+
+        def edit(snapshot):
+            ranges = source_to_timeline(snapshot, asset_id, intervals)
+            result["removedSeconds"] = round(ripple_delete(snapshot, ranges), 3)
+            result["cuts"] = len(ranges)
+            return bool(ranges)
+
+        return dict(self._edit_snapshot(edit), **result)
+
+    def duck_bgm(self, voice_track_ids: List[str] = None, bgm_track_ids: List[str] = None,
+                 duck_db: float = -12.0, normalize_voice: bool = True) -> Dict:
+        """人声出现时自动压低背景音乐 (写入 BGM 元素的 volume 关键帧)
+        
+        人声区间来自静音检测，响度来自 EBU R128 分析，均按素材缓存；
+        所有改动作为一次快照更新提交。
+        
+        Args:
+            voice_track_ids: 人声轨道 ID (默认: 名称不匹配 BGM 规则的音频轨)
+            bgm_track_ids: 背景音乐轨道 ID (默认: 名称含 bgm/music/背景/音乐 的音频轨)
+            duck_db: 人声期间 BGM 的增益 (dB)
+            normalize_voice: 同时把人声元素音量调到目标响度 (-16 LUFS，真峰值不超过 -1 dBTP)
+        """
+        _use_media_tools()
+        import loudness
+        import silence
+
+        snapshot = self.get_snapshot()
+        audio_tracks = [t for t in snapshot.get("tracks", []) if t.get("type") == "audio"]
+        is_bgm = lambda t: BGM_TRACK_PATTERN.search(f"{t.get('id', '')} {t.get('name', '')}")
+        if bgm_track_ids is None:
+            bgm_track_ids = [t["id"] for t in audio_tracks if is_bgm(t)]
+        if voice_track_ids is None:
+            voice_track_ids = [t["id"] for t in audio_tracks if t["id"] not in bgm_track_ids]
+
+        # 分析在快照事务之外完成 (有缓存时很快)
+        assets = {a["id"]: a for a in snapshot.get("assets", [])}
+        speech, volumes = {}, {}
+        for track in snapshot.get("tracks", []):
+            if track.get("id") not in voice_track_ids:
+                continue
+            for el in track.get("elements", []):
+                asset = assets.get(el.get("mediaId"))
+                path = resolve_asset(asset) if asset else None
+                if not path:
+                    continue
+                speech[el["mediaId"]] = silence.speech_intervals(path)
+                if normalize_voice:
+                    volumes[el["mediaId"]] = loudness.normalized_volume(loudness.analyze_loudness(path))
+
+        result = {"duckedElements": 0}
+
+        def edit(data):
+            for track in data.get("tracks", []):
+                if track.get("id") in voice_track_ids:
+                    for el in track.get("elements", []):
+                        if el.get("mediaId") in volumes:
+                            el["volume"] = volumes[el["mediaId"]]
+            result["duckedElements"] = apply_ducking(data, voice_track_ids, bgm_track_ids, speech, duck_db)
+            return True
+
+        return dict(self._edit_snapshot(edit), **result)
+
+    def _edit_snapshot(self, edit) -> Dict:
+        """读取快照 -> edit(snapshot) 原地修改 -> 带 revision 校验一次写回
+        
+        edit 返回 False 表示无需写回。revision 冲突时重新读取并重做 edit。
+        """
+        for attempt in range(SNAPSHOT_WRITE_RETRIES):
+            snapshot = self.get_snapshot()
+            base_revision = get_revision(snapshot)
+            if not edit(snapshot):
+                return {"success": True}
+            try:
+                return self.update_snapshot(snapshot, expected_revision=base_revision)
+            except SnapshotConflictError:
+                if attempt == SNAPSHOT_WRITE_RETRIES - 1:
+                    raise
+
     def switch_project(self, project_id: str) -> Dict:
         """切换项目（如果ID不存在，系统会自动初始化一个新项目）
         
@@ -0,0 +1,243 @@
+"""
+Asset Paths - 可移植的素材路径 (工作区相对路径 + 内容指纹) 与带缓存的路径解析
+
+快照里的素材记录除 filePath (绝对路径，只作为提示，可能已失效) 外还保存:
+    "relativePath": "AIcut-Studio/apps/web/public/materials/a.mp4"   # 相对工作区根目录，/ 分隔
+    "fingerprint": "h_1a2b3c4d5e6f"                                    # media_io.content_hash (大小 + 首 1MB + 末 1KB)
+    "fileSize": 12345678
+
+解析顺序:
+1. 工作区根目录 + relativePath (整个工作区移动后依然有效，不需要改写快照)
+2. filePath，以及把旧绝对路径的后缀接到当前根目录上 (兼容只有 filePath 的旧快照)
+3. 查找表 ai_workspace/cache/asset_index.json (指纹 -> 最近一次出现的路径)，
+   用于工作区外的素材 (没有 relativePath)
+4. 以上都失效时才扫描 search_roots，只对大小相同的文件计算指纹，结果写回查找表
+
+查找表同时缓存每个文件 (大小, mtime) 对应的指纹，校验候选路径时不必重复读文件。
+
+用法:
+    from asset_paths import asset_record, resolve_asset
+
+    asset.update(asset_record(path))      # 写入素材时
+    path = resolve_asset(asset)           # 读取素材时，找不到返回 None
+
+    python tools/core/asset_paths.py --migrate   # 为旧快照补全 relativePath/fingerprint 并刷新 filePath
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from snapshot_store import SNAPSHOT_FILE, read_snapshot, update_snapshot
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media"))
+from media_io import content_hash
+
+WORKSPACE_ROOT = os.path.abspath(os.environ.get(
+    "WORKSPACE_ROOT", os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+INDEX_PATH = os.path.join(WORKSPACE_ROOT, "ai_workspace", "cache", "asset_index.json")
+SKIP_DIRS = {".git", "node_modules", ".next", "dist-electron", "dist", "bin", "obj", "ai_workspace"}
+
+
+def _normcase(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def relative_path(path: str, root: str = WORKSPACE_ROOT) -> Optional[str]:
+    """工作区内文件的相对路径 (/ 分隔)；工作区外返回 None"""
+    try:
+        rel = os.path.relpath(_normcase(path), _normcase(root))
+    except ValueError:  # Windows 上不在同一个盘
+        return None
+    if rel == os.pardir or rel.startswith(os.pardir + os.sep) or os.path.isabs(rel):
+        return None
+    # normcase 在 Windows 上会转小写，相对路径取自原始路径
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, "/")
+
+
+class AssetResolver:
+    def __init__(self, root: str = WORKSPACE_ROOT, index_path: Optional[str] = INDEX_PATH,
+                 search_roots: Optional[List[str]] = None):
+        """index_path=None 时只在内存里缓存；search_roots 默认为工作区根目录"""
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.search_roots = search_roots or [self.root]
+        self._lock = threading.Lock()
+        self._files: Dict[str, list] = {}       # 绝对路径 -> [size, mtime_ns, 指纹]
+        self._by_fingerprint: Dict[str, str] = {}
+        self._scanned = set()                    # 本进程内已扫描过但没找到的指纹
+        self._dirty = False
+        self._load()
+
+    # ---------- 查找表 ----------
+
+    def _load(self):
+        if not self.index_path:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                files = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return
+        for path, entry in files.items():
+            self._files[path] = entry
+            self._by_fingerprint[entry[2]] = path
+
+    def save(self):
+        """把查找表原子写回磁盘 (没有变化时不写)"""
+        with self._lock:
+            if not self.index_path or not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self._files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """带缓存的指纹：(大小, mtime) 未变时不重新读文件；文件不存在返回 None"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                return entry[2]
+        value = content_hash(path)
+        with self._lock:
+            self._files[path] = [stat.st_size, stat.st_mtime_ns, value]
+            self._by_fingerprint[value] = path
+            self._dirty = True
+        return value
+
+    def _lookup(self, value: str) -> Optional[str]:
+        path = self._by_fingerprint.get(value)
+        if path and self.fingerprint(path) == value:
+            return path
+        return None
+
+    # ---------- 解析 ----------
+
+    def _rebase(self, file_path: str) -> Iterable[str]:
+        """旧绝对路径的后缀 (至少两级) 接到当前根目录上，从长到短"""
+        parts = [p for p in re.split(r"[\\/]", file_path) if p]
+        for i in range(1, len(parts) - 1):
+            yield os.path.join(self.root, *parts[i:])
+
+    def _candidates(self, asset: Dict) -> Iterable[str]:
+        if asset.get("relativePath"):
+            yield os.path.join(self.root, *asset["relativePath"].split("/"))
+        file_path = asset.get("filePath")
+        if file_path:
+            yield file_path
+            yield from self._rebase(file_path)
+
+    def _scan(self, value: str, size: int) -> Optional[str]:
+        for base in self.search_roots:
+            for root, dirs, files in os.walk(base):
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        if os.path.getsize(path) != size:
+                            continue
+                    except OSError:
+                        continue
+                    if self.fingerprint(path) == value:
+                        return path
+        return None
+
+    def resolve(self, asset: Dict, scan: bool = True) -> Optional[str]:
+        """素材当前所在的真实路径；有指纹时优先返回内容一致的文件
+
+        所有位置都找不到同一内容时 (文件在原处被重新导出)，退回第一个存在的候选路径。
+        """
+        value = asset.get("fingerprint")
+        existing = None
+        for candidate in self._candidates(asset):
+            if not os.path.isfile(candidate):
+                continue
+            existing = existing or os.path.normpath(candidate)
+            if not value or self.fingerprint(candidate) == value:
+                path = os.path.normpath(candidate)
+                break
+        else:
+            path = self._lookup(value) if value else None
+            if not path and value and scan and asset.get("fileSize") is not None and value not in self._scanned:
+                path = self._scan(value, asset["fileSize"])
+                if not path:
+                    self._scanned.add(value)
+            path = path or existing
+        self.save()
+        return path
+
+    def record(self, path: str) -> Dict:
+        """写入快照的素材路径字段"""
+        path = os.path.abspath(path)
+        record = {"filePath": path, "fingerprint": self.fingerprint(path), "fileSize": os.path.getsize(path)}
+        rel = relative_path(path, self.root)
+        if rel:
+            record["relativePath"] = rel
+        self.save()
+        return record
+
+
+_default: Optional[AssetResolver] = None
+
+
+def get_resolver() -> AssetResolver:
+    global _default
+    if _default is None:
+        _default = AssetResolver()
+    return _default
+
+
+def resolve_asset(asset: Dict, scan: bool = True) -> Optional[str]:
+    return get_resolver().resolve(asset, scan)
+
+
+def asset_record(path: str) -> Dict:
+    return get_resolver().record(path)
+
+
+def migrate_snapshot(snapshot_path: str = SNAPSHOT_FILE, resolver: Optional[AssetResolver] = None) -> int:
+    """为能找到文件的素材补全 relativePath/fingerprint/fileSize，并把失效的 filePath 改成当前路径
+
+    返回更新的素材数。解析在锁外完成，只有最后的写入持锁。
+    """
+    resolver = resolver or get_resolver()
+    updates = {}
+    for asset in read_snapshot(snapshot_path).get("assets", []):
+        path = resolver.resolve(asset)
+        if not path:
+            continue
+        record = resolver.record(path)
+        if any(asset.get(k) != v for k, v in record.items()):
+            updates[asset.get("id")] = record
+    if not updates:
+        return 0
+
+    def apply(snapshot):
+        for asset in snapshot.get("assets", []):
+            if asset.get("id") in updates:
+                asset.update(updates[asset["id"]])
+
+    update_snapshot(apply, snapshot_path)
+    return len(updates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="可移植素材路径: 解析 / 迁移快照")
+    parser.add_argument("--migrate", action="store_true", help="为快照素材补全 relativePath/fingerprint 并刷新 filePath")
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE)
+    args = parser.parse_args()
+    if args.migrate:
+        print(f"[AssetPaths] Updated {migrate_snapshot(args.snapshot)} assets")
+    else:
+        parser.print_help()
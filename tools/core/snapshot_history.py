@@ -6,6 +6,7 @@ import os
 import json
 import shutil
 from datetime import datetime
+from snapshot_store import read_snapshot, write_snapshot
 
 WORKSPACE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ai_workspace")
 SNAPSHOT_FILE = os.path.join(WORKSPACE_DIR, "project-snapshot.json")
@@ -69,8 +70,8 @@ def restore(filename):
     # 先备份当前版本
     backup()
     
-    # 恢复
-    shutil.copy2(backup_path, SNAPSHOT_FILE)
+    # 恢复 (经由 snapshot_store 原子写入，revision 继续单调递增)
+    write_snapshot(read_snapshot(backup_path), SNAPSHOT_FILE)
     print(f"[History] Restored from: {filename}")
     return True
 
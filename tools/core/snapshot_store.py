@@ -0,0 +1,176 @@
+"""
+Snapshot Store - project-snapshot.json 的唯一写入通道
+
+所有 Python 写入方都应通过本模块读写快照，而不是直接 open(..., "w")：
+- 文件锁 (project-snapshot.json.lock) 串行化多个写入进程
+- 先写同目录临时文件、fsync，再 os.replace 原子替换，读取方永远看不到半截 JSON
+- 每次写入把顶层 "revision" 单调 +1，可用 expected_revision 做 CAS，发现丢失更新
+
+用法:
+    from snapshot_store import update_snapshot
+
+    def add_marker(snapshot):
+        snapshot.setdefault("project", {}).setdefault("markers", []).append(...)
+
+    update_snapshot(add_marker)
+"""
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+WORKSPACE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ai_workspace")
+SNAPSHOT_FILE = os.path.join(WORKSPACE_DIR, "project-snapshot.json")
+REVISION_KEY = "revision"
+LOCK_TIMEOUT = 10.0  # 秒
+LOCK_POLL_INTERVAL = 0.05
+
+
+class SnapshotLockTimeout(Exception):
+    """在 LOCK_TIMEOUT 内没有拿到快照写锁"""
+
+
+class SnapshotConflictError(Exception):
+    """CAS 失败：磁盘上的 revision 与调用方读取时的 revision 不一致"""
+
+    def __init__(self, expected: int, actual: int):
+        super().__init__(f"Snapshot revision conflict: expected {expected}, found {actual}")
+        self.expected = expected
+        self.actual = actual
+
+
+def _try_lock(fd) -> bool:
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if os.name == "nt":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def snapshot_lock(path: str = SNAPSHOT_FILE, timeout: float = LOCK_TIMEOUT):
+    """获取快照的跨进程排他锁 (锁文件与快照同目录)"""
+    lock_path = os.path.abspath(path) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise SnapshotLockTimeout(f"Timed out waiting for {lock_path}")
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def get_revision(snapshot: Optional[Dict]) -> int:
+    """读取快照中的 revision (旧快照没有该字段，视为 0)"""
+    if not snapshot:
+        return 0
+    try:
+        return int(snapshot.get(REVISION_KEY, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def read_snapshot(path: str = SNAPSHOT_FILE) -> Dict:
+    """读取快照；文件不存在或为空时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if not content.strip():
+        return {}
+    return json.loads(content)
+
+
+def _atomic_write_json(path: str, data: Dict, indent: Optional[int]):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # rename 本身也要落盘 (Windows 不支持对目录 fsync)
+    if os.name != "nt":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _write_locked(snapshot: Dict, path: str, expected_revision: Optional[int], indent: Optional[int]) -> int:
+    current = get_revision(read_snapshot(path)) if os.path.exists(path) else 0
+    if expected_revision is not None and expected_revision != current:
+        raise SnapshotConflictError(expected_revision, current)
+    snapshot[REVISION_KEY] = current + 1
+    _atomic_write_json(path, snapshot, indent)
+    return snapshot[REVISION_KEY]
+
+
+def write_snapshot(
+    snapshot: Dict,
+    path: str = SNAPSHOT_FILE,
+    expected_revision: Optional[int] = None,
+    indent: Optional[int] = 2,
+) -> int:
+    """原子写入快照，返回新的 revision
+
+    Args:
+        snapshot: 完整快照 (会被原地写入新的 revision)
+        path: 快照文件路径，默认 ai_workspace/project-snapshot.json
+        expected_revision: 若给出，磁盘上的 revision 必须与之相等，否则抛出 SnapshotConflictError
+        indent: JSON 缩进
+    """
+    with snapshot_lock(path):
+        return _write_locked(snapshot, path, expected_revision, indent)
+
+
+def update_snapshot(
+    mutator: Callable[[Dict], Optional[Dict]],
+    path: str = SNAPSHOT_FILE,
+    indent: Optional[int] = 2,
+) -> Dict:
+    """在锁内完成 读取 -> 修改 -> 原子写回，返回写入后的快照
+
+    mutator 可以原地修改快照并返回 None，也可以返回一个新的快照字典。
+    """
+    with snapshot_lock(path):
+        snapshot = read_snapshot(path)
+        result = mutator(snapshot)
+        if result is not None:
+            snapshot = result
+        _write_locked(snapshot, path, None, indent)
+        return snapshot
@@ -0,0 +1,219 @@
+"""
+时间轴批量编辑 - 在快照数据上直接计算，一次写回
+
+元素时间语义与前端 timeline-store 一致：
+    可见时长 = duration - trimStart - trimEnd
+    时间轴位置 t 对应素材内时间 trimStart + (t - startTime)
+"""
+
+from typing import Dict, List
+
+# 切分后短于此时长 (秒) 的碎片直接丢弃
+MIN_PIECE_DURATION = 0.05
+
+
+def visible_duration(element: Dict) -> float:
+    return element.get("duration", 0) - element.get("trimStart", 0) - element.get("trimEnd", 0)
+
+
+def source_to_timeline(snapshot: Dict, media_id: str, intervals: List[List[float]]) -> List[List[float]]:
+    """把素材内时间区间映射为时间轴区间 (覆盖所有引用该素材的元素)"""
+    result = []
+    for track in snapshot.get("tracks", []):
+        for el in track.get("elements", []):
+            if el.get("mediaId") != media_id:
+                continue
+            src_start = el.get("trimStart", 0)
+            src_end = src_start + visible_duration(el)
+            for start, end in intervals:
+                start, end = max(start, src_start), min(end, src_end)
+                if end > start:
+                    offset = el.get("startTime", 0) - src_start
+                    result.append([start + offset, end + offset])
+    return result
+
+
+def _merge(ranges: List[List[float]]) -> List[List[float]]:
+    merged: List[List[float]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _removed_before(t: float, ranges: List[List[float]]) -> float:
+    return sum(max(0.0, min(end, t) - start) for start, end in ranges if start < t)
+
+
+def _shift_keyframes(keyframes: Dict, offset: float, length: float) -> Dict:
+    shifted = {}
+    for prop, frames in keyframes.items():
+        kept = [dict(kf, time=kf["time"] - offset) for kf in frames if offset <= kf["time"] <= offset + length]
+        if kept:
+            shifted[prop] = kept
+    return shifted
+
+
+def ripple_delete(snapshot: Dict, ranges: List[List[float]]) -> float:
+    """在所有轨道上删除时间轴区间，并把后面的元素前移 (原地修改快照)
+
+    跨越删除区间的元素被切成多段，每段保留原素材对齐 (trimStart/trimEnd)，
+    第一段沿用原 id，其余段追加快照中尚未使用的 _1, _2 ... 后缀 (重复切分同一元素也不会重名)。
+
+    Returns:
+        实际删除的总时长 (秒)
+    """
+    ranges = _merge([r for r in ranges if r[1] > r[0]])
+    if not ranges:
+        return 0.0
+
+    used_ids = {el.get("id") for track in snapshot.get("tracks", []) for el in track.get("elements", [])}
+
+    def new_id(base: str) -> str:
+        n = 1
+        while f"{base}_{n}" in used_ids:
+            n += 1
+        used_ids.add(f"{base}_{n}")
+        return f"{base}_{n}"
+
+    for track in snapshot.get("tracks", []):
+        new_elements = []
+        for el in track.get("elements", []):
+            el_start = el.get("startTime", 0)
+            el_end = el_start + visible_duration(el)
+
+            # 元素可见范围减去删除区间，得到保留的片段
+            pieces, cursor = [], el_start
+            for start, end in ranges:
+                if end <= cursor or start >= el_end:
+                    continue
+                if start > cursor:
+                    pieces.append((cursor, start))
+                cursor = max(cursor, end)
+            if cursor < el_end:
+                pieces.append((cursor, el_end))
+            pieces = [(s, e) for s, e in pieces if e - s >= MIN_PIECE_DURATION]
+
+            for index, (start, end) in enumerate(pieces):
+                piece = dict(el)
+                if index:
+                    piece["id"] = new_id(el["id"])
+                offset = start - el_start
+                piece["trimStart"] = round(el.get("trimStart", 0) + offset, 6)
+                piece["trimEnd"] = round(el.get("duration", 0) - piece["trimStart"] - (end - start), 6)
+                piece["startTime"] = round(start - _removed_before(start, ranges), 6)
+                if el.get("keyframes") and offset:
+                    piece["keyframes"] = _shift_keyframes(el["keyframes"], offset, end - start)
+                    if not piece["keyframes"]:
+                        del piece["keyframes"]
+                new_elements.append(piece)
+        track["elements"] = new_elements
+
+    return sum(end - start for start, end in ranges)
+
+
+def media_ranges(snapshot: Dict, track_ids: List[str], active: Dict[str, List[List[float]]]) -> List[List[float]]:
+    """指定轨道上各元素的"有效"时间轴区间
+
+    Args:
+        active: mediaId -> 素材内有效区间 (如人声区间)；不在其中的素材视为整段有效
+    """
+    ranges = []
+    for track in snapshot.get("tracks", []):
+        if track.get("id") not in track_ids:
+            continue
+        for el in track.get("elements", []):
+            if el.get("hidden") or el.get("muted"):
+                continue
+            media_id = el.get("mediaId")
+            if media_id in active:
+                ranges += source_to_timeline({"tracks": [{"elements": [el]}]}, media_id, active[media_id])
+            else:
+                start = el.get("startTime", 0)
+                ranges.append([start, start + visible_duration(el)])
+    return _merge(ranges)
+
+
+def duck_keyframes(element: Dict, ranges: List[List[float]], duck_db: float, attack: float, release: float) -> List[Dict]:
+    """为元素生成压低音量的 volume 关键帧 (时间相对元素起点)
+
+    每个区间前 attack 秒开始淡下，区间结束后 release 秒内恢复；
+    间隔短于 attack + release 的相邻区间合并，避免音量来回抽动。
+    """
+    base = element.get("volume", 1)
+    ducked = round(base * 10 ** (duck_db / 20.0), 4)
+    el_start = element.get("startTime", 0)
+    length = visible_duration(element)
+
+    # 转为元素相对时间，并裁剪到元素范围
+    windows: List[List[float]] = []
+    for start, end in ranges:
+        start, end = start - el_start, end - el_start
+        if end <= 0 or start >= length:
+            continue
+        if windows and start - windows[-1][1] < attack + release:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+
+    points: List[tuple] = []
+    for start, end in windows:
+        points += [(start - attack, base), (start, ducked), (end, ducked), (end + release, base)]
+    if not points:
+        return []
+
+    def value_at(t: float) -> float:
+        # 分段线性插值，与前端 interpolateKeyframes 一致 (两端取端点值)
+        if t <= points[0][0]:
+            return points[0][1]
+        for (t0, v0), (t1, v1) in zip(points, points[1:]):
+            if t0 <= t <= t1:
+                return v0 if t1 == t0 else v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        return points[-1][1]
+
+    # 超出元素范围的点裁掉，并在边界处补上插值结果
+    inside = [(t, v) for t, v in points if 0 <= t <= length]
+    if points[0][0] < 0 and (not inside or inside[0][0] > 0):
+        inside.insert(0, (0.0, value_at(0.0)))
+    if points[-1][0] > length and inside[-1][0] < length:
+        inside.append((length, value_at(length)))
+
+    return [
+        {"id": f"duck_{index}", "time": round(t, 3), "value": round(v, 4), "easing": "linear"}
+        for index, (t, v) in enumerate(inside)
+    ]
+
+
+def apply_ducking(
+    snapshot: Dict,
+    voice_track_ids: List[str],
+    bgm_track_ids: List[str],
+    speech: Dict[str, List[List[float]]],
+    duck_db: float = -12.0,
+    attack: float = 0.25,
+    release: float = 0.6,
+) -> int:
+    """在 BGM 轨道元素上写入 volume 关键帧，在人声有效区间内压低 (原地修改快照)
+
+    已有的 volume 关键帧会被整体替换。
+
+    Returns:
+        写入关键帧的元素数
+    """
+    ranges = media_ranges(snapshot, voice_track_ids, speech)
+    count = 0
+    for track in snapshot.get("tracks", []):
+        if track.get("id") not in bgm_track_ids:
+            continue
+        for el in track.get("elements", []):
+            keyframes = dict(el.get("keyframes") or {})
+            new_frames = duck_keyframes(el, ranges, duck_db, attack, release)
+            if new_frames:
+                keyframes["volume"] = new_frames
+            else:
+                keyframes.pop("volume", None)
+            el["keyframes"] = keyframes
+            count += 1 if new_frames else 0
+    return count
@@ -1,7 +1,4 @@
-
-import asyncio
 import os
-import json
 import sys
 import time
 from pathlib import Path
@@ -9,6 +6,9 @@ from pathlib import Path
 # Add tools to path
 sys.path.append(os.path.join(os.getcwd(), "tools"))
 from generators.flux_api import generate_image_flux
+from generators.gen_orchestrator import Orchestrator
+sys.path.append(os.path.join(os.getcwd(), "tools", "core"))
+from snapshot_store import update_snapshot
 import edge_tts
 
 # Configuration
@@ -46,111 +46,123 @@ SCRIPT_CONTENT = [
     }
 ]
 
-async def generate_assets():
-    print("🚀 Starting AI Asset Generation...")
-    
-    generated_assets = []
-    
-    for i, item in enumerate(SCRIPT_CONTENT):
-        print(f"\n--- Processing Segment {i+1} ---")
-        
-        # 1. Generate Image (Flux)
-        image_filename = f"intro_img_{i}.jpg"
-        image_abs_path = os.path.join(IMAGES_DIR, image_filename)
-        image_rel_url = f"/materials/generated_intro/images/{image_filename}"
-        
-        if not os.path.exists(image_abs_path):
-            print(f"🎨 Generating Image: {item['prompt'][:30]}...")
-            success = generate_image_flux(item["prompt"], image_abs_path)
-            if not success:
-                print("❌ Image generation failed, pushing placeholder or skipping.")
-                # We'll rely on error handling or existing files
-        else:
-            print(f"⏭️ Image exists: {image_filename}")
-
-        # 2. Generate Audio (Edge TTS)
-        audio_filename = f"intro_voice_{i}.mp3"
-        audio_abs_path = os.path.join(AUDIO_DIR, audio_filename)
-        audio_rel_url = f"/materials/generated_intro/audio/{audio_filename}"
-        
-        if not os.path.exists(audio_abs_path):
-            print(f"🎙️ Generating Audio: {item['text'][:20]}...")
-            communicate = edge_tts.Communicate(item["text"], "zh-CN-YunxiNeural")
-            await communicate.save(audio_abs_path)
-        else:
-            print(f"⏭️ Audio exists: {audio_filename}")
-            
-        # Store for timeline
-        generated_assets.append({
-            "image_path": image_abs_path,
-            "image_url": image_rel_url,
-            "audio_path": audio_abs_path,
-            "audio_url": audio_rel_url,
-            "text": item["text"],
-            "base_duration": item["duration_est"] # Will be updated by actual audio if possible
-        })
-        
-    return generated_assets
-
-def update_timeline(assets_data):
-    print("\n📝 Updating Project Timeline...")
-    
-    try:
-        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-            snapshot = json.load(f)
-    except Exception as e:
-        print(f"❌ Error reading snapshot: {e}")
-        return
-
-    # Clear existing tracks completely for a fresh "Full Edit"
-    snapshot["tracks"] = []
-    snapshot["assets"] = [] # We will re-register only what we use, or append? 
-    # Let's keep existing assets in 'assets' list to be safe, but rebuild tracks.
-    # Actually, let's just append our new assets to 'assets'
-    
-    current_assets = snapshot.get("assets", [])
-    
-    # Create Tracks
-    track_video = {"id": "track_main", "name": "Video", "type": "media", "isMain": True, "elements": []}
-    track_voice = {"id": "track_voice", "name": "Voiceover", "type": "media", "isMain": False, "elements": []}
-    track_subs = {"id": "track_subs", "name": "Subtitles", "type": "text", "isMain": False, "elements": []}
-    
+TTS_VOICE = "zh-CN-YunxiNeural"
+
+
+def segment_paths(i):
+    image_filename = f"intro_img_{i}.jpg"
+    audio_filename = f"intro_voice_{i}.mp3"
+    return {
+        "image_path": os.path.join(IMAGES_DIR, image_filename),
+        "image_url": f"/materials/generated_intro/images/{image_filename}",
+        "audio_path": os.path.join(AUDIO_DIR, audio_filename),
+        "audio_url": f"/materials/generated_intro/audio/{audio_filename}",
+    }
+
+
+def generate_image(job, deps):
+    if os.path.exists(job.output):
+        print(f"⏭️ Image exists: {os.path.basename(job.output)}")
+        return job.output
+    print(f"🎨 Generating Image: {job.params['prompt'][:30]}...")
+    return generate_image_flux(job.params["prompt"], job.output)
+
+
+async def generate_voice(job, deps):
+    if os.path.exists(job.output):
+        print(f"⏭️ Audio exists: {os.path.basename(job.output)}")
+        return job.output
+    print(f"🎙️ Generating Audio: {job.params['text'][:20]}...")
+    communicate = edge_tts.Communicate(job.params["text"], job.params["voice"])
+    await communicate.save(job.output)
+
+
+def build_segments():
+    """每段的素材路径和起始时间 (按预估时长排布，插入顺序与生成完成顺序无关)"""
+    segments = []
     current_time = 0.0
-    
-    for i, data in enumerate(assets_data):
-        # 1. Register Assets
-        img_id = f"asset_intro_img_{i}_{int(time.time())}"
-        audio_id = f"asset_intro_voice_{i}_{int(time.time())}"
-        
-        # Add Image Asset
-        current_assets.append({
-            "id": img_id,
-            "name": f"Intro Image {i}",
-            "type": "image",
-            "url": data["image_url"],
-            "filePath": data["image_path"],
-            "width": 1024,
-            "height": 576,
-            "duration": 5 # Default
-        })
-        
-        # Add Audio Asset
-        current_assets.append({
-            "id": audio_id,
-            "name": f"Intro Voice {i}",
-            "type": "audio",
-            "url": data["audio_url"],
-            "filePath": data["audio_path"],
-            "duration": data["base_duration"] # Approximation
-        })
-        
-        # Duration Logic: Use estimated duration (since we can't easily probe mp3 length without extra libs here)
-        # In a real app, we'd read the file header.
-        seg_duration = data["base_duration"]
-        
-        # 2. Add Video/Image Element
-        track_video["elements"].append({
-            "id": f"el_vid_{i}_{int(time.time())}",
+    for i, item in enumerate(SCRIPT_CONTENT):
+        segments.append(dict(
+            segment_paths(i),
+            text=item["text"],
+            prompt=item["prompt"],
+            start_time=current_time,
+            base_duration=item["duration_est"],  # Will be updated by actual audio if possible
+        ))
+        current_time += item["duration_est"]
+    return segments
+
+
+def generate_assets(segments, on_segment_ready):
+    """并行生成所有分段的图片和配音；每段两者都完成后立即调用 on_segment_ready(i, segment)"""
+    print("🚀 Starting AI Asset Generation...")
+    orch = Orchestrator()
+
+    for i, seg in enumerate(segments):
+        orch.add(f"image_{i}", "flux", generate_image, output=seg["image_path"],
+                 params={"model": "Kwai-Kolors/Kolors", "prompt": seg["prompt"], "size": "1024x576"})
+        orch.add(f"voice_{i}", "tts", generate_voice, output=seg["audio_path"],
+                 params={"text": seg["text"], "voice": TTS_VOICE})
+        orch.add(f"insert_{i}", "timeline", lambda job, deps, i=i: on_segment_ready(i, segments[i]),
+                 deps=[f"image_{i}", f"voice_{i}"])
+
+    results = orch.run()
+    inserted = sum(results[f"insert_{i}"].ok for i in range(len(segments)))
+    print(f"\n📦 Segments inserted: {inserted}/{len(segments)}")
+    return results
+
+
+def reset_timeline(segments):
+    """清空轨道 (Full Edit)，建立空的视频/配音/字幕轨道"""
+    print("\n📝 Preparing Project Timeline...")
+
+    def reset(snapshot):
+        snapshot["tracks"] = [
+            {"id": "track_subs", "name": "Subtitles", "type": "text", "isMain": False, "elements": []},
+            {"id": "track_voice", "name": "Voiceover", "type": "media", "isMain": False, "elements": []},
+            {"id": "track_main", "name": "Video", "type": "media", "isMain": True, "elements": []},
+        ]  # Text on top
+        snapshot.setdefault("assets", [])
+        snapshot["project"]["duration"] = sum(seg["base_duration"] for seg in segments)
+
+    update_snapshot(reset, SNAPSHOT_PATH)
+
+
+def insert_segment(i, data):
+    """把一段的图片、配音和字幕插入时间轴 (在该段素材生成完成后立即调用)"""
+    stamp = int(time.time())
+    img_id = f"asset_intro_img_{i}_{stamp}"
+    audio_id = f"asset_intro_voice_{i}_{stamp}"
+    # Duration Logic: Use estimated duration (since we can't easily probe mp3 length without extra libs here)
+    # In a real app, we'd read the file header.
+    seg_duration = data["base_duration"]
+    current_time = data["start_time"]
+
+    def insert(snapshot):
+        tracks = {track["id"]: track for track in snapshot["tracks"]}
+        snapshot.setdefault("assets", []).extend([
+            {
+                "id": img_id,
+                "name": f"Intro Image {i}",
+                "type": "image",
+                "url": data["image_url"],
+                "filePath": data["image_path"],
+                "width": 1024,
+                "height": 576,
+                "duration": 5  # Default
+            },
+            {
+                "id": audio_id,
+                "name": f"Intro Voice {i}",
+                "type": "audio",
+                "url": data["audio_url"],
+                "filePath": data["audio_path"],
+                "duration": data["base_duration"]  # Approximation
+            },
+        ])
+
+        tracks["track_main"]["elements"].append({
+            "id": f"el_vid_{i}_{stamp}",
             "type": "media",
             "mediaId": img_id,
             "name": f"Scene {i}",
@@ -161,10 +173,9 @@ def update_timeline(assets_data):
             "trimStart": 0, "trimEnd": 0,
             "muted": True
         })
-        
-        # 3. Add Voice Element
-        track_voice["elements"].append({
-            "id": f"el_voice_{i}_{int(time.time())}",
+
+        tracks["track_voice"]["elements"].append({
+            "id": f"el_voice_{i}_{stamp}",
             "type": "media",
             "mediaId": audio_id,
             "name": f"Voice {i}",
@@ -176,16 +187,15 @@ def update_timeline(assets_data):
             "volume": 1.0,
             "muted": False
         })
-        
-        # 4. Add Subtitle Element
-        track_subs["elements"].append({
-            "id": f"el_sub_{i}_{int(time.time())}",
+
+        tracks["track_subs"]["elements"].append({
+            "id": f"el_sub_{i}_{stamp}",
             "type": "text",
             "name": f"Sub {i}",
             "content": data["text"],
             "startTime": current_time,
             "duration": seg_duration,
-            "x": 0, "y": 450, # Bottom
+            "x": 0, "y": 450,  # Bottom
             "width": 1000, "height": 100,
             "scale": 1, "rotation": 0, "opacity": 1,
             "fontSize": 50,
@@ -198,19 +208,15 @@ def update_timeline(assets_data):
             "textDecoration": "none",
             "trimStart": 0, "trimEnd": 0
         })
-        
-        current_time += seg_duration
-
-    snapshot["assets"] = current_assets
-    snapshot["tracks"] = [track_subs, track_voice, track_video] # Text on top
-    snapshot["project"]["duration"] = current_time
-    
-    # Save
-    with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=2, ensure_ascii=False)
-    
-    print("✅ Project snapshot updated successfully!")
+
+        for track in tracks.values():
+            track["elements"].sort(key=lambda el: el["startTime"])
+
+    update_snapshot(insert, SNAPSHOT_PATH)
+    print(f"✅ Segment {i + 1} inserted into timeline")
+
 
 if __name__ == "__main__":
-    assets = asyncio.run(generate_assets())
-    update_timeline(assets)
+    segments = build_segments()
+    reset_timeline(segments)
+    generate_assets(segments, insert_segment)
@@ -1,7 +1,10 @@
 import os
-import json
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from snapshot_store import write_snapshot
+
 def main():
     base_url = "/materials/ai-generated"
     gen_dir = "AIcut-Studio/apps/web/public/materials/ai-generated"
@@ -76,8 +79,7 @@ def main():
         ]
     }
     
-    with open("ai_workspace/project-snapshot.json", "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+    write_snapshot(snapshot, "ai_workspace/project-snapshot.json")
     print("🚀 Project Snapshot Updated with AI Assets!")
 
 if __name__ == "__main__":
@@ -1,12 +1,30 @@
 import json
 import requests
 import os
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media"))
+
 # 配置
 API_URL = "http://localhost:3000/api/ai-edit"
 SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "../.aicut/project-snapshot.json")
 
+
+def shot_aligned_duration(asset, max_duration):
+    """把视频时长截到 max_duration 之前的最后一个镜头切点，避免在镜头中间硬切"""
+    duration = min(asset.get("duration", 0) or 3, max_duration)
+    file_path = asset.get("filePath")
+    if not file_path or not os.path.exists(file_path):
+        return duration
+    try:
+        from scenes import detect_scene_cuts
+        cuts = [c for c in detect_scene_cuts(file_path) if 1 <= c <= duration]
+    except Exception as e:
+        print(f"Scene detection skipped for {asset['name']}: {e}")
+        return duration
+    return cuts[-1] if cuts and duration < (asset.get("duration") or 0) else duration
+
 def create_timeline():
     print(f"Reading snapshot from: {SNAPSHOT_PATH}")
     
@@ -72,8 +90,12 @@ def create_timeline():
     # 2.2 放入其他视频/图片
     for i, asset in enumerate(visual_assets):
         # 如果是视频，用原时长（最长10秒，避免太长）；如果是图片，给 3 秒
+        # 视频在上限前最后一个镜头切点处结束
         max_duration = 10 if asset["type"] == "video" else 3
-        duration = min(asset.get("duration", 0) or 3, max_duration)
+        if asset["type"] == "video":
+            duration = shot_aligned_duration(asset, max_duration)
+        else:
+            duration = min(asset.get("duration", 0) or 3, max_duration)
         if duration < 1: duration = 3 # 兜底
 
         main_track["elements"].append({
@@ -1,7 +1,11 @@
 import os
 import requests
 import json
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import argparse
 import sys
@@ -15,6 +19,96 @@ if env_path.exists():
     load_dotenv(env_path)
 
 SILICONFLOW_API_KEY = os.getenv("SILICONFLOW_API_KEY")
+API_URL = "https://api.siliconflow.cn/v1/images/generations"
+DEFAULT_MODEL = "Kwai-Kolors/Kolors"
+DEFAULT_WORKERS = 4
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers"))
+from download_manager import fetch_file, request_with_retry
+
+
+class FluxClient:
+    """
+    Session-based SiliconFlow image generation client.
+
+    One HTTPS connection pool is reused for all API calls; transient API
+    errors are retried with backoff; generated images are streamed to disk
+    (with resume) by the shared download manager.
+
+    Args:
+        api_key: SiliconFlow key (default: SILICONFLOW_API_KEY).
+        model: Model name.
+        workers: Maximum concurrent generations in generate_many().
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL, workers: int = DEFAULT_WORKERS):
+        self.api_key = api_key or SILICONFLOW_API_KEY
+        self.model = model
+        self.workers = workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def generate(self, prompt: str, output_path: str, width: int = 1024, height: int = 576) -> bool:
+        """Generates one image and streams it to output_path."""
+        if not self.api_key:
+            print("Error: SILICONFLOW_API_KEY not found. Please configure in .env file.")
+            return False
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "image_size": f"{width}x{height}",
+            "num_inference_steps": 25
+        }
+
+        print(f"Generating image: {prompt[:50]}...")
+        try:
+            response = request_with_retry(self.session, "POST", API_URL, json=payload)
+            result = response.json()
+        except Exception as e:
+            print(f"Request error: {str(e)}")
+            if getattr(e, "response", None) is not None:
+                print(f"Response content: {e.response.text}")
+            return False
+
+        if not result.get("data"):
+            print(f"Generation failed, API returned abnormal result: {result}")
+            return False
+
+        # The image CDN is fetched through a separate session, so the API key is never sent there
+        if not fetch_file(result["data"][0]["url"], output_path).ok:
+            return False
+        print(f"Image saved: {output_path}")
+        return True
+
+    def generate_many(self, prompts: List[str], output_paths: List[str],
+                      width: int = 1024, height: int = 576) -> List[bool]:
+        """Generates many images with at most `workers` in flight; results follow input order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda job: self.generate(job[0], job[1], width, height),
+                                 zip(prompts, output_paths)))
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> FluxClient:
+    """Process-wide client so repeated generate_image_flux() calls share one connection pool."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = FluxClient()
+        return _default_client
+
 
 def generate_image_flux(prompt: str, output_path: str, width: int = 1024, height: int = 576):
     """
@@ -26,56 +120,7 @@ def generate_image_flux(prompt: str, output_path: str, width: int = 1024, height
         width: Image width (default 1024, 16:9 ratio).
         height: Image height (default 576, 16:9 ratio).
     """
-    if not SILICONFLOW_API_KEY:
-        print("Error: SILICONFLOW_API_KEY not found. Please configure in .env file.")
-        return False
-
-    url = "https://api.siliconflow.cn/v1/images/generations"
-    
-    headers = {
-        "Authorization": f"Bearer {SILICONFLOW_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    # Use Kolors model
-    payload = {
-        "model": "Kwai-Kolors/Kolors",
-        "prompt": prompt,
-        "image_size": f"{width}x{height}",
-        "num_inference_steps": 25
-    }
-
-    print(f"Generating image: {prompt[:50]}...")
-    
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status() # Check for HTTP errors
-        
-        result = response.json()
-        
-        if 'data' in result and len(result['data']) > 0:
-            image_url = result['data'][0]['url']
-            
-            # Download image
-            img_data = requests.get(image_url).content
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            with open(output_path, 'wb') as f:
-                f.write(img_data)
-                
-            print(f"Image saved: {output_path}")
-            return True
-        else:
-            print(f"Generation failed, API returned abnormal result: {result}")
-            return False
-            
-    except Exception as e:
-        print(f"Request error: {str(e)}")
-        if 'response' in locals():
-            print(f"Response content: {response.text}")
-        return False
+    return get_client().generate(prompt, output_path, width, height)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -0,0 +1,246 @@
+"""
+生成任务编排器 - 依赖 DAG + 按提供方限流并发
+
+脚本化流程里的图片 (Flux)、配音 (TTS)、视频生成和"插入时间轴"都是独立的任务，
+按依赖关系组成 DAG：没有依赖关系的任务同时运行，每个提供方有自己的并发上限
+(避免触发 API 限流)，失败自动重试，插入时间轴的任务在其依赖完成后立刻执行，
+不必等全部素材生成完。
+
+带 params 的任务按内容寻址缓存：相同 (提供方, 参数) 的产物保存在
+ai_workspace/cache/generated/，再次运行时直接硬链接到输出路径，不再调用 API。
+
+用法:
+    orch = Orchestrator(limits={"flux": 3, "tts": 4, "timeline": 1})
+    orch.add("img_0", "flux", lambda job, deps: generate_image_flux(prompt, job.output),
+             output="img_0.jpg", params={"prompt": prompt})
+    orch.add("voice_0", "tts", synth_voice, output="voice_0.mp3", params={"text": text})
+    orch.add("insert_0", "timeline", insert_segment, deps=["img_0", "voice_0"])
+    results = orch.run()
+"""
+import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import inspect
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+GENERATED_CACHE_DIR = os.path.join(PROJECT_ROOT, "ai_workspace", "cache", "generated")
+
+# 各提供方默认并发上限；timeline 为 1，快照写入在进程内串行
+DEFAULT_LIMITS = {"flux": 3, "tts": 4, "video": 2, "timeline": 1}
+DEFAULT_LIMIT = 2
+MAX_RETRIES = 2
+RETRY_DELAY = 2.0
+
+
+class GenerationError(Exception):
+    pass
+
+
+@dataclass
+class GenJob:
+    """一个生成任务
+
+    fn(job, deps) 的 deps 为 {依赖任务 id: 结果}。返回 False 视为失败；
+    设置了 output 时返回 True/None 则结果为 output 路径。
+    """
+    id: str
+    provider: str
+    fn: Callable
+    deps: List[str] = field(default_factory=list)
+    output: Optional[str] = None
+    params: Optional[Dict] = None
+    retries: int = MAX_RETRIES
+
+
+@dataclass
+class JobResult:
+    id: str
+    status: str                 # done / cached / failed / skipped
+    value: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("done", "cached")
+
+
+def cache_key(provider: str, params: Dict) -> str:
+    payload = json.dumps({"provider": provider, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _place(source: str, target: str):
+    """硬链接 (跨盘时复制) 到目标路径，原子替换"""
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+
+
+def _call(fn: Callable, job: GenJob, deps: Dict[str, Any]):
+    # 异步函数 (如 edge_tts) 在工作线程自己的事件循环里运行
+    if inspect.iscoroutinefunction(fn):
+        return asyncio.run(fn(job, deps))
+    result = fn(job, deps)
+    if inspect.isawaitable(result):
+        async def await_result():
+            return await result
+        return asyncio.run(await_result())
+    return result
+
+
+class Orchestrator:
+    """DAG 调度器
+
+    Args:
+        limits: {提供方: 并发上限}，未列出的提供方使用 DEFAULT_LIMIT
+        cache_dir: 内容寻址缓存目录 (None 表示不缓存)
+        on_complete: 每个任务结束时的回调 on_complete(job, result)，在调度线程中调用
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 cache_dir: Optional[str] = GENERATED_CACHE_DIR,
+                 on_complete: Optional[Callable[[GenJob, JobResult], None]] = None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.cache_dir = cache_dir
+        self.on_complete = on_complete
+        self.jobs: Dict[str, GenJob] = {}
+
+    def add(self, job_id: str, provider: str, fn: Callable, deps: Optional[List[str]] = None,
+            output: Optional[str] = None, params: Optional[Dict] = None,
+            retries: int = MAX_RETRIES) -> GenJob:
+        if job_id in self.jobs:
+            raise ValueError(f"Duplicate job id: {job_id}")
+        job = GenJob(job_id, provider, fn, list(deps or []), output, params, retries)
+        self.jobs[job_id] = job
+        return job
+
+    # --- 调度 ---
+
+    def _check_graph(self):
+        for job in self.jobs.values():
+            missing = [d for d in job.deps if d not in self.jobs]
+            if missing:
+                raise ValueError(f"Job {job.id} depends on unknown jobs: {missing}")
+        # Kahn 拓扑排序检查环
+        indegree = {job_id: len(job.deps) for job_id, job in self.jobs.items()}
+        ready = [job_id for job_id, n in indegree.items() if n == 0]
+        dependents = self._dependents()
+        visited = 0
+        while ready:
+            job_id = ready.pop()
+            visited += 1
+            for child in dependents[job_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if visited != len(self.jobs):
+            raise ValueError("Job graph contains a cycle")
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        dependents = {job_id: [] for job_id in self.jobs}
+        for job in self.jobs.values():
+            for dep in job.deps:
+                dependents[dep].append(job.id)
+        return dependents
+
+    def run(self) -> Dict[str, JobResult]:
+        """运行全部任务，返回 {任务 id: JobResult}；依赖失败的任务标记为 skipped"""
+        self._check_graph()
+        dependents = self._dependents()
+        waiting = {job_id: set(job.deps) for job_id, job in self.jobs.items()}
+        results: Dict[str, JobResult] = {}
+        pools = {
+            provider: ThreadPoolExecutor(max_workers=self.limits.get(provider, DEFAULT_LIMIT),
+                                         thread_name_prefix=f"gen-{provider}")
+            for provider in {job.provider for job in self.jobs.values()}
+        }
+        running = {}
+
+        def finish(job_id, result):
+            results[job_id] = result
+            if self.on_complete:
+                self.on_complete(self.jobs[job_id], result)
+            for child in dependents[job_id]:
+                if child in results:
+                    continue
+                if not result.ok:
+                    finish(child, JobResult(child, "skipped", error=f"dependency {job_id} failed"))
+                    continue
+                waiting[child].discard(job_id)
+                if not waiting[child]:
+                    submit(child)
+
+        def submit(job_id):
+            job = self.jobs[job_id]
+            deps = {dep: results[dep].value for dep in job.deps}
+            running[pools[job.provider].submit(self._execute, job, deps)] = job_id
+
+        try:
+            for job_id, deps in waiting.items():
+                if not deps:
+                    submit(job_id)
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result())
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return results
+
+    # --- 单个任务 ---
+
+    def _cache_path(self, job: GenJob) -> Optional[str]:
+        if not self.cache_dir or job.params is None or not job.output:
+            return None
+        key = cache_key(job.provider, job.params)
+        return os.path.join(self.cache_dir, key[:2], key + os.path.splitext(job.output)[1])
+
+    def _execute(self, job: GenJob, deps: Dict[str, Any]) -> JobResult:
+        started = time.perf_counter()
+        cached = self._cache_path(job)
+        if cached and os.path.exists(cached) and os.path.getsize(cached):
+            _place(cached, job.output)
+            print(f"⏭️  [{job.provider}] 命中缓存: {job.id}")
+            return JobResult(job.id, "cached", job.output, elapsed=time.perf_counter() - started)
+
+        error = None
+        for attempt in range(1, job.retries + 2):
+            try:
+                value = _call(job.fn, job, deps)
+                if value is False:
+                    raise GenerationError(f"{job.provider} returned failure")
+                if job.output:
+                    if not os.path.exists(job.output):
+                        raise GenerationError(f"output not written: {job.output}")
+                    if value is None or value is True:
+                        value = job.output
+                    if cached:
+                        _place(job.output, cached)
+                print(f"✅ [{job.provider}] {job.id} ({time.perf_counter() - started:.1f}s)")
+                return JobResult(job.id, "done", value, attempts=attempt,
+                                 elapsed=time.perf_counter() - started)
+            except Exception as e:
+                error = e
+                if attempt <= job.retries:
+                    print(f"⚠️  [{job.provider}] {job.id} 第 {attempt} 次失败，重试: {e}")
+                    time.sleep(RETRY_DELAY * attempt)
+
+        print(f"❌ [{job.provider}] {job.id} 失败: {error}")
+        return JobResult(job.id, "failed", error=str(error), attempts=job.retries + 1,
+                         elapsed=time.perf_counter() - started)
@@ -1,14 +1,12 @@
 import asyncio
 from playwright.async_api import async_playwright
+from grok_pool import connect_browser
 import os
 
 async def grok_generate_video(image_path, prompt="Make this image move into a high quality cinematic video", video_id="01"):
     async with async_playwright() as p:
-        try:
-            browser = await p.chromium.connect_over_cdp("http://localhost:9222")
-            print("✅ 已成功连接到 Chrome 调试端口")
-        except Exception as e:
-            print(f"❌ 无法连接到 Chrome: {e}")
+        browser = await connect_browser(p)
+        if not browser:
             return
 
         context = browser.contexts[0]
@@ -1,18 +1,19 @@
 import asyncio
-from playwright.async_api import async_playwright
 import os
-import requests
+import sys
+from playwright.async_api import async_playwright
+from grok_pool import connect_browser
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers"))
+from download_manager import fetch_file
 
 async def grok_generate_images(prompt, output_dir="remotion-studio/public/assets/projects/demo/images/generated", aspect_ratio="16:9"):
     """
     使用 Grok Imagine 进行文生图自动化，支持比例选择
     """
     async with async_playwright() as p:
-        try:
-            browser = await p.chromium.connect_over_cdp("http://localhost:9222")
-            print("✅ 已成功连接到 Chrome 调试端口")
-        except Exception as e:
-            print(f"❌ 无法连接到 Chrome: {e}")
+        browser = await connect_browser(p)
+        if not browser:
             return
 
         context = browser.contexts[0]
@@ -129,11 +130,7 @@ async def grok_generate_images(prompt, output_dir="remotion-studio/public/assets
                         # 普通 URL
                         file_name = f"grok_gen_{int(time.time())}_{saved_count+1:02}.png"
                         save_path = os.path.join(output_dir, file_name)
-                        response = requests.get(src, stream=True, timeout=10)
-                        if response.status_code == 200:
-                            with open(save_path, 'wb') as f:
-                                for chunk in response.iter_content(chunk_size=8192):
-                                    f.write(chunk)
+                        if (await asyncio.to_thread(fetch_file, src, save_path)).ok:
                             print(f"✅ 图片 {saved_count+1} 已下载保存 (URL): {file_name}")
                             saved_count += 1
                 except Exception as e:
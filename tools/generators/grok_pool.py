@@ -0,0 +1,498 @@
+"""
+Grok Imagine 生成工作池 - 复用浏览器标签页并行生成
+
+原先每个脚本各自通过 CDP 连接 localhost:9222、占用 contexts[0].pages[0]、跳转页面，
+一次只处理一个提示词。这里统一为：
+
+- connect_browser(): 连接调试端口，没开时启动 Chrome 并轮询端口就绪 (不再固定 sleep 5 秒)
+- PagePool: 在已登录的浏览器上下文里预开 N 个标签页并保持在 Imagine 页面 (预热)，
+  取用前做健康检查，崩溃 / 被关闭 / 无响应的页面自动关闭并补一个新页面
+- GrokWorker: 提示词进入队列，N 个标签页并行生成，每完成一个就产出一个结果
+  (stream() 异步迭代)，下载由 Playwright 直接流式落盘
+- GrokFlow: Grok 页面的选择器和交互步骤集中在一处；本地桩页面
+  (grok_stub/imagine.html) 模拟同样的 上传/输入/提交/下载 流程，grok_pool_check.py
+  用它在无账号的环境下验证整个工作池
+
+用法:
+    results = asyncio.run(generate_batch([
+        GrokJob("A cat surfing a wave"),
+        GrokJob("Make this image move", mode="image", image_path="scene.png"),
+    ], parallel=3, output_dir="videos/"))
+"""
+import os
+import sys
+import time
+import asyncio
+import subprocess
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+from urllib.request import urlopen
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers"))
+from download_manager import fetch_file
+
+GROK_IMAGINE_URL = "https://grok.com/imagine"
+CDP_PORT = 9222
+CDP_URL = f"http://localhost:{CDP_PORT}"
+CHROME_STARTUP_TIMEOUT = 20.0
+DEFAULT_PARALLEL = 3
+MIN_VIDEO_BYTES = 100 * 1024  # 小于此大小的下载视为不完整，用直链重下
+
+
+@dataclass
+class GrokJob:
+    prompt: str
+    mode: str = "text"                  # text / image
+    image_path: Optional[str] = None
+    output_path: Optional[str] = None   # 默认 output_dir/grok_video_<时间戳>_<序号>.mp4
+    aspect_ratio: Optional[str] = None
+    upgrade_hd: bool = False
+
+
+@dataclass
+class GrokResult:
+    job: GrokJob
+    index: int
+    path: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None
+
+
+# --- 浏览器连接 ---
+
+def find_chrome() -> Optional[str]:
+    candidates = [
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+        os.path.expanduser("~") + r"\AppData\Local\Google\Chrome\Application\chrome.exe",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/usr/bin/google-chrome",
+        "/usr/bin/chromium",
+    ]
+    return next((path for path in candidates if os.path.exists(path)), None)
+
+
+def chrome_profile_dir() -> str:
+    """调试用 Chrome 配置目录：优先项目根目录的 chrome_debug_profile，兼容旧的 tools/chrome_debug_profile"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    workspace_root = os.path.dirname(os.path.dirname(script_dir))
+    user_data_dir = os.path.join(workspace_root, "chrome_debug_profile")
+    legacy_profile = os.path.join(os.path.dirname(script_dir), "chrome_debug_profile")
+    if not os.path.exists(user_data_dir) and os.path.exists(legacy_profile):
+        return legacy_profile
+    os.makedirs(user_data_dir, exist_ok=True)
+    return user_data_dir
+
+
+def _cdp_ready(cdp_url: str) -> bool:
+    try:
+        with urlopen(f"{cdp_url}/json/version", timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+async def connect_browser(p, cdp_url: str = CDP_URL, launch: bool = True):
+    """通过 CDP 连接已打开的 Chrome；未开启调试端口时启动 Chrome 并等待端口就绪
+
+    Returns:
+        playwright Browser，失败时返回 None
+    """
+    if not _cdp_ready(cdp_url) and launch:
+        chrome_exe = find_chrome()
+        if not chrome_exe:
+            print(f"❌ 未找到 Chrome，请手动启动 Chrome 并开启 --remote-debugging-port={CDP_PORT}", flush=True)
+            return None
+        user_data_dir = chrome_profile_dir()
+        print(f"🚀 正在启动 Chrome (Profile: {user_data_dir})", flush=True)
+        subprocess.Popen([chrome_exe, f"--remote-debugging-port={CDP_PORT}", f"--user-data-dir={user_data_dir}"])
+        deadline = time.monotonic() + CHROME_STARTUP_TIMEOUT
+        while not _cdp_ready(cdp_url) and time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+    try:
+        browser = await p.chromium.connect_over_cdp(cdp_url)
+        print("✅ 已连接到 Chrome 调试端口", flush=True)
+        return browser
+    except Exception as e:
+        print(f"❌ 无法连接到 Chrome: {e}", flush=True)
+        return None
+
+
+# --- 页面交互 ---
+
+class GrokFlow:
+    """Grok Imagine 页面的选择器与交互步骤"""
+
+    editor_selectors = [
+        'textarea[aria-label*="Grok"]',
+        'textarea[aria-label*="问题"]',
+        'textarea[aria-label*="想象"]',
+        'div.ProseMirror[contenteditable="true"]',
+        'textarea',
+        '[role="textbox"]',
+    ]
+    video_prompt_selector = 'textarea[aria-label="制作视频"], textarea[placeholder*="视频"]'
+    submit_selectors = ['button[aria-label="提交"]', 'button[type="submit"]', 'button:has(svg path[d*="M6 11"])']
+    model_trigger_selector = "#model-select-trigger"
+    video_menu_selector = 'div[role="menuitem"]:has-text("视频")'
+    regenerate_selector = 'button:has-text("重新生成")'
+    download_selector = 'button[aria-label="下载"]'
+    more_selector = 'button[aria-label="更多选项"], button:has(.lucide-ellipsis)'
+
+    def __init__(self, editor_timeout: float = 300, generation_timeout: float = 300, poll_interval: float = 2.0):
+        self.editor_timeout = editor_timeout          # 包含手动处理验证码的时间
+        self.generation_timeout = generation_timeout
+        self.poll_interval = poll_interval
+
+    async def find_editor(self, page):
+        deadline = time.monotonic() + self.editor_timeout
+        warned = False
+        while time.monotonic() < deadline:
+            for sel in self.editor_selectors:
+                try:
+                    loc = page.locator(sel).first
+                    if await loc.count() > 0 and await loc.is_visible():
+                        return loc
+                except Exception:
+                    continue
+            if not warned:
+                print("Waiting for editor... Please solve any CAPTCHA in Chrome window.", flush=True)
+                warned = True
+            await asyncio.sleep(self.poll_interval)
+        raise TimeoutError("Timeout waiting for editor")
+
+    async def _skip_ab_test(self, page):
+        try:
+            skip_btn = page.get_by_text("跳过")
+            if await skip_btn.count() > 0:
+                await skip_btn.first.click()
+                await asyncio.sleep(1)
+        except Exception:
+            pass
+
+    async def _switch_to_video(self, page, aspect_ratio):
+        model_trigger = page.locator(self.model_trigger_selector)
+        if await model_trigger.count() == 0:
+            return
+        await model_trigger.click()
+        video_menu_item = page.locator(self.video_menu_selector)
+        if await video_menu_item.count() > 0:
+            await video_menu_item.first.click()
+        if aspect_ratio:
+            if await model_trigger.get_attribute("data-state") == "closed":
+                await model_trigger.click()
+            ratio_btn = page.locator(f'button[aria-label="{aspect_ratio}"]')
+            if await ratio_btn.count() > 0:
+                await ratio_btn.click()
+        if await model_trigger.get_attribute("data-state") == "open":
+            await page.keyboard.press("Escape")
+
+    async def submit(self, page, job: GrokJob):
+        editor = await self.find_editor(page)
+        if job.mode == "image" and job.image_path:
+            file_input = await page.query_selector('input[type="file"]')
+            if not file_input:
+                raise RuntimeError("File input not found")
+            await file_input.set_input_files(os.path.abspath(job.image_path))
+            try:
+                textarea = await page.wait_for_selector(self.video_prompt_selector, timeout=10000)
+                if job.prompt:
+                    await textarea.fill(job.prompt)
+            except Exception:
+                # 兜底：直接在主编辑框输入
+                await editor.fill(job.prompt)
+        else:
+            await self._switch_to_video(page, job.aspect_ratio)
+            await editor.fill(job.prompt)
+
+        for sel in self.submit_selectors:
+            try:
+                btn = page.locator(sel).last
+                if await btn.count() > 0 and await btn.is_enabled():
+                    await btn.click()
+                    return
+            except Exception:
+                continue
+        await page.keyboard.press("Enter")
+
+    async def wait_result(self, page, baseline: int):
+        """等待新的"重新生成"按钮出现 (数量超过提交前的 baseline)"""
+        deadline = time.monotonic() + self.generation_timeout
+        while time.monotonic() < deadline:
+            await self._skip_ab_test(page)
+            if await page.locator(self.regenerate_selector).count() > baseline:
+                return
+            await asyncio.sleep(self.poll_interval)
+        raise TimeoutError("Generation timeout")
+
+    async def upgrade_hd(self, page):
+        try:
+            more_btn = page.locator(self.more_selector).last
+            if await more_btn.count() == 0:
+                return
+            await more_btn.click(timeout=5000, force=True)
+            upgrade_item = page.get_by_text("升级视频")
+            if await upgrade_item.count() == 0:
+                await page.keyboard.press("Escape")
+                return
+            await upgrade_item.first.click(timeout=5000, force=True)
+            print("✅ 已启动高清渲染，等待刷新...", flush=True)
+            await asyncio.sleep(15)
+            await page.wait_for_selector(self.download_selector, timeout=180000)
+        except Exception as e:
+            print(f"⚠️ HD 升级失败 (不影响基础视频): {e}", flush=True)
+
+    async def download(self, page, save_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+        async with page.expect_download(timeout=60000) as download_info:
+            dl_btn = page.locator(self.download_selector).last
+            try:
+                await dl_btn.click(timeout=5000)
+            except Exception:
+                await dl_btn.click(force=True, timeout=5000)
+        download = await download_info.value
+        part_path = save_path + ".part"
+        await download.save_as(part_path)
+
+        if os.path.getsize(part_path) < MIN_VIDEO_BYTES and download.url.startswith("http"):
+            # 浏览器下载偶尔只得到预览片段：带 Cookie 用直链重下
+            # 片段与完整文件内容不同，不能从它续传
+            os.remove(part_path)
+            cookies = {c["name"]: c["value"] for c in await page.context.cookies(download.url)}
+            result = await asyncio.to_thread(fetch_file, download.url, save_path, cookies)
+            if not result.ok:
+                raise RuntimeError(f"直链下载失败: {result.error}")
+            return save_path
+        os.replace(part_path, save_path)
+        return save_path
+
+    async def run(self, page, job: GrokJob, save_path: str) -> str:
+        baseline = await page.locator(self.regenerate_selector).count()
+        await self.submit(page, job)
+        await self.wait_result(page, baseline)
+        await self._skip_ab_test(page)
+        if job.upgrade_hd:
+            await self.upgrade_hd(page)
+        return await self.download(page, save_path)
+
+
+# --- 标签页池 ---
+
+class PagePool:
+    """预热的标签页池
+
+    Args:
+        context: 浏览器上下文 (CDP 连接时为 browser.contexts[0]，沿用登录状态)
+        size: 标签页数量
+        url: 预热时打开的页面
+    """
+
+    def __init__(self, context, size: int = DEFAULT_PARALLEL, url: str = GROK_IMAGINE_URL,
+                 health_timeout: float = 5.0):
+        self.context = context
+        self.size = size
+        self.url = url
+        self.health_timeout = health_timeout
+        self.recycled = 0
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._pages = set()
+        self._crashed = set()
+
+    async def start(self):
+        pages = await asyncio.gather(*(self._new_page() for _ in range(self.size)))
+        for page in pages:
+            self._idle.put_nowait(page)
+
+    async def _new_page(self):
+        page = await self.context.new_page()
+        page.on("crash", lambda crashed: self._crashed.add(crashed))
+        self._pages.add(page)
+        try:
+            await page.goto(self.url, timeout=60000)
+            await page.wait_for_load_state("domcontentloaded", timeout=60000)
+        except Exception as e:
+            print(f"⚠️ 页面加载可能有延迟，继续... {e}", flush=True)
+        return page
+
+    async def is_healthy(self, page) -> bool:
+        if page in self._crashed or page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(page.evaluate("1"), self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self):
+        page = await self._idle.get()
+        if not await self.is_healthy(page):
+            try:
+                page = await self._recycle(page)
+            except Exception:
+                # 新开页面失败 (浏览器已断开等)：保留这个槽位，下次 acquire 再尝试重建，避免其他任务永远等待
+                self._idle.put_nowait(page)
+                raise
+        return page
+
+    async def release(self, page, healthy: bool = True):
+        """归还标签页；healthy=False 时 (生成出错) 换一个新页面，避免残留状态影响下一个任务"""
+        if healthy and await self.is_healthy(page):
+            try:
+                # 回到初始页面，清掉上一个任务的上传/结果状态 (标签页和连接保持预热)
+                await page.goto(self.url, timeout=60000)
+            except Exception:
+                healthy = False
+        try:
+            if not healthy or not await self.is_healthy(page):
+                page = await self._recycle(page)
+        finally:
+            self._idle.put_nowait(page)
+
+    async def _recycle(self, page):
+        self.recycled += 1
+        self._pages.discard(page)
+        self._crashed.discard(page)
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+        print("♻️  标签页已失效，重新打开", flush=True)
+        return await self._new_page()
+
+    async def close(self):
+        for page in list(self._pages):
+            try:
+                if not page.is_closed():
+                    await page.close()
+            except Exception:
+                pass
+        self._pages.clear()
+
+
+# --- 工作池 ---
+
+class GrokWorker:
+    """提示词队列 + N 个标签页并行生成
+
+    Args:
+        pool: 已 start() 的 PagePool，并行度等于标签页数量
+        flow: 页面交互实现 (默认 Grok)
+        output_dir: 未指定 output_path 的任务保存到这里
+        retries: 单个任务失败后换新标签页重试的次数
+    """
+
+    def __init__(self, pool: PagePool, flow: Optional[GrokFlow] = None, output_dir: str = ".", retries: int = 1):
+        self.pool = pool
+        self.flow = flow or GrokFlow()
+        self.output_dir = output_dir
+        self.retries = retries
+        self._batch = int(time.time() * 1000)
+
+    def _save_path(self, job: GrokJob, index: int) -> str:
+        return job.output_path or os.path.join(self.output_dir, f"grok_video_{self._batch}_{index}.mp4")
+
+    async def _run_job(self, job: GrokJob, index: int) -> GrokResult:
+        started = time.monotonic()
+        result = GrokResult(job, index)
+        for attempt in range(1, self.retries + 2):
+            result.attempts = attempt
+            page = None
+            healthy = True
+            try:
+                page = await self.pool.acquire()
+                result.path = await self.flow.run(page, job, self._save_path(job, index))
+                result.error = None
+                break
+            except Exception as e:
+                healthy = False
+                result.error = str(e)
+                print(f"⚠️ 任务 {index} 第 {attempt} 次失败: {e}", flush=True)
+            finally:
+                if page is not None:
+                    try:
+                        await self.pool.release(page, healthy)
+                    except Exception as e:
+                        print(f"⚠️ 标签页重建失败: {e}", flush=True)
+        result.elapsed = time.monotonic() - started
+        return result
+
+    async def stream(self, jobs: List[GrokJob]) -> AsyncIterator[GrokResult]:
+        """按完成顺序产出结果"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, job in enumerate(jobs):
+            queue.put_nowait((index, job))
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    index, job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self._run_job(job, index))
+
+        tasks = [asyncio.create_task(worker()) for _ in range(min(self.pool.size, len(jobs)))]
+        try:
+            for _ in range(len(jobs)):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, jobs: List[GrokJob]) -> List[GrokResult]:
+        """运行全部任务，结果与输入顺序一致"""
+        ordered: List[Optional[GrokResult]] = [None] * len(jobs)
+        async for result in self.stream(jobs):
+            ordered[result.index] = result
+        return ordered
+
+
+async def generate_batch(jobs: List[GrokJob], parallel: int = DEFAULT_PARALLEL, output_dir: str = ".",
+                         cdp_url: str = CDP_URL, url: str = GROK_IMAGINE_URL,
+                         on_result=None) -> List[GrokResult]:
+    """连接浏览器、预热标签页并并行生成；on_result(result) 在每个任务完成时调用"""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await connect_browser(p, cdp_url)
+        if not browser:
+            return [GrokResult(job, i, error="browser unavailable") for i, job in enumerate(jobs)]
+        pool = PagePool(browser.contexts[0], size=min(parallel, max(1, len(jobs))), url=url)
+        await pool.start()
+        worker = GrokWorker(pool, output_dir=output_dir)
+        ordered: List[Optional[GrokResult]] = [None] * len(jobs)
+        try:
+            async for result in worker.stream(jobs):
+                ordered[result.index] = result
+                if on_result:
+                    on_result(result)
+        finally:
+            await pool.close()
+        return ordered
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Grok Imagine 批量并行生成")
+    parser.add_argument("prompts_file", help="每行一个提示词的文本文件")
+    parser.add_argument("--output_dir", required=True)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL)
+    parser.add_argument("--hd", action="store_true", help="生成后执行 HD 升级")
+    args = parser.parse_args()
+
+    with open(args.prompts_file, "r", encoding="utf-8") as f:
+        batch = [GrokJob(line.strip(), upgrade_hd=args.hd) for line in f if line.strip()]
+
+    def report(result):
+        print(f"OUTPUT_PATH:{result.path}" if result.ok else f"❌ [{result.index}] {result.error}", flush=True)
+
+    results = asyncio.run(generate_batch(batch, args.parallel, args.output_dir, on_result=report))
+    sys.exit(0 if all(r.ok for r in results) else 1)
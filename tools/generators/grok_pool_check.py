@@ -0,0 +1,102 @@
+"""
+Grok 工作池自检 (不需要 Grok 账号)
+
+用本地 HTTP 服务提供 grok_stub/imagine.html，启动无头 Chromium，
+以 --parallel 个标签页运行一批文生视频 / 图生视频任务，检查：
+
+- 每个结果文件的内容与对应任务的提示词 (及上传文件名) 一致 (标签页之间没有串结果)
+- 运行中途被关闭的标签页会被健康检查替换，任务仍然完成
+- 总耗时接近 任务数 / 并行数 × 单次生成耗时
+
+用法:
+    python tools/generators/grok_pool_check.py [--jobs 6] [--parallel 3] [--delay 800]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.async_api import async_playwright
+
+from grok_pool import GrokFlow, GrokJob, GrokWorker, PagePool
+
+STUB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grok_stub")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=STUB_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def check(jobs_count=6, parallel=3, delay_ms=800, chrome=None):
+    server = serve_stub()
+    url = f"http://127.0.0.1:{server.server_port}/imagine.html?delay={delay_ms}"
+    work_dir = tempfile.mkdtemp(prefix="aicut_grok_pool_")
+    image_path = os.path.join(work_dir, "ref.png")
+    with open(image_path, "wb") as f:
+        f.write(b"\x89PNG stub")
+
+    jobs = [
+        GrokJob(f"prompt {i}", mode="image", image_path=image_path) if i % 3 == 2 else GrokJob(f"prompt {i}")
+        for i in range(jobs_count)
+    ]
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, executable_path=chrome)
+        context = await browser.new_context(accept_downloads=True)
+        pool = PagePool(context, size=parallel, url=url)
+        await pool.start()
+        worker = GrokWorker(pool, flow=GrokFlow(editor_timeout=10, generation_timeout=10, poll_interval=0.1),
+                            output_dir=work_dir)
+
+        # 模拟标签页崩溃：关掉一个空闲页面，acquire 时应被替换
+        victim = pool._idle._queue[0]
+        await victim.close()
+
+        started = time.monotonic()
+        results = []
+        async for result in worker.stream(jobs):
+            print(f"{'✅' if result.ok else '❌'} 任务 {result.index} ({result.elapsed:.2f}s) -> {result.path or result.error}")
+            results.append(result)
+        elapsed = time.monotonic() - started
+        await pool.close()
+        await browser.close()
+    server.shutdown()
+
+    ok = len(results) == jobs_count and all(r.ok for r in results)
+    for r in results:
+        if not r.ok:
+            continue
+        with open(r.path, "r", encoding="utf-8") as f:
+            content = f.read()
+        expected = f"{r.job.prompt}|{os.path.basename(r.job.image_path) if r.job.image_path else ''}"
+        if content != expected:
+            ok = False
+            print(f"❌ 任务 {r.index} 内容不符: {content!r} != {expected!r}")
+
+    serial = jobs_count * delay_ms / 1000
+    print(f"总耗时 {elapsed:.2f}s (串行约 {serial:.1f}s)，回收标签页 {pool.recycled} 个")
+    ok = ok and pool.recycled >= 1
+    print("✅ 工作池正常" if ok else f"❌ 工作池异常 (产物保留在 {work_dir})")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用本地桩页面验证 Grok 标签页工作池")
+    parser.add_argument("--jobs", type=int, default=6)
+    parser.add_argument("--parallel", type=int, default=3)
+    parser.add_argument("--delay", type=int, default=800, help="桩页面单次生成耗时 (毫秒)")
+    parser.add_argument("--chrome", help="Chromium 可执行文件 (默认使用 Playwright 自带的浏览器)")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(check(args.jobs, args.parallel, args.delay, args.chrome)) else 1)
@@ -0,0 +1,207 @@
+"""
+LLM 调用缓存层 - 按请求内容记忆结果 + 限流并发批量调用
+
+同一个 (后端, 模型, 消息列表 (含 system prompt), 生成参数) 的结果保存在
+ai_workspace/cache/llm.db，TTL 内重复调用直接返回，脚本重跑时不再重复请求。
+后端是普通函数 backend(model, messages, **params) -> str，出错时抛异常 (错误结果不缓存)；
+StubBackend 为离线测试用的本地后端。
+
+用法:
+    llm = MemoLLM(dashscope_backend, model="qwen-max")
+    text = llm.chat([{"role": "user", "content": "你好"}])
+    texts = asyncio.run(llm.chat_many([messages1, messages2], concurrency=4, rate=5))
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Union
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LLM_CACHE_PATH = os.path.join(PROJECT_ROOT, "ai_workspace", "cache", "llm.db")
+
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 5.0  # 每秒最多发起的请求数
+
+Messages = List[Dict[str, str]]
+
+
+class LLMError(Exception):
+    pass
+
+
+def backend_id(backend: Callable[..., str]) -> str:
+    """后端标识 (参与缓存键)：优先用 backend.cache_id，否则用函数/类的完整名称"""
+    explicit = getattr(backend, "cache_id", None)
+    if explicit:
+        return explicit
+    target = backend if hasattr(backend, "__qualname__") else type(backend)
+    return f"{target.__module__}.{target.__qualname__}"
+
+
+def request_key(model: str, messages: Messages, params: Optional[Dict] = None, backend: str = "") -> str:
+    """缓存键；不同后端 (例如离线的 StubBackend 与真实接口) 的结果互不可见"""
+    payload = json.dumps({"backend": backend, "model": model, "messages": messages, "params": params or {}},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite 结果缓存 (每个线程一个连接，WAL 模式允许多进程同时读写)"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT response, created_at FROM responses WHERE key=?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, model, response, time.time()))
+
+    def purge_expired(self) -> int:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+
+
+class RateLimiter:
+    """限制请求发起速率：相邻两次 acquire 至少间隔 1/rate 秒"""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class StubBackend:
+    """离线后端：按规则返回固定文本，并记录调用次数
+
+    Args:
+        responses: {用户消息: 回复}，未命中时回显 "[stub:<model>] <最后一条用户消息>"
+        latency: 模拟的单次调用耗时 (秒)
+        fail: 用户消息包含其中任一字符串时抛出 LLMError
+    """
+
+    def __init__(self, responses: Optional[Dict[str, str]] = None, latency: float = 0.0, fail=()):
+        self.responses = responses or {}
+        self.latency = latency
+        self.fail = tuple(fail)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model: str, messages: Messages, **params) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        if any(marker in prompt for marker in self.fail):
+            raise LLMError(f"stub failure for: {prompt[:30]}")
+        return self.responses.get(prompt, f"[stub:{model}] {prompt}")
+
+
+class MemoLLM:
+    """带缓存的 LLM 调用
+
+    Args:
+        backend: backend(model, messages, **params) -> str (其标识参与缓存键，见 backend_id)
+        model: 模型名 (参与缓存键)
+        cache: LLMCache 实例；None 表示不缓存
+    """
+
+    def __init__(self, backend: Callable[..., str], model: str, cache: Optional[LLMCache] = None):
+        self.backend = backend
+        self.model = model
+        self.cache = cache
+        self.backend_id = backend_id(backend)
+
+    def chat(self, messages: Messages, params: Optional[Dict] = None, force: bool = False) -> str:
+        """同步调用；force=True 时忽略缓存重新生成 (并覆盖缓存)"""
+        key = request_key(self.model, messages, params, self.backend_id)
+        if self.cache and not force:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        response = self.backend(self.model, messages, **(params or {}))
+        if self.cache:
+            self.cache.put(key, self.model, response)
+        return response
+
+    async def chat_many(
+        self,
+        batch: List[Messages],
+        params: Optional[Dict] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate: Optional[float] = DEFAULT_RATE,
+        force: bool = False,
+    ) -> List[Union[str, Exception]]:
+        """并发调用多组消息，结果与输入顺序一致；单项失败时该位置为异常对象
+
+        批内相同的请求只调用一次，命中缓存的请求不占用并发和限流名额。
+        """
+        keys = [request_key(self.model, messages, params, self.backend_id) for messages in batch]
+        results: Dict[str, Union[str, Exception]] = {}
+        pending: Dict[str, Messages] = {}
+        for key, messages in zip(keys, batch):
+            if key in results or key in pending:
+                continue
+            cached = self.cache.get(key) if self.cache and not force else None
+            if cached is not None:
+                results[key] = cached
+            else:
+                pending[key] = messages
+
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = RateLimiter(rate)
+
+        async def run(key, messages):
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    response = await asyncio.to_thread(self.backend, self.model, messages, **(params or {}))
+                except Exception as e:
+                    results[key] = e
+                    return
+            if self.cache:
+                self.cache.put(key, self.model, response)
+            results[key] = response
+
+        await asyncio.gather(*(run(key, messages) for key, messages in pending.items()))
+        return [results[key] for key in keys]
@@ -8,6 +8,11 @@ from dashscope.audio.asr import Transcription
 from http import HTTPStatus
 from dotenv import load_dotenv
 
+from llm_cache import LLMCache, LLMError, MemoLLM
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers"))
+from download_manager import fetch_file
+
 # 加载环境变量
 load_dotenv()
 
@@ -15,39 +20,69 @@ def get_dashscope_api_key():
     """从环境变量获取 API Key"""
     return os.getenv("DASHSCOPE_API_KEY")
 
+DEFAULT_SYSTEM_PROMPT = "你是一个专业的视频剪辑助手，擅长编写剪辑脚本和生成时间轴逻辑。"
+
+
+def dashscope_backend(model, messages, **params):
+    """DashScope Generation 调用 (MemoLLM 后端)"""
+    response = Generation.call(model=model, messages=messages, result_format='message', **params)
+    if response.status_code == HTTPStatus.OK:
+        return response.output.choices[0].message.content
+    raise LLMError(f"{response.code} - {response.message}")
+
+
 class QwenClient:
-    """阿里云百炼 (Qwen) 大模型适配器"""
+    """阿里云百炼 (Qwen) 大模型适配器
     
-    def __init__(self, api_key=None, model='qwen-max'):
+    文本生成结果按 (后端, 模型, 消息, 参数) 缓存在 ai_workspace/cache/llm.db；
+    传入 backend=StubBackend() 可在无 API Key / 离线时测试 (自定义后端默认不缓存，
+    需要时显式传入 cache=LLMCache(其他路径))。
+    """
+    
+    def __init__(self, api_key=None, model='qwen-max', backend=None, cache=True, cache_ttl=None):
         self.api_key = api_key or get_dashscope_api_key()
         self.model = model
         if self.api_key:
             dashscope.api_key = self.api_key
+        self.backend = backend
+        if cache is True:
+            # 自定义 (离线) 后端默认不缓存，避免把测试结果写进真实调用共用的 llm.db
+            cache = None if backend is not None else LLMCache(ttl=cache_ttl) if cache_ttl else LLMCache()
+        self.llm = MemoLLM(backend or dashscope_backend, model, cache or None)
 
-    def chat(self, prompt, system_prompt="你是一个专业的视频剪辑助手，擅长编写剪辑脚本和生成时间轴逻辑。"):
-        """调用 Qwen 进行文本生成"""
-        if not self.api_key:
+    def _messages(self, prompt, system_prompt):
+        return [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': prompt}
+        ]
+
+    def chat(self, prompt, system_prompt=DEFAULT_SYSTEM_PROMPT, force=False, **params):
+        """调用 Qwen 进行文本生成 (相同请求直接返回缓存结果，force=True 强制重新生成)"""
+        if not self.api_key and not self.backend:
             return "错误: 未设置 DASHSCOPE_API_KEY"
 
         try:
-            messages = [
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': prompt}
-            ]
-            
-            response = Generation.call(
-                model=self.model,
-                messages=messages,
-                result_format='message'
-            )
-
-            if response.status_code == HTTPStatus.OK:
-                return response.output.choices[0].message.content
-            else:
-                return f"错误: {response.code} - {response.message}"
+            return self.llm.chat(self._messages(prompt, system_prompt), params or None, force=force)
+        except LLMError as e:
+            return f"错误: {e}"
         except Exception as e:
             return f"异常: {str(e)}"
 
+    async def chat_many(self, prompts, system_prompt=DEFAULT_SYSTEM_PROMPT, concurrency=4, rate=5.0,
+                        force=False, **params):
+        """并发生成多个提示词 (受 concurrency 和每秒 rate 次限制)，返回与 prompts 对应的文本列表"""
+        if not self.api_key and not self.backend:
+            return ["错误: 未设置 DASHSCOPE_API_KEY"] * len(prompts)
+
+        results = await self.llm.chat_many(
+            [self._messages(prompt, system_prompt) for prompt in prompts],
+            params or None, concurrency=concurrency, rate=rate, force=force,
+        )
+        return [
+            r if isinstance(r, str) else (f"错误: {r}" if isinstance(r, LLMError) else f"异常: {str(r)}")
+            for r in results
+        ]
+
     def transcribe(self, file_path):
         """使用 DashScope SenseVoice 进行语音识别 (ASR)"""
         if not self.api_key:
@@ -85,10 +120,9 @@ class QwenClient:
             if rsp.status_code == HTTPStatus.OK:
                 # 下载图片
                 image_url = rsp.output.results[0].url
-                import requests
-                img_data = requests.get(image_url).content
-                with open(output_path, 'wb') as f:
-                    f.write(img_data)
+                download = fetch_file(image_url, output_path)
+                if not download.ok:
+                    return False, f"图片下载失败: {download.error}"
                 return True, output_path
             else:
                 return False, f"图片生成错误: {rsp.message}"
@@ -1,6 +1,7 @@
 import os
 import json
 from flux_api import generate_image_flux
+from gen_orchestrator import Orchestrator
 
 def upgrade_demo_with_flux():
     project_path = "remotion-studio/src/projects/demo.json"
@@ -33,11 +34,20 @@ def upgrade_demo_with_flux():
 
     print("🚀 开始使用 Flux 生成高清分镜素材...")
     
+    # 各分镜互不依赖，并行生成 (并发数受 flux 提供方上限约束)
+    orch = Orchestrator()
+    for scene in scenes:
+        orch.add(
+            scene["id"], "flux",
+            lambda job, deps: generate_image_flux(job.params["prompt"], job.output),
+            output=os.path.join(assets_dir, scene["filename"]),
+            params={"model": "Kwai-Kolors/Kolors", "prompt": scene["prompt"], "size": "1024x576"},
+        )
+    results = orch.run()
+
     generated_images = []
     for scene in scenes:
-        output_path = os.path.join(assets_dir, scene["filename"])
-        success = generate_image_flux(scene["prompt"], output_path)
-        if success:
+        if results[scene["id"]].ok:
             generated_images.append({
                 "path": f"/assets/projects/demo/images/{scene['filename']}",
                 "duration": 0 # 后面动态分配
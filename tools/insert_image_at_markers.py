@@ -1,7 +1,10 @@
 
-import json
 import os
 import time
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
+from snapshot_store import read_snapshot, write_snapshot, get_revision
 
 SNAPSHOT_PATH = os.path.join(os.getcwd(), "ai_workspace", "project-snapshot.json")
 
@@ -21,8 +24,8 @@ def insert_image_at_markers():
         return
 
     try:
-        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-            snapshot = json.load(f)
+        snapshot = read_snapshot(SNAPSHOT_PATH)
+        base_revision = get_revision(snapshot)
     except Exception as e:
         print(f"Error reading snapshot: {e}")
         return
@@ -74,8 +77,7 @@ def insert_image_at_markers():
 
     # Save back
     try:
-        with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
-            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        write_snapshot(snapshot, SNAPSHOT_PATH, expected_revision=base_revision)
         print("Snapshot updated successfully.")
     except Exception as e:
         print(f"Error saving snapshot: {e}")
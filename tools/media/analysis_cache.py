@@ -0,0 +1,99 @@
+"""
+Per-asset analysis cache.
+
+Analysis results (scene cuts, silences, loudness, ASR words, ...) are stored
+in one JSON file per media file, keyed by the content hash so they survive
+renames and project moves:
+
+    ai_workspace/cache/analysis/<content hash>.json
+    {"source": "...", "scene_cuts": {"<params hash>": {"params": {...}, "value": [...]}}, ...}
+
+A cached entry is only returned when it was computed with the same params.
+Each key keeps the MAX_VARIANTS most recently stored params sets, so callers
+analysing the same file with different settings do not evict each other.
+"""
+import os
+import sys
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from media_io import CACHE_DIR, content_hash
+
+ANALYSIS_DIR = os.path.join(CACHE_DIR, "analysis")
+MAX_VARIANTS = 4
+
+_lock = threading.Lock()
+
+
+def _cache_path(file_path: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{content_hash(file_path)}.json")
+
+
+def _load(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _params_id(params: Optional[Dict]) -> str:
+    payload = json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _variants(entry: Any) -> Dict:
+    """params hash -> {"params", "value"}; older cache files hold a single entry per key."""
+    if not isinstance(entry, dict):
+        return {}
+    if "params" in entry and "value" in entry:
+        return {_params_id(entry["params"]): entry}
+    return entry
+
+
+def get(file_path: str, key: str, params: Optional[Dict] = None, cache_dir: str = ANALYSIS_DIR) -> Optional[Any]:
+    """Returns the cached value for `key`, or None if missing or computed with other params."""
+    entry = _variants(_load(_cache_path(file_path, cache_dir)).get(key)).get(_params_id(params))
+    if entry and entry.get("params") == (params or {}):
+        return entry.get("value")
+    return None
+
+
+def put(file_path: str, key: str, value: Any, params: Optional[Dict] = None, cache_dir: str = ANALYSIS_DIR):
+    """Stores `value` under `key` and params (atomic rewrite of the asset's cache file)."""
+    path = _cache_path(file_path, cache_dir)
+    with _lock:
+        data = _load(path)
+        data["source"] = os.path.abspath(file_path)
+        variants = _variants(data.get(key))
+        params_id = _params_id(params)
+        variants.pop(params_id, None)
+        variants[params_id] = {"params": params or {}, "value": value}
+        # dicts keep insertion order: the oldest params sets go first
+        data[key] = dict(list(variants.items())[-MAX_VARIANTS:])
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def get_or_compute(
+    file_path: str,
+    key: str,
+    compute: Callable[[], Any],
+    params: Optional[Dict] = None,
+    force: bool = False,
+    cache_dir: str = ANALYSIS_DIR,
+) -> Any:
+    """Cached lookup; runs `compute()` and stores its result on a miss."""
+    if not force:
+        value = get(file_path, key, params, cache_dir)
+        if value is not None:
+            return value
+    value = compute()
+    put(file_path, key, value, params, cache_dir)
+    return value
@@ -0,0 +1,180 @@
+"""
+Fast single-frame extraction.
+
+Every request is one short ffmpeg run that seeks through the container
+index instead of decoding from the start:
+
+- t >= 0: input seeking (`-ss` before `-i`) jumps to the keyframe at or
+  before t and decodes forward only to t, which is frame-accurate.
+- t < 0: `-sseof` seeks relative to the end; the last frame is the final
+  frame decoded from the last second of the file (keyframe-aware, so at most
+  one GOP is decoded).
+
+Batches of (file, timestamp) requests run in parallel. Frames come back as
+RGB NumPy arrays (H, W, 3) or are written straight to image files.
+
+Usage:
+    python tools/media/frames.py clip.mp4 --at last --out last.png
+    python tools/media/frames.py a.mp4 b.mp4 --at -0.5 --out-dir frames/
+"""
+import os
+import re
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+LAST = "last"
+LAST_FRAME_WINDOW = 1.0  # seconds decoded before EOF when looking for the last frame
+
+Timestamp = Union[float, str]
+
+_OUTPUT_SIZE_RE = re.compile(r"Video: rawvideo\b.*?, (\d+)x(\d+)")
+
+
+def _seek_args(timestamp: Timestamp) -> List[str]:
+    if timestamp == LAST:
+        return ["-sseof", f"-{LAST_FRAME_WINDOW}"]
+    timestamp = float(timestamp)
+    if timestamp < 0:
+        return ["-sseof", str(timestamp)]
+    return ["-ss", str(timestamp)] if timestamp > 0 else []
+
+
+def _decode_raw(video_path: str, seek: List[str], keep_last: bool) -> Optional[np.ndarray]:
+    cmd = ["ffmpeg", "-hide_banner", "-nostdin", "-nostats", *seek, "-i", video_path, "-an", "-vsync", "0"]
+    if not keep_last:
+        cmd += ["-frames:v", "1"]
+    cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr: List[bytes] = []
+    header = threading.Event()
+
+    def drain_stderr():
+        for line in proc.stderr:
+            stderr.append(line)
+            if not header.is_set() and _output_size(stderr):
+                header.set()
+        header.set()
+
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+    # ffmpeg logs the output stream before writing the first frame
+    header.wait()
+    # Output size comes from ffmpeg itself, so autorotated streams need no probing
+    size = _output_size(stderr)
+    frame = None
+    if size:
+        width, height = size
+        frame_size = width * height * 3
+        # Read one frame at a time and keep only the latest, so a full decode stays at one frame of memory
+        while True:
+            chunk = proc.stdout.read(frame_size)
+            if len(chunk) < frame_size:
+                break
+            frame = chunk
+    else:
+        proc.kill()
+    proc.stdout.close()
+    proc.wait()
+    reader.join()
+    if proc.returncode != 0 or frame is None:
+        return None
+    return np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+
+
+def _output_size(stderr: List[bytes]) -> Optional[Tuple[int, int]]:
+    text = b"".join(stderr).decode("utf-8", errors="replace")
+    if "Output #0" not in text:
+        return None
+    size = _OUTPUT_SIZE_RE.search(text.split("Output #0", 1)[1])
+    return (int(size.group(1)), int(size.group(2))) if size else None
+
+
+def _decode_to_file(video_path: str, seek: List[str], keep_last: bool, output_path: str) -> Optional[str]:
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # -update 1 keeps overwriting one image, leaving the final decoded frame
+    select = ["-update", "1"] if keep_last else ["-frames:v", "1"]
+    cmd = ["ffmpeg", "-v", "error", "-nostdin", "-y", *seek, "-i", video_path,
+           "-an", "-vsync", "0", *select, "-q:v", "2", output_path]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0 or not os.path.exists(output_path) or not os.path.getsize(output_path):
+        return None
+    return output_path
+
+
+def extract_frame(video_path: str, timestamp: Timestamp = LAST, output_path: Optional[str] = None):
+    """Extracts one frame.
+
+    Args:
+        timestamp: seconds from the start, negative seconds from the end, or LAST
+        output_path: write the frame to this image file (format from the extension)
+
+    Returns:
+        The output path, or an RGB (H, W, 3) uint8 array when no output_path is given.
+
+    Raises:
+        RuntimeError: if no frame could be decoded at that position
+    """
+    def decode(seek, keep_last):
+        if output_path:
+            return _decode_to_file(video_path, seek, keep_last, output_path)
+        return _decode_raw(video_path, seek, keep_last)
+
+    keep_last = timestamp == LAST
+    result = decode(_seek_args(timestamp), keep_last)
+    if result is None and keep_last:
+        # -sseof needs a known duration; streams without one fall back to a full decode
+        result = decode([], True)
+    if result is None:
+        raise RuntimeError(f"No frame decoded from {video_path} at {timestamp}")
+    return result
+
+
+def extract_frames(
+    requests: Sequence[Tuple[str, Timestamp]],
+    output_paths: Optional[Sequence[Optional[str]]] = None,
+    workers: int = 4,
+) -> List:
+    """Runs many (video_path, timestamp) requests in parallel.
+
+    Returns one result per request, in order: a path / array as in
+    extract_frame(), or the exception raised for that request.
+    """
+    outputs = list(output_paths) if output_paths is not None else [None] * len(requests)
+
+    def run(job):
+        (video_path, timestamp), output_path = job
+        try:
+            return extract_frame(video_path, timestamp, output_path)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, zip(requests, outputs)))
+
+
+def _parse_timestamp(value: str) -> Timestamp:
+    return LAST if value == LAST else float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract frames with keyframe-aware seeking")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--at", default=LAST, help="seconds, negative seconds from the end, or 'last'")
+    parser.add_argument("--out", help="output image (single file only)")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    timestamp = _parse_timestamp(args.at)
+    outputs = [
+        args.out if args.out and len(args.files) == 1
+        else os.path.join(args.out_dir, f"{os.path.splitext(os.path.basename(f))[0]}_{args.at}.png")
+        for f in args.files
+    ]
+    for path, result in zip(args.files, extract_frames([(f, timestamp) for f in args.files], outputs, args.workers)):
+        print(f"❌ {path}: {result}" if isinstance(result, Exception) else f"✅ {path} -> {result}")
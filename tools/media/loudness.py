@@ -0,0 +1,121 @@
+"""
+EBU R128 loudness analysis.
+
+Runs ffmpeg's ebur128 filter (K-weighted gating, 4x oversampled true peak)
+in a single streaming pass and parses its per-100 ms log as it arrives, so
+long files never touch the disk or Python memory as PCM. Results are cached
+per asset in the analysis cache:
+
+    {"integrated": -16.2,      # LUFS
+     "lra": 5.1,               # LU
+     "truePeak": -1.4,         # dBTP
+     "step": 0.1,              # seconds between short-term values
+     "shortTerm": [...]}       # 3 s window LUFS, one value per step
+
+Usage:
+    python tools/media/loudness.py voice.wav bgm.mp3
+"""
+import os
+import re
+import sys
+import math
+import argparse
+import subprocess
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import analysis_cache
+
+ANALYSIS_KEY = "loudness"
+STEP = 0.1  # ebur128 logs every 100 ms
+
+# Delivery targets for web/social video
+TARGET_LUFS = -16.0
+TRUE_PEAK_CEILING = -1.0  # dBTP
+MAX_VOLUME = 1.0          # element volume is 0-1 in the player, so normalisation only attenuates
+
+_FRAME_RE = re.compile(r"\bt:\s*([\d.]+).*?\bS:\s*(-?[\d.]+|-?inf|nan)")
+_INTEGRATED_RE = re.compile(r"^\s+I:\s+(-?[\d.]+|-?inf) LUFS")
+_LRA_RE = re.compile(r"^\s+LRA:\s+([\d.]+) LU")
+_PEAK_RE = re.compile(r"^\s+Peak:\s+(-?[\d.]+|-?inf) dBFS")
+
+
+def _to_float(value: str) -> Optional[float]:
+    number = float(value)
+    return number if math.isfinite(number) else None
+
+
+def measure_loudness(file_path: str) -> Dict:
+    """Streams the file through ebur128 and returns the loudness summary (uncached)."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-nostdin", "-v", "verbose",
+        "-i", file_path, "-vn", "-af", "ebur128=peak=true:framelog=verbose",
+        "-f", "null", "-",
+    ]
+    result = {"integrated": None, "lra": None, "truePeak": None, "step": STEP, "shortTerm": []}
+    section = None
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    try:
+        for line in proc.stderr:
+            frame = _FRAME_RE.search(line)
+            if frame and "Parsed_ebur128" in line:
+                short_term = _to_float(frame.group(2))
+                result["shortTerm"].append(round(short_term, 1) if short_term is not None else None)
+                continue
+            # Summary block: "Integrated loudness:", "Loudness range:", "True peak:" sections
+            if line.strip().endswith(":"):
+                section = line.strip()
+            match = _INTEGRATED_RE.match(line)
+            if match and section == "Integrated loudness:":
+                result["integrated"] = _to_float(match.group(1))
+            match = _LRA_RE.match(line)
+            if match:
+                result["lra"] = float(match.group(1))
+            match = _PEAK_RE.match(line)
+            if match and section == "True peak:":
+                result["truePeak"] = _to_float(match.group(1))
+    finally:
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg ebur128 failed for {file_path} (exit {returncode})")
+    return result
+
+
+def analyze_loudness(file_path: str, force: bool = False) -> Dict:
+    """Cached loudness summary for a media file (see module docstring for keys)."""
+    return analysis_cache.get_or_compute(file_path, ANALYSIS_KEY, lambda: measure_loudness(file_path), force=force)
+
+
+def db_to_gain(db: float) -> float:
+    return 10.0 ** (db / 20.0)
+
+
+def normalized_volume(
+    loudness: Dict,
+    target_lufs: float = TARGET_LUFS,
+    ceiling: float = TRUE_PEAK_CEILING,
+    max_volume: float = MAX_VOLUME,
+) -> float:
+    """Element volume that brings a clip to `target_lufs` without its true peak exceeding `ceiling`."""
+    integrated = loudness.get("integrated")
+    if integrated is None:
+        return max_volume
+    gain_db = target_lufs - integrated
+    if loudness.get("truePeak") is not None:
+        gain_db = min(gain_db, ceiling - loudness["truePeak"])
+    return round(min(max_volume, db_to_gain(gain_db)), 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EBU R128 loudness analysis")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    for path in args.files:
+        info = analyze_loudness(path, force=args.force)
+        print(
+            f"{path}: I={info['integrated']} LUFS  LRA={info['lra']} LU  TP={info['truePeak']} dBTP"
+            f"  -> volume {normalized_volume(info)}"
+        )
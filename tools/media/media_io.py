@@ -0,0 +1,181 @@
+"""
+Media I/O helpers shared by the tools/media modules.
+
+Everything here talks to ffmpeg/ffprobe through pipes so that callers can
+process a file in one streaming decode pass instead of seeking around with
+cv2 or loading whole files into memory.
+"""
+import os
+import json
+import hashlib
+import subprocess
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MATERIALS_DIR = os.path.join(PROJECT_ROOT, "AIcut-Studio", "apps", "web", "public", "materials")
+THUMBNAILS_DIR = os.path.join(MATERIALS_DIR, "_thumbnails")
+# Derived data that is not served from public/ (proxies, analysis results)
+CACHE_DIR = os.path.join(PROJECT_ROOT, "ai_workspace", "cache")
+
+
+def content_hash(file_path: str) -> str:
+    """Stable fingerprint of a media file: size + first 1 MB + last 1 KB.
+
+    Same sampling scheme as reconcile_with_thumbnails.calculate_file_hash, so
+    cache keys survive renames and moves but change when the content does.
+    """
+    size = os.path.getsize(file_path)
+    hasher = hashlib.sha256()
+    hasher.update(str(size).encode())
+    with open(file_path, "rb") as f:
+        hasher.update(f.read(1024 * 1024))
+        if size > 1024 * 1024:
+            f.seek(-1024, 2)
+            hasher.update(f.read())
+    return "h_" + hasher.hexdigest()[:12]
+
+
+def probe(file_path: str) -> Dict:
+    """Returns basic stream info via ffprobe.
+
+    Keys: duration, width, height, fps, video_codec, has_video, has_audio, sample_rate, channels.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", file_path,
+    ]
+    output = subprocess.check_output(cmd)
+    data = json.loads(output.decode("utf-8", errors="replace"))
+
+    info = {
+        "duration": float(data.get("format", {}).get("duration") or 0.0),
+        "width": 0, "height": 0, "fps": 0.0, "video_codec": None,
+        "has_video": False, "has_audio": False,
+        "sample_rate": 0, "channels": 0,
+    }
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video" and not info["has_video"]:
+            # Cover art in audio files shows up as a one-frame video stream
+            if stream.get("disposition", {}).get("attached_pic"):
+                continue
+            info["has_video"] = True
+            info["width"] = int(stream.get("width") or 0)
+            info["height"] = int(stream.get("height") or 0)
+            info["video_codec"] = stream.get("codec_name")
+            num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+            if float(den or 1):
+                info["fps"] = float(num) / float(den or 1)
+        elif stream.get("codec_type") == "audio" and not info["has_audio"]:
+            info["has_audio"] = True
+            info["sample_rate"] = int(stream.get("sample_rate") or 0)
+            info["channels"] = int(stream.get("channels") or 0)
+    return info
+
+
+def _read_exact(stream, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = stream.read(size - len(buf))
+        if not chunk:
+            break
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def iter_video_frames(
+    file_path: str,
+    width: int,
+    height: int,
+    filters: Optional[str] = None,
+    gray: bool = False,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> Iterator[np.ndarray]:
+    """Decodes a video once and yields frames scaled to width x height.
+
+    Args:
+        filters: extra filtergraph applied before scaling (e.g. "fps=2" or a select expression)
+        gray: yield single-channel luma frames (H, W) instead of RGB (H, W, 3)
+        start, duration: optional input range in seconds
+    """
+    pix_fmt = "gray" if gray else "rgb24"
+    channels = 1 if gray else 3
+    vf = f"scale={width}:{height}"
+    if filters:
+        vf = f"{filters},{vf}"
+
+    cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration:
+        cmd += ["-t", str(duration)]
+    # -vsync 0: pass filtered frames through as-is instead of duplicating to a constant rate
+    cmd += ["-i", file_path, "-an", "-vf", vf, "-vsync", "0", "-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"]
+
+    frame_size = width * height * channels
+    shape = (height, width) if gray else (height, width, 3)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame_size * 4)
+    try:
+        while True:
+            raw = _read_exact(proc.stdout, frame_size)
+            if len(raw) < frame_size:
+                break
+            yield np.frombuffer(raw, dtype=np.uint8).reshape(shape)
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+def iter_audio_blocks(
+    file_path: str,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    block_size: int = 65536,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> Iterator[np.ndarray]:
+    """Streams decoded audio as float32 blocks in [-1, 1].
+
+    Each block has shape (samples,) for mono or (samples, channels) otherwise;
+    the last block may be shorter than block_size.
+    """
+    cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration:
+        cmd += ["-t", str(duration)]
+    cmd += [
+        "-i", file_path, "-vn", "-ac", str(channels), "-ar", str(sample_rate),
+        "-f", "f32le", "pipe:1",
+    ]
+
+    bytes_per_block = block_size * channels * 4
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=bytes_per_block)
+    try:
+        while True:
+            raw = _read_exact(proc.stdout, bytes_per_block)
+            usable = len(raw) - len(raw) % (channels * 4)
+            if usable <= 0:
+                break
+            block = np.frombuffer(raw[:usable], dtype=np.float32)
+            yield block if channels == 1 else block.reshape(-1, channels)
+            if len(raw) < bytes_per_block:
+                break
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+def write_image(path: str, pixels: np.ndarray, quality: int = 3):
+    """Encodes an RGB (H, W, 3) uint8 array to an image file via ffmpeg."""
+    height, width = pixels.shape[:2]
+    cmd = [
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-i", "pipe:0",
+        "-frames:v", "1", "-q:v", str(quality), path,
+    ]
+    subprocess.run(cmd, input=np.ascontiguousarray(pixels).tobytes(), check=True, capture_output=True)
@@ -0,0 +1,217 @@
+"""
+Proxy media for smooth preview of heavy sources.
+
+4K HEVC screen recordings and long-GOP stock clips are slow to scrub in the
+browser. This module transcodes them into small all-intra H.264 proxies
+(every frame a keyframe, no B-frames, faststart) that seek instantly. The
+original stays untouched: assets keep `filePath`/`url` for export and gain
+`proxyPath`/`proxyUrl`, which the preview player prefers.
+
+Work runs on a bounded pool of ffmpeg workers fed from a priority queue, so
+clips that are already on the timeline are transcoded before the rest of the
+library.
+
+Usage:
+    python tools/media/proxy.py                 # all video assets in the snapshot
+    python tools/media/proxy.py a.mp4 b.mov     # just these files
+"""
+import os
+import sys
+import queue
+import argparse
+import itertools
+import threading
+import subprocess
+import urllib.parse
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from media_io import CACHE_DIR, content_hash, probe
+from snapshot_store import SNAPSHOT_FILE, read_snapshot, update_snapshot
+from asset_paths import resolve_asset
+
+PROXIES_DIR = os.path.join(CACHE_DIR, "proxies")
+PROXY_HEIGHT = 540
+# Codecs every browser decodes cheaply; anything else is proxied regardless of size
+LIGHT_CODECS = {"h264", "vp8", "vp9", "av1"}
+
+PRIORITY_TIMELINE = 0
+PRIORITY_LIBRARY = 10
+
+
+def needs_proxy(info: Dict, height: int = PROXY_HEIGHT) -> bool:
+    """Whether a probed video is heavy enough to warrant a proxy."""
+    if not info.get("has_video"):
+        return False
+    return info.get("height", 0) > height or info.get("video_codec") not in LIGHT_CODECS
+
+
+def proxy_path_for(source: str, height: int = PROXY_HEIGHT, out_dir: str = PROXIES_DIR) -> str:
+    return os.path.join(out_dir, f"{content_hash(source)}_{height}p.mp4")
+
+
+def serve_url(path: str) -> str:
+    return f"/api/media/serve?path={urllib.parse.quote(os.path.abspath(path))}"
+
+
+def transcode_proxy(source: str, target: str, height: int = PROXY_HEIGHT):
+    """Runs one ffmpeg transcode to an all-intra proxy (written atomically)."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_target = target + ".part.mp4"
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin", "-y", "-i", source,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({height},ih)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-tune", "fastdecode", "-crf", "26",
+        "-g", "1", "-bf", "0", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart", tmp_target,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(tmp_target, target)
+    finally:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+
+
+class ProxyPipeline:
+    """Bounded ffmpeg worker pool with priority scheduling.
+
+    submit() returns a Future resolving to the proxy path (or None when the
+    source is light enough to preview directly). Submitting a source that is
+    already queued returns the same Future; a higher priority re-queues it
+    ahead of the library backlog.
+    """
+
+    def __init__(self, workers: int = 2, height: int = PROXY_HEIGHT, out_dir: str = PROXIES_DIR):
+        self.height = height
+        self.out_dir = out_dir
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()  # FIFO order within a priority
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"proxy-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, source: str, priority: int = PRIORITY_LIBRARY) -> Future:
+        source = os.path.abspath(source)
+        with self._lock:
+            future = self._futures.get(source)
+            if future is None:
+                future = Future()
+                self._futures[source] = future
+            elif future.done():
+                return future
+            self._queue.put((priority, next(self._counter), source))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._counter), None))
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def _worker(self):
+        while True:
+            _, _, source = self._queue.get()
+            if source is None:
+                return
+            future = self._futures[source]
+            with self._lock:
+                # Duplicate queue entries (priority bumps) are skipped once claimed
+                if future.running() or future.done():
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+            try:
+                future.set_result(self._build(source))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _build(self, source: str) -> Optional[str]:
+        if not needs_proxy(probe(source), self.height):
+            return None
+        target = proxy_path_for(source, self.height, self.out_dir)
+        if not os.path.exists(target):
+            transcode_proxy(source, target, self.height)
+        return target
+
+
+def timeline_media_ids(snapshot: Dict) -> set:
+    return {
+        el.get("mediaId")
+        for track in snapshot.get("tracks", [])
+        for el in track.get("elements", [])
+        if el.get("mediaId")
+    }
+
+
+def generate_proxies(snapshot_path: str = SNAPSHOT_FILE, workers: int = 2, height: int = PROXY_HEIGHT) -> int:
+    """Proxies every video asset in the snapshot, timeline clips first.
+
+    Each finished proxy is written back to its asset (proxyPath/proxyUrl)
+    as soon as it completes, so the preview can switch over clip by clip.
+    Returns the number of assets that received a proxy.
+    """
+    snapshot = read_snapshot(snapshot_path)
+    on_timeline = timeline_media_ids(snapshot)
+    pipeline = ProxyPipeline(workers=workers, height=height)
+    pending = {}
+    for asset in snapshot.get("assets", []):
+        path = resolve_asset(asset) if asset.get("type") == "video" else None
+        if not path:
+            continue
+        priority = PRIORITY_TIMELINE if asset.get("id") in on_timeline else PRIORITY_LIBRARY
+        pending[asset["id"]] = pipeline.submit(path, priority)
+
+    done = 0
+    for asset_id, future in pending.items():
+        try:
+            proxy = future.result()
+        except Exception as e:
+            print(f"❌ Proxy failed for {asset_id}: {e}")
+            continue
+        if not proxy:
+            continue
+
+        def apply(data, asset_id=asset_id, proxy=proxy):
+            for asset in data.get("assets", []):
+                if asset.get("id") == asset_id:
+                    asset["proxyPath"] = proxy
+                    asset["proxyUrl"] = serve_url(proxy)
+
+        update_snapshot(apply, snapshot_path)
+        done += 1
+        print(f"✅ Proxy ready: {asset_id}")
+
+    pipeline.shutdown()
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate all-intra preview proxies")
+    parser.add_argument("files", nargs="*", help="files to proxy (default: all video assets in the snapshot)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--height", type=int, default=PROXY_HEIGHT)
+    args = parser.parse_args()
+
+    if args.files:
+        pipeline = ProxyPipeline(workers=args.workers, height=args.height)
+        futures = {path: pipeline.submit(path) for path in args.files}
+        for path, future in futures.items():
+            try:
+                print(f"✅ {path} -> {future.result() or 'no proxy needed'}")
+            except Exception as e:
+                print(f"❌ {path}: {e}")
+        pipeline.shutdown()
+    else:
+        count = generate_proxies(workers=args.workers, height=args.height)
+        print(f"Proxies attached to {count} assets")
@@ -0,0 +1,536 @@
+"""
+Headless ffmpeg export of a project snapshot.
+
+The browser export (/api/export) bundles Remotion and screenshots every frame
+in Chromium. For cut-and-caption projects that is mostly overhead: this
+module compiles project-snapshot.json straight into one ffmpeg command and
+renders it with libx264, without the Next.js server or any uploads.
+
+The compiled graph mirrors ExportComposition:
+- tracks[0] is the top layer; hidden tracks are skipped
+- media is fitted into the canvas ("contain") and shown for
+  duration - trimStart - trimEnd seconds starting at startTime
+- a file is opened once for all the clips that read it front to back
+  (reordered or overlapping uses get their own input); clips cut their
+  part with trim, and the clips of a track are concatenated into one
+  branch, so a track costs a single overlay however many cuts it has
+- audio of videos and audio clips is trimmed, scaled by volume (0 when the
+  element or its track is muted), delayed to startTime and mixed
+- text elements are centred on (x, y); all captions go into one ASS script
+  rendered by libass, so CJK text, background boxes and long caption tracks
+  cost a single filter
+
+Usage:
+    python tools/media/render.py -o out.mp4 [--quality high] [--preset veryfast]
+"""
+import os
+import re
+import sys
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.parse
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from media_io import MATERIALS_DIR, PROJECT_ROOT, probe
+from snapshot_store import SNAPSHOT_FILE, read_snapshot
+from asset_paths import resolve_asset
+
+PUBLIC_DIR = os.path.dirname(MATERIALS_DIR)
+EXPORTS_DIR = os.path.join(PROJECT_ROOT, "ai_workspace", "exports")
+
+# Same CRF ladder as /api/export
+QUALITY_CRF = {"low": 28, "medium": 23, "high": 18, "very_high": 15}
+X264_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow")
+DEFAULT_PRESET = "veryfast"
+AUDIO_RATE = 48000
+
+NAMED_COLORS = {
+    "white": (255, 255, 255), "black": (0, 0, 0), "red": (255, 0, 0), "green": (0, 128, 0),
+    "blue": (0, 0, 255), "yellow": (255, 255, 0), "gray": (128, 128, 128), "grey": (128, 128, 128),
+}
+
+
+def parse_color(value: Optional[str], default=(255, 255, 255, 1.0)):
+    """CSS colour -> (r, g, b, alpha 0..1). Handles #rgb, #rrggbb(aa), rgb(a)(), names and 'transparent'."""
+    if not value:
+        return default
+    value = value.strip().lower()
+    if value == "transparent":
+        return (0, 0, 0, 0.0)
+    if value in NAMED_COLORS:
+        return NAMED_COLORS[value] + (1.0,)
+    if value.startswith("#"):
+        hex_part = value[1:]
+        if len(hex_part) in (3, 4):
+            hex_part = "".join(c * 2 for c in hex_part)
+        if len(hex_part) in (6, 8):
+            r, g, b = (int(hex_part[i:i + 2], 16) for i in (0, 2, 4))
+            alpha = int(hex_part[6:8], 16) / 255 if len(hex_part) == 8 else 1.0
+            return (r, g, b, alpha)
+    match = re.match(r"rgba?\(([^)]*)\)", value)
+    if match:
+        parts = [p.strip() for p in match.group(1).replace("/", ",").split(",") if p.strip()]
+        if len(parts) >= 3:
+            r, g, b = (int(float(p)) for p in parts[:3])
+            alpha = float(parts[3].rstrip("%")) / (100 if parts[3].endswith("%") else 1) if len(parts) > 3 else 1.0
+            return (r, g, b, alpha)
+    return default
+
+
+def resolve_media_path(asset: Dict) -> Optional[str]:
+    """Local file behind an asset: its portable path record, a /api/media/serve?path= URL or a public/ URL."""
+    path = resolve_asset(asset)
+    if path:
+        return path
+    url = asset.get("url") or ""
+    if "/api/media/serve" in url:
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        served = query.get("path", [None])[0]
+        if served and os.path.exists(served):
+            return served
+    elif url.startswith("/"):
+        local = os.path.join(PUBLIC_DIR, urllib.parse.unquote(url.split("?")[0]).lstrip("/"))
+        if os.path.exists(local):
+            return local
+    return None
+
+
+def _ass_time(seconds: float) -> str:
+    cs = int(round(max(0.0, seconds) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def _ass_color(rgba, opacity: float = 1.0):
+    """(r, g, b, alpha) -> ASS colour and alpha override values ("&HBBGGRR&", "&HAA&")."""
+    r, g, b, alpha = rgba
+    transparency = 255 - int(round(255 * max(0.0, min(1.0, alpha * opacity))))
+    return f"&H{b:02X}{g:02X}{r:02X}&", f"&H{transparency:02X}&"
+
+
+def _ass_text(content: str) -> str:
+    # Braces open override blocks in ASS; swap them for full-width lookalikes
+    content = content.replace("\\", "⧵").replace("{", "｛").replace("}", "｝")
+    return content.replace("\r\n", "\n").replace("\n", "\\N")
+
+
+def build_ass(texts: List[Dict], width: int, height: int, fps: Optional[float] = None) -> str:
+    """ASS script for the text elements: one Dialogue per element, positioned by override tags.
+
+    With fps, event times are snapped to half a frame before their frame, so
+    rounding in libass's millisecond clock cannot shift a caption by a frame.
+    """
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        # BorderStyle 3 draws an opaque box in OutlineColour behind the text
+        "Style: Plain,Arial,48,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,0,0,5,0,0,0,1",
+        "Style: Boxed,Arial,48,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,3,4,0,5,0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    # Wrap at 80% of the canvas like the export composition's maxWidth
+    margin = int(width * 0.1)
+    for layer, el in enumerate(texts):
+        style = el.get("style") or {}
+        font = (el.get("fontFamily") or style.get("fontFamily") or "Arial").split(",")[0].strip(" '\"")
+        size = el.get("fontSize") or style.get("fontSize") or 40
+        opacity = el.get("opacity", 1)
+        color = parse_color(el.get("color") or style.get("color"))
+        background = parse_color(el.get("backgroundColor") or style.get("backgroundColor"), (0, 0, 0, 0.0))
+        weight = str(el.get("fontWeight") or style.get("fontWeight") or "normal")
+        bold = weight == "bold" or (weight.isdigit() and int(weight) >= 600)
+        italic = (el.get("fontStyle") or style.get("fontStyle")) == "italic"
+        tags = (
+            f"\\an5\\pos({float(el.get('x') or 0):.1f},{float(el.get('y') or 0):.1f})"
+            f"\\fn{font}\\fs{size}\\b{int(bold)}\\i{int(italic)}"
+            "\\1c{}\\1a{}".format(*_ass_color(color, opacity))
+        )
+        style_name = "Plain"
+        if background[3] > 0:
+            style_name = "Boxed"
+            tags += "\\3c{}\\3a{}".format(*_ass_color(background, opacity))
+        if el.get("rotation"):
+            tags += f"\\frz{-float(el['rotation']):g}"
+        start = float(el.get("startTime", 0))
+        end = start + float(el.get("duration", 0))
+        if fps:
+            start, end = ((round(t * fps) - 0.5) / fps for t in (start, end))
+        text = _ass_text(el.get("text") or el.get("content") or "")
+        lines.append(f"Dialogue: {layer},{_ass_time(start)},{_ass_time(end)},{style_name},,"
+                     f"{margin},{margin},0,,{{{tags}}}{text}")
+    return "\n".join(lines) + "\n"
+
+
+class RenderPlan:
+    """A compiled snapshot: ffmpeg input arguments, filter graph and caption script.
+
+    Build one with compile_snapshot() and pass it to render(); args() gives the
+    complete ffmpeg command for inspection. A plan may carry only video
+    ([vout]) or only audio ([aout]).
+    """
+
+    def __init__(self, width: int, height: int, fps: float, duration: float):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.duration = duration
+        self.inputs: List[List[str]] = []
+        self.filters: List[str] = []
+        self.ass: Optional[str] = None
+        self.skipped: List[str] = []
+        self.has_video = False
+        self.has_audio = False
+
+    @property
+    def frames(self) -> int:
+        return int(round(self.duration * self.fps))
+
+    def add_input(self, path: str, *options: str) -> int:
+        self.inputs.append([*options, "-i", os.path.abspath(path)])
+        return len(self.inputs) - 1
+
+    def filter_graph(self) -> str:
+        return ";\n".join(self.filters)
+
+    def args(self, output: str, crf: int = QUALITY_CRF["medium"], preset: str = DEFAULT_PRESET,
+             graph_file: str = "graph.txt", threads: Optional[int] = None) -> List[str]:
+        cmd = ["ffmpeg", "-v", "error", "-nostdin", "-y"]
+        for inp in self.inputs:
+            cmd += inp
+        cmd += ["-filter_complex_script", graph_file]
+        if self.has_video:
+            cmd += [
+                "-map", "[vout]", "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+                "-pix_fmt", "yuv420p", "-r", f"{self.fps:g}", "-frames:v", str(self.frames),
+            ]
+            if threads:
+                cmd += ["-threads", str(threads)]
+        if self.has_audio:
+            cmd += ["-map", "[aout]", "-c:a", "aac", "-b:a", "192k", "-ar", str(AUDIO_RATE)]
+        cmd += ["-t", f"{self.duration:.3f}", "-movflags", "+faststart", output]
+        return cmd
+
+
+def snapshot_duration(snapshot: Dict) -> float:
+    end = 0.0
+    for track in snapshot.get("tracks", []):
+        if track.get("isHidden"):
+            continue
+        for el in track.get("elements", []):
+            visible = el.get("duration", 0) - (el.get("trimStart", 0) + el.get("trimEnd", 0) if el.get("type") == "media" else 0)
+            end = max(end, el.get("startTime", 0) + visible)
+    return end
+
+
+def compile_snapshot(
+    snapshot: Dict,
+    duration: Optional[float] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    video: bool = True,
+    audio: bool = True,
+) -> RenderPlan:
+    """Compiles a snapshot into a RenderPlan (media is probed for audio streams).
+
+    start/end select a window of the timeline; the plan's output begins at
+    start, so windows rendered separately can be joined back to back.
+    video=False / audio=False leave out the [vout] / [aout] branch.
+    Elements whose file cannot be found are skipped and listed in plan.skipped.
+    """
+    project = snapshot.get("project", {})
+    canvas = project.get("canvasSize") or {}
+    width, height = int(canvas.get("width") or 1920), int(canvas.get("height") or 1080)
+    fps = float(project.get("fps") or 30)
+    total = duration or snapshot_duration(snapshot)
+    end = min(end, total) if end is not None else total
+    plan = RenderPlan(width, height, fps, end - start)
+    plan.has_video, plan.has_audio = video, audio
+    if plan.duration <= 0:
+        raise ValueError("Snapshot has nothing to render")
+
+    if video:
+        r, g, b, _ = parse_color(project.get("backgroundColor"), (0, 0, 0, 1.0))
+        plan.filters.append(f"color=c=0x{r:02x}{g:02x}{b:02x}:s={width}x{height}:r={fps:g}:d={plan.duration:.3f}[base]")
+
+    assets = {a.get("id"): a for a in snapshot.get("assets", [])}
+    has_audio: Dict[str, bool] = {}
+    tracks: List[List[Dict]] = []   # visual clips per track, bottom track first
+    audio_clips: List[Dict] = []
+    texts: List[Dict] = []
+
+    # Bottom track first, so each overlay lands on top of what is already composed
+    for track in reversed(snapshot.get("tracks", [])):
+        if track.get("isHidden"):
+            continue
+        clips = []
+        for el in track.get("elements", []):
+            if el.get("type") == "text":
+                el_start = float(el.get("startTime", 0))
+                el_end = el_start + float(el.get("duration", 0))
+                if video and el_end > start and el_start < end:
+                    texts.append(dict(el, startTime=el_start - start, duration=el_end - el_start))
+                continue
+            if el.get("type") != "media":
+                continue
+            asset = assets.get(el.get("mediaId"))
+            path = resolve_media_path(asset) if asset else None
+            if not path:
+                plan.skipped.append(el.get("id"))
+                continue
+            kind = el.get("mediaType") or asset.get("type")
+            el_start = float(el.get("startTime", 0))
+            trim = float(el.get("trimStart", 0))
+            el_end = el_start + float(el.get("duration", 0)) - trim - float(el.get("trimEnd", 0))
+            # Part of the element inside the window, in window time
+            offset = max(el_start, start)
+            visible = min(el_end, end) - offset
+            if visible <= 0:
+                continue
+            seek = trim + offset - el_start
+            offset -= start
+            volume = 0 if track.get("muted") or el.get("muted") else float(el.get("volume", 1))
+            wants_video = video and kind in ("image", "video")
+            wants_audio = audio and kind in ("video", "audio") and volume > 0
+            if wants_audio:
+                if path not in has_audio:
+                    has_audio[path] = probe(path)["has_audio"]
+                wants_audio = has_audio[path]
+            clip = {"path": path, "image": kind == "image", "seek": 0.0 if kind == "image" else seek,
+                    "offset": offset, "visible": visible, "volume": volume}
+            if wants_video:
+                clips.append(clip)
+            if wants_audio:
+                audio_clips.append(clip)
+        tracks.append(clips)
+
+    # Clips share an input (one decode, cut apart with trim/atrim) while they read the file front
+    # to back: each starts, in source and in output time, where an earlier one ended. A clip that
+    # seeks back (reordered cuts) or overlaps another use gets an input of its own; splitting one
+    # decode for it would queue every frame in between until the later branch caught up
+    all_clips = [c for clips in tracks for c in clips] + audio_clips
+    uses: Dict[str, List[Dict]] = {}
+    for clip in {id(c): c for c in all_clips}.values():
+        uses.setdefault(clip["path"], []).append(clip)
+    windows: Dict[Tuple[str, int], List[float]] = {}
+    slack = 0.5 / fps
+    for path, clips in uses.items():
+        ends: List[Tuple[float, float]] = []  # per input of this file: (source end, output end)
+        for clip in sorted(clips, key=lambda c: (c["offset"], c["seek"])):
+            n = next((i for i, (seek_end, out_end) in enumerate(ends)
+                      if clip["seek"] >= seek_end - slack and clip["offset"] >= out_end - slack), len(ends))
+            if n == len(ends):
+                ends.append((0.0, 0.0))
+                windows[(path, n)] = [clip["seek"], clip["seek"]]
+            ends[n] = (clip["seek"] + clip["visible"], clip["offset"] + clip["visible"])
+            windows[(path, n)][1] = clip["seek"] + clip["visible"]
+            clip["source"] = (path, n)
+    inputs: Dict[Tuple[str, int], int] = {}
+    for clip in all_clips:
+        source = clip["source"]
+        if source not in inputs:
+            lo, hi = windows[source]
+            # One extra frame so rounding never cuts the last frame of the window
+            length = f"{hi - lo + 1 / fps:.3f}"
+            if clip["image"]:
+                inputs[source] = plan.add_input(clip["path"], "-loop", "1", "-framerate", f"{fps:g}", "-t", length)
+            else:
+                inputs[source] = plan.add_input(clip["path"], *(["-ss", f"{lo:.3f}"] if lo else []), "-t", length)
+        clip["input"] = inputs[source]
+        clip["start"] = clip["seek"] - windows[source][0]
+
+    def split_streams(clips: List[Dict], stream: str, split: str) -> List[str]:
+        """Labels of input streams for clips, splitting inputs that feed several clips"""
+        users: Dict[int, List[int]] = {}
+        for i, clip in enumerate(clips):
+            users.setdefault(clip["input"], []).append(i)
+        labels = [""] * len(clips)
+        for idx, indices in users.items():
+            if len(indices) == 1:
+                labels[indices[0]] = f"[{idx}:{stream}]"
+                continue
+            outs = [f"[{idx}{stream}{n}]" for n in range(len(indices))]
+            plan.filters.append(f"[{idx}:{stream}]{split}={len(indices)}{''.join(outs)}")
+            for i, label in zip(indices, outs):
+                labels[i] = label
+        return labels
+
+    video_label = "base"
+    if video:
+        visual = [c for clips in tracks for c in clips]
+        for clip, label in zip(visual, split_streams(visual, "v", "split")):
+            clip["label"] = label
+        branch = 0
+        for clips in tracks:
+            # Consecutive non-overlapping clips become one branch (transparent fill in the gaps),
+            # so a track costs a single overlay instead of one per clip
+            runs: List[List[Dict]] = []
+            for clip in sorted(clips, key=lambda c: c["offset"]):
+                clip["first"] = int(round(clip["offset"] * fps))
+                clip["last"] = int(round((clip["offset"] + clip["visible"]) * fps))
+                if clip["last"] <= clip["first"]:
+                    continue
+                if runs and runs[-1][-1]["last"] <= clip["first"]:
+                    runs[-1].append(clip)
+                else:
+                    runs.append([clip])
+            for run in runs:
+                parts, cursor = [], run[0]["first"]
+                for clip in run:
+                    if clip["first"] > cursor:
+                        parts.append(f"color=c=black@0:s={width}x{height}:r={fps:g},format=yuva420p,"
+                                     f"trim=end_frame={clip['first'] - cursor}")
+                    # A file that ends early is padded with transparent frames (the layers below
+                    # show through, as with a lone overlay) so later clips keep their place;
+                    # tpad repeats the last timestamp, so frames are renumbered after the cut
+                    parts.append(
+                        f"{clip['label']}fps={fps:g},trim=start_frame={int(round(clip['start'] * fps))},"
+                        f"scale={width}:{height}:force_original_aspect_ratio=decrease,format=yuva420p,"
+                        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black@0,setsar=1,"
+                        f"tpad=stop=-1:color=black@0,trim=end_frame={clip['last'] - clip['first']},setpts=N"
+                    )
+                    cursor = clip["last"]
+                segments = []
+                for part in parts:
+                    segments.append(f"[t{branch}s{len(segments)}]")
+                    plan.filters.append(f"{part}{segments[-1]}")
+                # After fps= the timebase is 1/fps, so an integer frame offset places the branch
+                # exactly (seconds/TB can land a hair below a frame and get truncated)
+                joined = f"concat=n={len(segments)}:v=1:a=0," if len(segments) > 1 else ""
+                plan.filters.append(
+                    f"{''.join(segments)}{joined}fps={fps:g},setpts=PTS-STARTPTS+{run[0]['first']}[t{branch}]"
+                )
+                plan.filters.append(f"[{video_label}][t{branch}]overlay=eof_action=pass[o{branch}]")
+                video_label = f"o{branch}"
+                branch += 1
+
+    audio_labels = []
+    if audio:
+        for i, (clip, label) in enumerate(zip(audio_clips, split_streams(audio_clips, "a", "asplit"))):
+            delay = int(round(clip["offset"] * 1000))
+            plan.filters.append(
+                f"{label}atrim=start={clip['start']:.3f}:duration={clip['visible']:.3f},"
+                f"asetpts=PTS-STARTPTS,aresample={AUDIO_RATE},"
+                f"aformat=sample_fmts=fltp:channel_layouts=stereo,volume={clip['volume']:g},"
+                f"adelay=delays={delay}:all=1[a{i}]"
+            )
+            audio_labels.append(f"[a{i}]")
+
+    if video and texts:
+        plan.ass = build_ass(texts, width, height, fps)
+        plan.filters.append(f"[{video_label}]ass=captions.ass[vout]")
+    elif video:
+        plan.filters.append(f"[{video_label}]null[vout]")
+
+    if audio and audio_labels:
+        plan.filters.append(
+            f"{''.join(audio_labels)}amix=inputs={len(audio_labels)}:duration=longest:normalize=0,"
+            f"apad=whole_dur={plan.duration:.3f}[aout]"
+        )
+    elif audio:
+        plan.filters.append(f"anullsrc=r={AUDIO_RATE}:cl=stereo,atrim=duration={plan.duration:.3f}[aout]")
+    return plan
+
+
+def render(
+    plan: RenderPlan,
+    output: str,
+    quality: str = "medium",
+    preset: str = DEFAULT_PRESET,
+    on_progress: Optional[Callable[[float], None]] = None,
+    threads: Optional[int] = None,
+) -> str:
+    """Runs the plan through ffmpeg, writing output atomically.
+
+    on_progress receives the rendered fraction (0..1) as ffmpeg reports it;
+    threads caps the encoder threads when several renders share a machine.
+    Raises subprocess.CalledProcessError (with ffmpeg's stderr) on failure.
+    """
+    if preset not in X264_PRESETS:
+        raise ValueError(f"Unknown x264 preset: {preset}")
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    # Unique per host/process/thread: workers sharing a job directory may render the same target
+    tmp_output = f"{output}.{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}.part{os.path.splitext(output)[1]}"
+    work_dir = tempfile.mkdtemp(prefix="aicut_render_")
+    try:
+        with open(os.path.join(work_dir, "graph.txt"), "w", encoding="utf-8") as f:
+            f.write(plan.filter_graph())
+        if plan.ass:
+            with open(os.path.join(work_dir, "captions.ass"), "w", encoding="utf-8") as f:
+                f.write(plan.ass)
+
+        # The graph refers to captions.ass relative to work_dir, which avoids
+        # escaping drive letters and backslashes inside the filter string
+        cmd = plan.args(tmp_output, QUALITY_CRF.get(quality, QUALITY_CRF["medium"]), preset, threads=threads)
+        cmd[1:1] = ["-progress", "pipe:1", "-nostats"]
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(cmd, cwd=work_dir, stdout=subprocess.PIPE, stderr=stderr, text=True)
+            for line in proc.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and on_progress and value.isdigit():
+                    # 1.0 is reported once, after the output is in place
+                    on_progress(min(0.999, int(value) / 1e6 / plan.duration))
+            if proc.wait() != 0:
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr.read().decode(errors="replace"))
+        os.replace(tmp_output, output)
+        if on_progress:
+            on_progress(1.0)
+        return output
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+
+
+def render_snapshot(
+    output: str,
+    snapshot_path: str = SNAPSHOT_FILE,
+    quality: str = "medium",
+    preset: str = DEFAULT_PRESET,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> str:
+    plan = compile_snapshot(read_snapshot(snapshot_path))
+    for element_id in plan.skipped:
+        print(f"⚠️ Media not found, skipped element {element_id}")
+    return render(plan, output, quality, preset, on_progress)
+
+
+def print_progress(fraction: float):
+    print(f"\rRendering {fraction * 100:5.1f}%", end="\n" if fraction >= 1 else "", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render project-snapshot.json with ffmpeg")
+    parser.add_argument("-o", "--output", help="output file (default: ai_workspace/exports/<project>.mp4)")
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE)
+    parser.add_argument("--quality", choices=list(QUALITY_CRF), default="medium")
+    parser.add_argument("--preset", choices=X264_PRESETS, default=DEFAULT_PRESET)
+    parser.add_argument("--print-graph", action="store_true", help="print the compiled filter graph and exit")
+    args = parser.parse_args()
+
+    if args.print_graph:
+        print(compile_snapshot(read_snapshot(args.snapshot)).filter_graph())
+        sys.exit(0)
+
+    output = args.output
+    if not output:
+        name = read_snapshot(args.snapshot).get("project", {}).get("name") or "export"
+        output = os.path.join(EXPORTS_DIR, f"{name}.mp4")
+    print(f"✅ Exported: {render_snapshot(output, args.snapshot, args.quality, args.preset, print_progress)}")
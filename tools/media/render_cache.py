@@ -0,0 +1,110 @@
+"""
+Rendered segment cache for incremental exports.
+
+A segment's key hashes everything that determines its pixels (or samples):
+the compiled filter graph and caption script of its time window, the input
+options, every input file's content hash, size and mtime (not its path),
+and the encoder settings. Re-exporting after a small edit therefore
+re-encodes only the segments whose window actually changed; everything else
+is linked back from
+
+    ai_workspace/cache/render/<key>.mp4 (or .m4a)
+
+Entries are touched on every hit and prune() drops the least recently used
+ones once the cache grows past its size budget.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from media_io import CACHE_DIR, content_hash
+
+RENDER_CACHE_DIR = os.path.join(CACHE_DIR, "render")
+MAX_CACHE_BYTES = 20 * 1024 ** 3
+KEY_VERSION = 2
+
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def _file_hash(path: str) -> str:
+    """content_hash only samples the head and tail of a file, so size and mtime
+    are mixed in: an edit in the middle of a file must change the key. Renames
+    and moves keep the mtime and still hit."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key not in _hashes:
+            _hashes[key] = f"{content_hash(path)}_{stat.st_size}_{stat.st_mtime_ns}"
+        return _hashes[key]
+
+
+def plan_key(plan, quality: str, preset: str) -> str:
+    """Cache key of a RenderPlan rendered with the given encoder settings."""
+    inputs = []
+    for options in plan.inputs:
+        *flags, _, path = options  # [..., "-i", path]
+        inputs.append(flags + [_file_hash(path)])
+    payload = json.dumps({
+        "version": KEY_VERSION,
+        "size": [plan.width, plan.height], "fps": plan.fps, "duration": round(plan.duration, 6),
+        "video": plan.has_video, "audio": plan.has_audio,
+        "inputs": inputs, "graph": plan.filter_graph(), "ass": plan.ass,
+        "quality": quality, "preset": preset,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _entry(key: str, ext: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, key + ext)
+
+
+def _link(source: str, target: str):
+    """Hard link when possible (same filesystem), otherwise copy; target appears atomically."""
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+
+def fetch(key: str, target: str, cache_dir: str = RENDER_CACHE_DIR) -> bool:
+    """Places the cached render for key at target; False on a miss."""
+    entry = _entry(key, os.path.splitext(target)[1], cache_dir)
+    if not os.path.exists(entry):
+        return False
+    os.utime(entry)
+    _link(entry, target)
+    return True
+
+
+def store(key: str, source: str, cache_dir: str = RENDER_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    _link(source, _entry(key, os.path.splitext(source)[1], cache_dir))
+
+
+def prune(max_bytes: int = MAX_CACHE_BYTES, cache_dir: Optional[str] = RENDER_CACHE_DIR) -> int:
+    """Deletes least recently used entries until the cache fits max_bytes; returns bytes freed."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith(".tmp") or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        os.remove(path)
+        freed += size
+    return freed
@@ -0,0 +1,134 @@
+"""
+Scene-cut detection for video assets.
+
+Frames are streamed from ffmpeg as tiny grayscale images (no seeking, one
+decode pass) and compared in batches with NumPy:
+
+- luma difference: mean absolute pixel change between consecutive frames
+- histogram difference: half the L1 distance of 32-bin luma histograms
+
+A cut is reported where the combined score exceeds `threshold`, with at
+least `min_scene_len` seconds between cuts so flashes and fast pans do not
+fragment a shot. Results are cached per asset in the analysis cache.
+
+Usage:
+    python tools/media/scenes.py clip.mp4 --threshold 0.35
+"""
+import os
+import sys
+import argparse
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import analysis_cache
+from media_io import probe, iter_video_frames
+
+ANALYSIS_KEY = "scene_cuts"
+FRAME_WIDTH = 96
+FRAME_HEIGHT = 54
+HIST_BINS = 32
+BATCH_SIZE = 256
+
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_MIN_SCENE_LEN = 0.5  # seconds
+
+
+def _batches(frames: Iterable[np.ndarray], size: int) -> Iterator[np.ndarray]:
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == size:
+            yield np.stack(batch)
+            batch = []
+    if batch:
+        yield np.stack(batch)
+
+
+def frame_scores(frames: Iterable[np.ndarray], batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """Returns one change score in [0, 1] per frame (score[0] is always 0).
+
+    Frames are (H, W) uint8 luma arrays; the previous batch's last frame is
+    carried over so every consecutive pair is compared exactly once.
+    """
+    scores = [np.zeros(1, dtype=np.float32)]
+    prev_frame = None
+    prev_hist = None
+    shift = 8 - int(np.log2(HIST_BINS))
+
+    for batch in _batches(frames, batch_size):
+        n, h, w = batch.shape
+        pixels = float(h * w)
+
+        # Histograms for the whole batch in one bincount: offset each frame's bins
+        bins = (batch >> shift).astype(np.int64) + (np.arange(n) * HIST_BINS)[:, None, None]
+        hists = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS) / pixels
+
+        if prev_frame is not None:
+            batch_frames = np.concatenate([prev_frame[None], batch])
+            batch_hists = np.concatenate([prev_hist[None], hists])
+        else:
+            batch_frames, batch_hists = batch, hists
+
+        luma = np.abs(np.diff(batch_frames.astype(np.int16), axis=0)).mean(axis=(1, 2)) / 255.0
+        hist = 0.5 * np.abs(np.diff(batch_hists, axis=0)).sum(axis=1)
+        scores.append((0.5 * luma + 0.5 * hist).astype(np.float32))
+
+        prev_frame, prev_hist = batch[-1], hists[-1]
+
+    return np.concatenate(scores)
+
+
+def pick_cuts(scores: np.ndarray, fps: float, threshold: float, min_scene_len: float) -> List[float]:
+    """Turns per-frame scores into cut times, keeping the strongest cut within each min_scene_len window."""
+    candidates = np.flatnonzero(scores > threshold)
+    min_gap = max(1, int(round(min_scene_len * fps)))
+    cuts: List[int] = []
+    for idx in candidates:
+        if idx < min_gap:
+            continue
+        if cuts and idx - cuts[-1] < min_gap:
+            if scores[idx] > scores[cuts[-1]]:
+                cuts[-1] = idx
+            continue
+        cuts.append(int(idx))
+    return [round(i / fps, 3) for i in cuts]
+
+
+def detect_scene_cuts(
+    file_path: str,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_scene_len: float = DEFAULT_MIN_SCENE_LEN,
+    force: bool = False,
+) -> List[float]:
+    """Returns the cut times (seconds) of a video, using the analysis cache."""
+    params = {"threshold": threshold, "minSceneLen": min_scene_len, "size": [FRAME_WIDTH, FRAME_HEIGHT]}
+
+    def compute():
+        fps = probe(file_path)["fps"] or 25.0
+        frames = iter_video_frames(file_path, FRAME_WIDTH, FRAME_HEIGHT, gray=True)
+        return pick_cuts(frame_scores(frames), fps, threshold, min_scene_len)
+
+    return analysis_cache.get_or_compute(file_path, ANALYSIS_KEY, compute, params, force=force)
+
+
+def scenes_from_cuts(cuts: List[float], duration: float) -> List[dict]:
+    """Shot ranges [{"start", "end"}] covering the whole clip."""
+    bounds = [0.0] + [c for c in cuts if 0 < c < duration] + [duration]
+    return [{"start": s, "end": e} for s, e in zip(bounds, bounds[1:]) if e > s]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect scene cuts in video files")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-scene-len", type=float, default=DEFAULT_MIN_SCENE_LEN)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    for path in args.files:
+        cuts = detect_scene_cuts(path, args.threshold, args.min_scene_len, force=args.force)
+        print(f"{path}: {len(cuts)} cuts")
+        for t in cuts:
+            print(f"  {t:.3f}s")
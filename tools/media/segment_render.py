@@ -0,0 +1,398 @@
+"""
+Segmented parallel export.
+
+A single ffmpeg render encodes the timeline front to back on one machine.
+This module cuts the timeline into independent video segments and renders
+them as separate ffmpeg processes, then joins them with the concat demuxer
+(stream copy, no re-encode):
+
+- segment boundaries sit on a fixed segment_seconds grid, each moved to
+  the nearest cut point (element boundary, snapped to the frame grid) when
+  one is close; every segment starts on its own keyframe
+- all segments share one encoder configuration, which is what makes the
+  stream-copy join valid
+- audio is mixed once over the whole timeline (no seams at segment joins)
+  and muxed in during the join
+- rendered segments (and the audio mix) are kept in render_cache, so a
+  re-export only re-encodes segments whose content changed; because the
+  grid anchors the boundaries, an edit moves at most its neighbouring ones
+
+The job lives in a directory (job.json + a copy of the snapshot). Workers
+claim segments with lock files, so any machine that sees the same directory
+and the same media paths can help:
+
+    python tools/media/segment_render.py -o out.mp4 --job-dir /mnt/share/job1
+    python tools/media/segment_render.py --work /mnt/share/job1     # on other machines
+
+A lock whose owner stops touching it for STALE_LOCK seconds is taken over.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+import render_cache
+from render import DEFAULT_PRESET, QUALITY_CRF, X264_PRESETS, compile_snapshot, render, snapshot_duration
+from snapshot_store import SNAPSHOT_FILE, read_snapshot
+
+SEGMENT_SECONDS = 10.0
+MIN_SEGMENT_SECONDS = 2.0
+HEARTBEAT = 5.0
+STALE_LOCK = 60.0
+POLL_INTERVAL = 0.5
+JOB_FILE = "job.json"
+JOB_SNAPSHOT = "snapshot.json"
+AUDIO_FILE = "audio.m4a"
+
+
+def cut_points(snapshot: Dict, fps: float) -> List[int]:
+    """Frame indices where a visual element (media or text) starts or ends."""
+    frames = set()
+    for track in snapshot.get("tracks", []):
+        if track.get("isHidden"):
+            continue
+        for el in track.get("elements", []):
+            start = float(el.get("startTime", 0))
+            length = float(el.get("duration", 0))
+            if el.get("type") == "media":
+                length -= float(el.get("trimStart", 0)) + float(el.get("trimEnd", 0))
+            frames.add(int(round(start * fps)))
+            frames.add(int(round((start + length) * fps)))
+    return sorted(frames)
+
+
+def plan_segments(
+    snapshot: Dict,
+    segment_seconds: float = SEGMENT_SECONDS,
+    min_seconds: float = MIN_SEGMENT_SECONDS,
+) -> List[Tuple[int, int]]:
+    """Splits the timeline into [start_frame, end_frame) segments.
+
+    Boundaries start on multiples of segment_seconds and snap to the nearest
+    cut point within a quarter segment. Each boundary depends only on the cuts
+    around its own grid point, so editing one part of the timeline leaves the
+    other segments (and their cache keys) untouched.
+    """
+    fps = float(snapshot.get("project", {}).get("fps") or 30)
+    total = int(round(snapshot_duration(snapshot) * fps))
+    max_len = max(1, int(round(segment_seconds * fps)))
+    min_len = min(max_len, max(1, int(round(min_seconds * fps))))
+    snap = max_len // 4
+    cuts = [c for c in cut_points(snapshot, fps) if 0 < c < total]
+
+    bounds = [0]
+    grid = max_len
+    while grid < total:
+        near = [c for c in cuts if abs(c - grid) <= snap]
+        bound = min(near, key=lambda c: (abs(c - grid), c)) if near else grid
+        if bound - bounds[-1] >= min_len and total - bound >= min_len:
+            bounds.append(bound)
+        grid += max_len
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def segment_name(index: int) -> str:
+    return f"seg_{index:04d}.mp4"
+
+
+def prepare_job(
+    job_dir: str,
+    snapshot: Dict,
+    quality: str = "medium",
+    preset: str = DEFAULT_PRESET,
+    segment_seconds: float = SEGMENT_SECONDS,
+    cache: bool = True,
+) -> Dict:
+    """Writes job.json and the snapshot copy into job_dir; returns the job description.
+
+    Outputs left in job_dir by an earlier job are removed (reuse goes through the cache).
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    for name in os.listdir(job_dir):
+        if name.startswith("seg_") or name in (JOB_FILE, AUDIO_FILE, "segments.txt"):
+            os.remove(os.path.join(job_dir, name))
+    fps = float(snapshot.get("project", {}).get("fps") or 30)
+    job = {
+        "fps": fps,
+        "duration": snapshot_duration(snapshot),
+        "quality": quality,
+        "preset": preset,
+        "cache": cache,
+        "segments": [
+            {"index": i, "start": start / fps, "end": end / fps, "file": segment_name(i)}
+            for i, (start, end) in enumerate(plan_segments(snapshot, segment_seconds))
+        ],
+    }
+    with open(os.path.join(job_dir, JOB_SNAPSHOT), "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    # job.json last: its presence tells remote workers the job is ready
+    tmp = os.path.join(job_dir, JOB_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp, os.path.join(job_dir, JOB_FILE))
+    return job
+
+
+def load_job(job_dir: str) -> Tuple[Dict, Dict]:
+    with open(os.path.join(job_dir, JOB_FILE), "r", encoding="utf-8") as f:
+        job = json.load(f)
+    with open(os.path.join(job_dir, JOB_SNAPSHOT), "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    return job, snapshot
+
+
+def _lock_owner() -> str:
+    """Token written into the lock files this thread creates."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _create_lock(lock_path: str) -> bool:
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(_lock_owner())
+    return True
+
+
+def _read_lock(lock_path: str) -> Tuple[str, int]:
+    """Owner token and mtime of a lock file."""
+    with open(lock_path, "r", encoding="utf-8") as f:
+        owner = f.read()
+    return owner, os.stat(lock_path).st_mtime_ns
+
+
+def _claim(lock_path: str) -> bool:
+    """Creates the lock file exclusively; takes over a lock whose owner went quiet.
+
+    Takeover is atomic: the stale lock is hard-linked to a name derived from
+    its owner and mtime, which only one worker can create, and that worker
+    renames its own lock over it. The lock path never goes missing in between,
+    so nobody else can create it meanwhile.
+    """
+    if _create_lock(lock_path):
+        return True
+    try:
+        owner, mtime = _read_lock(lock_path)
+    except FileNotFoundError:
+        return _create_lock(lock_path)
+    if time.time() - mtime / 1e9 < STALE_LOCK:
+        return False
+    marker = f"{lock_path}.{owner.replace(':', '-')}.{mtime}.stale"
+    try:
+        os.link(lock_path, marker)
+    except FileExistsError:
+        return False  # another worker is taking this one over
+    except FileNotFoundError:
+        return _create_lock(lock_path)
+    try:
+        if _read_lock(marker) != (owner, mtime):
+            return False  # the lock changed hands since we looked at it
+        tmp = f"{lock_path}.{_lock_owner().replace(':', '-')}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_lock_owner())
+        os.replace(tmp, lock_path)
+        return True
+    finally:
+        os.remove(marker)
+
+
+def _release(lock_path: str):
+    """Removes the lock only while it is still ours (a stalled worker may have lost it)."""
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            if f.read() != _lock_owner():
+                return
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def _render_cached(job: Dict, plan, target: str, threads: Optional[int] = None) -> bool:
+    """Renders plan to target unless the cache has it; returns True on a cache hit."""
+    key = render_cache.plan_key(plan, job["quality"], job["preset"]) if job.get("cache") else None
+    if key and render_cache.fetch(key, target):
+        return True
+    render(plan, target, job["quality"], job["preset"], threads=threads)
+    if key:
+        render_cache.store(key, target)
+    return False
+
+
+def work(job_dir: str, workers: Optional[int] = None,
+         on_segment: Optional[Callable[[Dict, bool], None]] = None) -> int:
+    """Renders unclaimed segments of a job until none are left; returns how many this call produced.
+
+    Each of the `workers` concurrent ffmpeg processes gets cpu_count / workers
+    encoder threads, so a machine is saturated without oversubscription.
+    on_segment(segment, cached) is called as each segment lands in job_dir.
+    """
+    job, snapshot = load_job(job_dir)
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    held = set()
+    held_lock = threading.Lock()
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT):
+            with held_lock:
+                for path in held:
+                    try:
+                        os.utime(path)
+                    except FileNotFoundError:
+                        pass
+
+    def run(segment: Dict) -> bool:
+        target = os.path.join(job_dir, segment["file"])
+        lock_path = target + ".lock"
+        if os.path.exists(target) or not _claim(lock_path):
+            return False
+        with held_lock:
+            held.add(lock_path)
+        try:
+            cached = False
+            if not os.path.exists(target):
+                plan = compile_snapshot(snapshot, duration=job["duration"],
+                                        start=segment["start"], end=segment["end"], audio=False)
+                cached = _render_cached(job, plan, target, threads)
+            if on_segment:
+                on_segment(segment, cached)
+            return True
+        finally:
+            with held_lock:
+                held.discard(lock_path)
+            _release(lock_path)
+
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(run, job["segments"]))
+    finally:
+        stop.set()
+
+
+def finish(job_dir: str, output: str, workers: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    """Waits for every segment, mixes the audio once and stream-copies everything into output.
+
+    While waiting it keeps calling work(), so segments abandoned by a remote
+    worker are re-rendered here once their lock goes stale.
+    """
+    job, snapshot = load_job(job_dir)
+    deadline = time.monotonic() + timeout if timeout else None
+    missing = job["segments"]
+    while True:
+        missing = [s for s in missing if not os.path.exists(os.path.join(job_dir, s["file"]))]
+        if not missing:
+            break
+        work(job_dir, workers)
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"{len(missing)} segments not rendered: {[s['file'] for s in missing]}")
+        time.sleep(POLL_INTERVAL)
+
+    audio_path = os.path.join(job_dir, AUDIO_FILE)
+    if not os.path.exists(audio_path):
+        _render_cached(job, compile_snapshot(snapshot, duration=job["duration"], video=False), audio_path)
+
+    list_path = os.path.join(job_dir, "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for segment in job["segments"]:
+            f.write(f"file '{segment['file']}'\n")
+
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    tmp_output = f"{output}.{socket.gethostname()}-{os.getpid()}.part{os.path.splitext(output)[1]}"
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path, "-i", audio_path,
+        "-map", "0:v", "-map", "1:a", "-c", "copy", "-movflags", "+faststart", tmp_output,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(tmp_output, output)
+    finally:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+    return output
+
+
+def render_segmented(
+    output: str,
+    snapshot_path: str = SNAPSHOT_FILE,
+    job_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    quality: str = "medium",
+    preset: str = DEFAULT_PRESET,
+    segment_seconds: float = SEGMENT_SECONDS,
+    cache: bool = True,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> str:
+    """Prepares a job, renders segments locally (alongside any remote workers) and joins them.
+
+    Without job_dir a private temporary directory is used and removed afterwards.
+    With cache, unchanged segments are reused from earlier exports.
+    """
+    own_dir = job_dir is None
+    job_dir = job_dir or tempfile.mkdtemp(prefix="aicut_segments_")
+    try:
+        job = prepare_job(job_dir, read_snapshot(snapshot_path), quality, preset, segment_seconds, cache)
+        total = len(job["segments"])
+        done = []
+
+        def report(segment, cached):
+            done.append(cached)
+            if on_progress:
+                on_progress(len(done) / (total + 1))
+
+        work(job_dir, workers, on_segment=report)
+        result = finish(job_dir, output, workers)
+        if cache:
+            render_cache.prune()
+        if on_progress:
+            on_progress(1.0)
+        print(f"\n♻️ Reused {sum(done)} of {total} segments from cache")
+        return result
+    finally:
+        if own_dir:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a snapshot as parallel segments joined without re-encoding")
+    parser.add_argument("-o", "--output", help="output file (required unless --work)")
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE)
+    parser.add_argument("--job-dir", help="job directory (share it to let other machines help)")
+    parser.add_argument("--work", metavar="JOB_DIR", help="only render segments of an existing job")
+    parser.add_argument("--workers", type=int, help="concurrent ffmpeg processes (default: CPU count)")
+    parser.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS)
+    parser.add_argument("--quality", choices=list(QUALITY_CRF), default="medium")
+    parser.add_argument("--preset", choices=X264_PRESETS, default=DEFAULT_PRESET)
+    parser.add_argument("--no-cache", action="store_true", help="re-render every segment")
+    args = parser.parse_args()
+
+    if args.work:
+        count = work(args.work, args.workers,
+                     on_segment=lambda s, cached: print(f"{'♻️' if cached else '✅'} {s['file']}"))
+        print(f"Rendered {count} segments")
+    elif not args.output:
+        parser.error("-o/--output is required")
+    else:
+        started = time.monotonic()
+        result = render_segmented(
+            args.output, args.snapshot, args.job_dir, args.workers, args.quality, args.preset,
+            args.segment_seconds, not args.no_cache, on_progress=lambda f: print(f"\rRendering {f * 100:5.1f}%", end="", flush=True),
+        )
+        print(f"\n✅ Exported: {result} ({time.monotonic() - started:.1f}s)")
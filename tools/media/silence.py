@@ -0,0 +1,176 @@
+"""
+Silence and filler-word detection for voice tracks.
+
+Audio is streamed from ffmpeg at 16 kHz mono and reduced to a 10 ms RMS
+envelope (dBFS) with NumPy. Silence uses two thresholds (hysteresis): a
+frame enters silence below `enter_db` and only leaves it above `exit_db`, so
+breaths and room tone hovering around one threshold do not chop a pause
+into fragments. Each interval is shrunk by `pad` on both sides to keep a
+natural lead-in/out, and intervals shorter than `min_silence` are dropped.
+
+Filler words ("嗯", "呃", "um", ...) come from cached ASR word timings:
+any recogniser can store them with
+
+    analysis_cache.put(path, ASR_WORDS_KEY, [{"text": "嗯", "start": 1.2, "end": 1.5}, ...])
+
+All intervals are in source-file seconds: [[start, end], ...].
+
+Usage:
+    python tools/media/silence.py voice.wav --min-silence 0.6
+"""
+import os
+import re
+import sys
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import analysis_cache
+from media_io import iter_audio_blocks
+
+ANALYSIS_KEY = "silences"
+ASR_WORDS_KEY = "asr_words"
+
+SAMPLE_RATE = 16000
+HOP = 160                  # 10 ms frames
+DB_FLOOR = -100.0
+
+DEFAULT_ENTER_DB = -40.0
+DEFAULT_EXIT_DB = -32.0
+DEFAULT_MIN_SILENCE = 0.6  # seconds
+DEFAULT_PAD = 0.1          # seconds kept on each side of a cut
+
+FILLER_WORDS = {"嗯", "啊", "呃", "额", "唔", "um", "umm", "uh", "uhm", "erm", "hmm", "mm"}
+_PUNCTUATION = re.compile(r"[\s,.!?;:，。！？；：、…~\-\"'“”]+")
+
+
+def rms_envelope(file_path: str, sample_rate: int = SAMPLE_RATE, hop: int = HOP) -> np.ndarray:
+    """Streams the file once and returns one RMS level (dBFS) per `hop` samples."""
+    levels: List[np.ndarray] = []
+    for block in iter_audio_blocks(file_path, sample_rate=sample_rate, channels=1, block_size=hop * 1024):
+        usable = block.size - block.size % hop
+        if usable:
+            frames = block[:usable].reshape(-1, hop)
+            levels.append(np.sqrt(np.mean(frames * frames, axis=1)))
+        if usable < block.size:
+            tail = block[usable:]
+            levels.append(np.sqrt(np.mean(tail * tail, keepdims=True)))
+    if not levels:
+        return np.zeros(0, np.float32)
+    rms = np.concatenate(levels)
+    return np.maximum(20.0 * np.log10(np.maximum(rms, 1e-10)), DB_FLOOR).astype(np.float32)
+
+
+def hysteresis_mask(levels_db: np.ndarray, enter_db: float, exit_db: float) -> np.ndarray:
+    """Boolean silence mask: True once below enter_db, until a frame rises above exit_db.
+
+    Frames between the thresholds inherit the state of the last decisive
+    frame (found with a running max over decisive indices, no Python loop).
+    """
+    quiet = levels_db < enter_db
+    loud = levels_db > exit_db
+    decisive = np.where(quiet | loud, np.arange(levels_db.size), -1)
+    last = np.maximum.accumulate(decisive) if decisive.size else decisive
+    # Leading undecided frames are below exit_db, so they count as silence
+    return np.where(last >= 0, quiet[np.maximum(last, 0)], True)
+
+
+def mask_to_intervals(mask: np.ndarray, frame_seconds: float) -> List[List[float]]:
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [[float(s * frame_seconds), float(e * frame_seconds)] for s, e in zip(starts, ends)]
+
+
+def detect_silences(
+    file_path: str,
+    enter_db: float = DEFAULT_ENTER_DB,
+    exit_db: float = DEFAULT_EXIT_DB,
+    min_silence: float = DEFAULT_MIN_SILENCE,
+    pad: float = DEFAULT_PAD,
+    force: bool = False,
+) -> List[List[float]]:
+    """Returns silence intervals [[start, end], ...] in seconds, using the analysis cache."""
+    params = {"enterDb": enter_db, "exitDb": exit_db, "minSilence": min_silence, "pad": pad}
+
+    def compute():
+        levels = rms_envelope(file_path)
+        intervals = mask_to_intervals(hysteresis_mask(levels, enter_db, exit_db), HOP / float(SAMPLE_RATE))
+        duration = levels.size * HOP / float(SAMPLE_RATE)
+        result = []
+        for start, end in intervals:
+            # No lead-in pad at the very start of the file / lead-out at the end
+            start = start + pad if start > 0 else start
+            end = end - pad if end < duration else end
+            if end - start >= min_silence:
+                result.append([round(start, 3), round(end, 3)])
+        return result
+
+    return analysis_cache.get_or_compute(file_path, ANALYSIS_KEY, compute, params, force=force)
+
+
+def speech_intervals(file_path: str, min_silence: float = 0.5, **kwargs) -> List[List[float]]:
+    """Complement of the silences: where the file has signal. The last interval is open-ended."""
+    intervals, cursor = [], 0.0
+    for start, end in detect_silences(file_path, min_silence=min_silence, pad=0.0, **kwargs):
+        if start > cursor:
+            intervals.append([cursor, start])
+        cursor = end
+    intervals.append([cursor, float("inf")])
+    return intervals
+
+
+def find_fillers(words: List[Dict], fillers=FILLER_WORDS) -> List[List[float]]:
+    """Intervals of ASR words whose text (minus punctuation) is a filler."""
+    result = []
+    for word in words:
+        text = _PUNCTUATION.sub("", str(word.get("text", word.get("word", "")))).lower()
+        if text and (text in fillers or all(ch in fillers for ch in text)):
+            result.append([float(word["start"]), float(word["end"])])
+    return result
+
+
+def cached_fillers(file_path: str) -> List[List[float]]:
+    """Filler intervals from cached ASR word timings ([] if the file has none)."""
+    words = analysis_cache.get(file_path, ASR_WORDS_KEY)
+    return find_fillers(words) if words else []
+
+
+def merge_intervals(intervals: List[List[float]], gap: float = 0.0) -> List[List[float]]:
+    """Sorts and unions intervals (touching or within `gap` seconds)."""
+    merged: List[List[float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def cut_list(file_path: str, include_fillers: bool = True, **kwargs) -> List[List[float]]:
+    """Silences plus (optionally) filler words, merged into one sorted interval list."""
+    intervals = list(detect_silences(file_path, **kwargs))
+    if include_fillers:
+        intervals += cached_fillers(file_path)
+    return merge_intervals(intervals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect silences and filler words")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--enter-db", type=float, default=DEFAULT_ENTER_DB)
+    parser.add_argument("--exit-db", type=float, default=DEFAULT_EXIT_DB)
+    parser.add_argument("--min-silence", type=float, default=DEFAULT_MIN_SILENCE)
+    parser.add_argument("--pad", type=float, default=DEFAULT_PAD)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    for path in args.files:
+        silences = detect_silences(path, args.enter_db, args.exit_db, args.min_silence, args.pad, force=args.force)
+        fillers = cached_fillers(path)
+        total = sum(e - s for s, e in silences)
+        print(f"{path}: {len(silences)} silences ({total:.1f}s), {len(fillers)} fillers")
+        for start, end in silences:
+            print(f"  {start:8.3f} - {end:8.3f}")
@@ -0,0 +1,179 @@
+"""
+Thumbnail sprite sheets and filmstrips for the timeline.
+
+A video is decoded once: ffmpeg's select filter picks the sample frames, scales
+them and pipes raw RGB into NumPy, where they are tiled into one sheet. The
+sheet is written next to a JSON index that maps every tile to its source
+time, so the editor can draw a filmstrip at any zoom from one image.
+
+Results are cached by content hash + parameters under
+materials/_thumbnails/sprites, and many files can be processed in parallel.
+
+Usage:
+    python tools/media/thumbnails.py video1.mp4 video2.mov --interval 2
+    python tools/media/thumbnails.py clip.mp4 --filmstrip 12
+"""
+import os
+import sys
+import json
+import math
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from media_io import THUMBNAILS_DIR, content_hash, probe, iter_video_frames, write_image
+
+SPRITES_DIR = os.path.join(THUMBNAILS_DIR, "sprites")
+SPRITES_URL = "/materials/_thumbnails/sprites"
+INDEX_VERSION = 1
+MAX_FRAMES = 400  # Upper bound per sheet; long videos get a coarser interval
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2.0)) * 2)
+
+
+def generate_sprite(
+    video_path: str,
+    interval: Optional[float] = None,
+    count: Optional[int] = None,
+    tile_width: int = 160,
+    columns: int = 10,
+    out_dir: str = SPRITES_DIR,
+    force: bool = False,
+) -> Dict:
+    """Builds (or loads from cache) a sprite sheet for one video.
+
+    Args:
+        interval: seconds between sampled frames (default 1s)
+        count: sample exactly this many frames evenly across the clip (overrides interval)
+        tile_width: width of each tile in pixels; height keeps the aspect ratio
+        columns: tiles per row (a filmstrip is a single row)
+        force: ignore an existing cached sheet
+
+    Returns:
+        The JSON index: image path/url, tile geometry and per-frame times/offsets.
+    """
+    digest = content_hash(video_path)
+    info = probe(video_path)
+    duration = info["duration"]
+    if not info["has_video"] or duration <= 0:
+        raise ValueError(f"Not a decodable video: {video_path}")
+
+    if count:
+        count = min(count, MAX_FRAMES)
+        interval = duration / count
+    else:
+        interval = interval or 1.0
+        count = max(1, min(int(math.ceil(duration / interval)), MAX_FRAMES))
+        interval = max(interval, duration / count)
+
+    tile_height = _even(tile_width * info["height"] / max(1, info["width"]))
+    tile_width = _even(tile_width)
+    columns = max(1, min(columns, count))
+
+    # count alone does not fix the spacing: it is capped at MAX_FRAMES, so the interval is part of the key
+    key = f"{digest}_{tile_width}w_{count}n_{columns}c_{int(round(interval * 1000))}ms"
+    image_path = os.path.join(out_dir, f"{key}.jpg")
+    index_path = os.path.join(out_dir, f"{key}.json")
+    if not force and os.path.exists(image_path) and os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+
+    rows = int(math.ceil(count / columns))
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+
+    # Keep the first decoded frame of every interval slot, so tile i shows t ~= i * interval
+    filters = (
+        f"select='isnan(prev_selected_t)+gte(floor(t/{interval:.6f})-floor(prev_selected_t/{interval:.6f}),1)'"
+    )
+    frames = []
+    for i, frame in enumerate(iter_video_frames(video_path, tile_width, tile_height, filters=filters)):
+        if i >= count:
+            break
+        row, col = divmod(i, columns)
+        y, x = row * tile_height, col * tile_width
+        sheet[y:y + tile_height, x:x + tile_width] = frame
+        frames.append({"t": round(i * interval, 3), "x": x, "y": y})
+
+    if not frames:
+        raise RuntimeError(f"ffmpeg produced no frames for {video_path}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Trim unused rows when the decoder returned fewer frames than planned
+    used_rows = int(math.ceil(len(frames) / columns))
+    write_image(image_path, sheet[:used_rows * tile_height])
+
+    index = {
+        "version": INDEX_VERSION,
+        "source": os.path.abspath(video_path),
+        "hash": digest,
+        "duration": duration,
+        "interval": interval,
+        "tileWidth": tile_width,
+        "tileHeight": tile_height,
+        "columns": columns,
+        "rows": used_rows,
+        "image": image_path,
+        "url": f"{SPRITES_URL}/{key}.jpg" if os.path.abspath(out_dir) == os.path.abspath(SPRITES_DIR) else None,
+        "frames": frames,
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def generate_filmstrip(video_path: str, count: int = 10, tile_width: int = 160, **kwargs) -> Dict:
+    """A single-row sprite with `count` evenly spaced frames."""
+    return generate_sprite(video_path, count=count, tile_width=tile_width, columns=count, **kwargs)
+
+
+def generate_many(video_paths: Iterable[str], workers: int = 4, **kwargs) -> Dict[str, Dict]:
+    """Generates sprites for many files in parallel.
+
+    Decoding runs inside the ffmpeg subprocesses, so threads are enough to
+    keep several of them busy. Failures are reported as {"error": "..."}.
+    """
+    video_paths = list(video_paths)
+    results = {}
+
+    def run(path):
+        try:
+            return generate_sprite(path, **kwargs)
+        except Exception as e:
+            return {"error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, index in zip(video_paths, pool.map(run, video_paths)):
+            results[path] = index
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate thumbnail sprite sheets in a single decode pass")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--interval", type=float, default=None, help="seconds between frames")
+    parser.add_argument("--filmstrip", type=int, default=None, metavar="N", help="single row of N frames")
+    parser.add_argument("--tile-width", type=int, default=160)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    if args.filmstrip:
+        options = {"count": args.filmstrip, "columns": args.filmstrip}
+    else:
+        options = {"interval": args.interval, "columns": args.columns}
+    results = generate_many(args.files, workers=args.workers, tile_width=args.tile_width, force=args.force, **options)
+    for path, index in results.items():
+        if "error" in index:
+            print(f"❌ {path}: {index['error']}")
+        else:
+            print(f"✅ {path}: {len(index['frames'])} frames -> {index['image']}")
@@ -0,0 +1,213 @@
+"""
+Waveform peak pyramids for audio (and video) assets.
+
+PCM is streamed from ffmpeg and reduced to min/max pairs per
+`samples_per_pixel` block with NumPy. Coarser levels are built by pairwise
+min/max of the level below, so every zoom level is available without
+touching the audio again. Each level is written in audiowaveform's v1 `.dat`
+format (8-bit), which peaks.js and similar renderers read directly:
+
+    materials/_thumbnails/peaks/<content hash>/index.json
+    materials/_thumbnails/peaks/<content hash>/256.dat, 512.dat, ...
+
+attach_waveforms() stores the index URL on matching assets as `waveformUrl`.
+
+Usage:
+    python tools/media/waveform.py podcast.mp3 voice.wav
+    python tools/media/waveform.py --attach      # all audio/video assets in the snapshot
+"""
+import os
+import sys
+import json
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from media_io import THUMBNAILS_DIR, content_hash, iter_audio_blocks
+from snapshot_store import SNAPSHOT_FILE, read_snapshot, update_snapshot
+from asset_paths import resolve_asset
+
+PEAKS_DIR = os.path.join(THUMBNAILS_DIR, "peaks")
+PEAKS_URL = "/materials/_thumbnails/peaks"
+INDEX_VERSION = 1
+
+SAMPLE_RATE = 22050        # Plenty for drawing; halves decode output vs 44.1 kHz
+BASE_SAMPLES_PER_PIXEL = 256
+MIN_LEVEL_LENGTH = 256     # Stop building coarser levels below this many points
+
+DAT_HEADER = struct.Struct("<iIiiI")  # version, flags, sample_rate, samples_per_pixel, length
+DAT_FLAG_8BIT = 1
+
+
+def compute_peaks(
+    file_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    samples_per_pixel: int = BASE_SAMPLES_PER_PIXEL,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Streams the file once and returns (mins, maxs, duration) at the base resolution."""
+    # Blocks are a whole number of pixels, so only the final block leaves a remainder
+    block_size = samples_per_pixel * 1024
+    mins: List[np.ndarray] = []
+    maxs: List[np.ndarray] = []
+    total = 0
+
+    for block in iter_audio_blocks(file_path, sample_rate=sample_rate, channels=1, block_size=block_size):
+        total += block.size
+        usable = block.size - block.size % samples_per_pixel
+        if usable:
+            frames = block[:usable].reshape(-1, samples_per_pixel)
+            mins.append(frames.min(axis=1))
+            maxs.append(frames.max(axis=1))
+        if usable < block.size:
+            tail = block[usable:]
+            mins.append(tail.min(keepdims=True))
+            maxs.append(tail.max(keepdims=True))
+
+    if not mins:
+        return np.zeros(0, np.float32), np.zeros(0, np.float32), 0.0
+    return np.concatenate(mins), np.concatenate(maxs), total / float(sample_rate)
+
+
+def downsample(mins: np.ndarray, maxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Halves the resolution of a peak level (pairwise min/max)."""
+    if mins.size % 2:
+        mins = np.append(mins, mins[-1])
+        maxs = np.append(maxs, maxs[-1])
+    return np.minimum(mins[0::2], mins[1::2]), np.maximum(maxs[0::2], maxs[1::2])
+
+
+def write_dat(path: str, mins: np.ndarray, maxs: np.ndarray, sample_rate: int, samples_per_pixel: int):
+    """Writes one level as an audiowaveform v1 8-bit .dat file."""
+    pairs = np.empty((mins.size, 2), dtype=np.int8)
+    pairs[:, 0] = np.clip(np.round(mins * 127.0), -128, 127)
+    pairs[:, 1] = np.clip(np.round(maxs * 127.0), -128, 127)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(DAT_HEADER.pack(1, DAT_FLAG_8BIT, sample_rate, samples_per_pixel, mins.size))
+        f.write(pairs.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_dat(path: str) -> Dict:
+    """Reads a .dat file back into {"sampleRate", "samplesPerPixel", "mins", "maxs"}."""
+    with open(path, "rb") as f:
+        version, flags, sample_rate, samples_per_pixel, length = DAT_HEADER.unpack(f.read(DAT_HEADER.size))
+        dtype = np.int8 if flags & DAT_FLAG_8BIT else np.dtype("<i2")
+        pairs = np.frombuffer(f.read(), dtype=dtype)[: length * 2].reshape(-1, 2)
+    return {"sampleRate": sample_rate, "samplesPerPixel": samples_per_pixel, "mins": pairs[:, 0], "maxs": pairs[:, 1]}
+
+
+def generate_peaks(file_path: str, out_dir: str = PEAKS_DIR, force: bool = False) -> Dict:
+    """Builds (or loads from cache) the multi-resolution peak files for one media file.
+
+    Returns the index: duration, sample rate and one entry per level with its
+    samples-per-pixel, length, path and URL.
+    """
+    digest = content_hash(file_path)
+    target_dir = os.path.join(out_dir, digest)
+    index_path = os.path.join(target_dir, "index.json")
+    if not force and os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+
+    mins, maxs, duration = compute_peaks(file_path)
+    if not mins.size:
+        raise RuntimeError(f"No audio decoded from {file_path}")
+
+    os.makedirs(target_dir, exist_ok=True)
+    is_default_dir = os.path.abspath(out_dir) == os.path.abspath(PEAKS_DIR)
+    levels = []
+    samples_per_pixel = BASE_SAMPLES_PER_PIXEL
+    while True:
+        dat_path = os.path.join(target_dir, f"{samples_per_pixel}.dat")
+        write_dat(dat_path, mins, maxs, SAMPLE_RATE, samples_per_pixel)
+        levels.append({
+            "samplesPerPixel": samples_per_pixel,
+            "length": int(mins.size),
+            "path": dat_path,
+            "url": f"{PEAKS_URL}/{digest}/{samples_per_pixel}.dat" if is_default_dir else None,
+        })
+        if mins.size < MIN_LEVEL_LENGTH * 2:
+            break
+        mins, maxs = downsample(mins, maxs)
+        samples_per_pixel *= 2
+
+    index = {
+        "version": INDEX_VERSION,
+        "source": os.path.abspath(file_path),
+        "hash": digest,
+        "duration": duration,
+        "sampleRate": SAMPLE_RATE,
+        "levels": levels,
+        "url": f"{PEAKS_URL}/{digest}/index.json" if is_default_dir else None,
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def generate_many(file_paths: List[str], workers: int = 4, **kwargs) -> Dict[str, Dict]:
+    """Generates peaks for many files in parallel; failures map to {"error": "..."}."""
+    def run(path):
+        try:
+            return generate_peaks(path, **kwargs)
+        except Exception as e:
+            return {"error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(file_paths, pool.map(run, file_paths)))
+
+
+def attach_waveforms(snapshot_path: str = SNAPSHOT_FILE, workers: int = 4, asset_ids: Optional[List[str]] = None) -> int:
+    """Generates peaks for audio/video assets and records `waveformUrl` on each asset.
+
+    Returns the number of assets updated. Peak generation happens outside
+    the snapshot lock; only the final asset update is a locked write.
+    """
+    assets = read_snapshot(snapshot_path).get("assets", [])
+    targets = {
+        a["id"]: resolve_asset(a) for a in assets
+        if a.get("type") in ("audio", "video") and (asset_ids is None or a["id"] in asset_ids)
+    }
+    targets = {asset_id: path for asset_id, path in targets.items() if path}
+    results = generate_many(list(set(targets.values())), workers=workers)
+    urls = {
+        asset_id: results[path]["url"] for asset_id, path in targets.items()
+        if results.get(path, {}).get("url")
+    }
+    if not urls:
+        return 0
+
+    def apply(snapshot):
+        for asset in snapshot.get("assets", []):
+            if asset.get("id") in urls:
+                asset["waveformUrl"] = urls[asset["id"]]
+
+    update_snapshot(apply, snapshot_path)
+    return len(urls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute multi-resolution waveform peaks")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--attach", action="store_true", help="process all audio/video assets in the snapshot")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.attach:
+        count = attach_waveforms(workers=args.workers)
+        print(f"✅ waveformUrl set on {count} assets")
+    for path, index in generate_many(args.files, workers=args.workers).items():
+        if "error" in index:
+            print(f"❌ {path}: {index['error']}")
+        else:
+            print(f"✅ {path}: {len(index['levels'])} levels, {index['duration']:.1f}s")
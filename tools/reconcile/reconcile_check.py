@@ -0,0 +1,78 @@
+"""
+Reconcile self-check (temporary workspace, no real materials needed)
+
+Runs reconcile twice over a temporary materials folder and checks that the
+second run keeps what happened in between:
+
+- fields attached by later tools (waveformUrl, proxyPath, proxyUrl) survive
+- a user rename survives, and so does the id of an asset imported by the SDK
+  (timeline elements refer to it by mediaId)
+- a removed material is dropped, assets outside the materials folder stay
+
+Usage:
+    python tools/reconcile/reconcile_check.py
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+from reconcile_with_thumbnails import reconcile
+
+ENRICHMENT = {"waveformUrl": "/materials/_waveforms/v.dat", "proxyPath": "/cache/v.mp4", "proxyUrl": "/proxy/v.mp4"}
+
+
+def check():
+    work_dir = tempfile.mkdtemp(prefix="aicut_reconcile_")
+    materials_dir = os.path.join(work_dir, "materials")
+    snapshot_path = os.path.join(work_dir, "project-snapshot.json")
+    os.makedirs(materials_dir)
+    for name in ("voice.mp3", "gone.mp3"):
+        with open(os.path.join(materials_dir, name), "wb") as f:
+            f.write(os.urandom(4096))
+    outside = {"id": "outside", "name": "linked", "type": "video", "filePath": os.path.join(work_dir, "elsewhere.mp4")}
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump({"assets": [outside]}, f)
+
+    ok = True
+    try:
+        reconcile(snapshot_path, materials_dir, workers=1)
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for asset in data["assets"]:
+            if asset.get("url", "").endswith("/voice.mp3"):
+                asset.update(ENRICHMENT, name="my voice", id="sdk_voice")
+        with open(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.remove(os.path.join(materials_dir, "gone.mp3"))
+
+        reconcile(snapshot_path, materials_dir, workers=1)
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            assets = json.load(f)["assets"]
+        voice = next((a for a in assets if a.get("url", "").endswith("/voice.mp3")), {})
+        kept = {k: voice.get(k) for k in ENRICHMENT}
+        if kept != ENRICHMENT:
+            print(f"❌ Enrichment fields lost on re-run: {kept}")
+            ok = False
+        if voice.get("name") != "my voice":
+            print(f"❌ User rename lost: {voice.get('name')}")
+            ok = False
+        if voice.get("id") != "sdk_voice":
+            print(f"❌ Stored asset id replaced: {voice.get('id')}")
+            ok = False
+        if any(a.get("url", "").endswith("/gone.mp3") for a in assets):
+            print("❌ Removed material still in the snapshot")
+            ok = False
+        if not any(a.get("id") == "outside" for a in assets):
+            print("❌ Asset outside the materials folder was dropped")
+            ok = False
+        if ok:
+            print(f"✅ Re-run kept enrichment fields, id and rename ({len(assets)} assets)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
@@ -1,19 +1,40 @@
 import json
 import os
+import sys
 import uuid
 import cv2
 from PIL import Image
 import numpy as np
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from snapshot_store import SNAPSHOT_FILE, update_snapshot
+from asset_paths import WORKSPACE_ROOT, relative_path
 
 # Paths
-SNAPSHOT_PATH = r"f:\桌面\开发\AIcut\ai_workspace\project-snapshot.json"
-BASE_MATERIALS_DIR = r"f:\桌面\开发\AIcut\AIcut-Studio\apps\web\public\materials"
+SNAPSHOT_PATH = SNAPSHOT_FILE
+BASE_MATERIALS_DIR = os.path.join(WORKSPACE_ROOT, "AIcut-Studio", "apps", "web", "public", "materials")
 THUMBNAILS_DIR = os.path.join(BASE_MATERIALS_DIR, "_thumbnails")
 
-# Ensure thumbnails directory exists
-if not os.path.exists(THUMBNAILS_DIR):
-    os.makedirs(THUMBNAILS_DIR)
+# Per-file scan results keyed by path relative to the materials dir.
+# An entry is reused as long as the file's (size, mtime) is unchanged.
+SCAN_CACHE_NAME = ".reconcile_cache.json"
+SCAN_CACHE_VERSION = 2
+
+# Key config for mapping
+MAPPING = {
+    "ai_gen_1768485094370.jpg": {"name": "赛博街道-背景图", "id": "asset_cyber_img"},
+    "ai_gen_1768486131632.jpg": {"name": "竹林深处-背景图", "id": "asset_bamboo_img"},
+    "grok_video_27146.mp4": {"name": "Grok-赛博视频", "id": "asset_grok_v1"},
+    "v1.mp3": {"name": "语音-赛博街道", "id": "asset_cyber_aud"},
+    "v2.mp3": {"name": "语音-竹林深处", "id": "asset_bamboo_aud"},
+    "scene_cyber.png": {"name": "赛博原画", "id": "asset_cyber_raw"},
+    "scene_bamboo.png": {"name": "竹林原画", "id": "asset_bamboo_raw"},
+    "scene_cyber.mp3": {"name": "背景音-赛博", "id": "asset_cyber_bgm"},
+    "scene_bamboo.mp3": {"name": "背景音-竹林", "id": "asset_bamboo_bgm"},
+    "AI还原纪录片.MP3": {"name": "还原纪录片音频", "id": "asset_documentary_aud"},
+}
 
 def calculate_file_hash(file_path):
     """Generates a stable ID based on file metadata and content head."""
@@ -22,17 +43,17 @@ def calculate_file_hash(file_path):
         # Use size + mtime + first 1MB of content
         hasher = hashlib.sha256()
         hasher.update(str(stat.st_size).encode())
-        
+
         # Read first 1MB and last 1KB inside the same context
         with open(file_path, "rb") as f:
             chunk = f.read(1024 * 1024)
             hasher.update(chunk)
-            
+
             # Optional: Read last 1KB (end of file)
             if stat.st_size > 1024 * 1024:
                 f.seek(-1024, 2)
                 hasher.update(f.read())
-            
+
         return "h_" + hasher.hexdigest()[:12]
     except Exception as e:
         print(f"Hashing error for {file_path}: {e}")
@@ -45,54 +66,66 @@ def get_asset_type(filename):
     if ext in ['.mp3', '.wav', '.ogg', '.m4a']: return 'audio'
     return 'other'
 
-def generate_video_thumbnail(video_path, asset_id):
-    """Generates a thumbnail for a video and returns the relative URL path."""
+def probe_video(video_path, asset_id, thumbnails_dir=THUMBNAILS_DIR):
+    """Opens a video once and returns (thumbnail URL or None, duration or None).
+
+    The thumbnail is only decoded if it does not exist yet; the duration comes
+    from the container metadata of the same capture handle.
+    """
     thumb_filename = f"{asset_id}.jpg"
-    thumb_path = os.path.join(THUMBNAILS_DIR, thumb_filename)
-    
-    # If thumbnail already exists, skip generation
-    if os.path.exists(thumb_path):
-        return f"/materials/_thumbnails/{thumb_filename}"
+    thumb_path = os.path.join(thumbnails_dir, thumb_filename)
+    thumb_url = None
+    duration = None
 
     try:
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             print(f"Error: Could not open video {video_path}")
-            return None
+            return None, None
 
         # Get total frames
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Target frame: 10% or at least 1st second (assume 24fps)
-        target_frame = max(1, min(total_frames // 10, 24))
-        
-        cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
-        ret, frame = cap.read()
-        
-        if ret:
-            # Resize for efficiency (e.g., max width 480px, maintain aspect ratio)
-            height, width = frame.shape[:2]
-            max_w = 480
-            if width > max_w:
-                new_h = int(height * (max_w / width))
-                frame = cv2.resize(frame, (max_w, new_h), interpolation=cv2.INTER_AREA)
-            
-            # Save using OpenCV
-            cv2.imwrite(thumb_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            cap.release()
-            return f"/materials/_thumbnails/{thumb_filename}"
-        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps > 0:
+            duration = total_frames / fps
+
+        # If thumbnail already exists, skip generation
+        if os.path.exists(thumb_path):
+            thumb_url = f"/materials/_thumbnails/{thumb_filename}"
+        else:
+            # Target frame: 10% or at least 1st second (assume 24fps)
+            target_frame = max(1, min(total_frames // 10, 24))
+
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+            ret, frame = cap.read()
+
+            if ret:
+                # Resize for efficiency (e.g., max width 480px, maintain aspect ratio)
+                height, width = frame.shape[:2]
+                max_w = 480
+                if width > max_w:
+                    new_h = int(height * (max_w / width))
+                    frame = cv2.resize(frame, (max_w, new_h), interpolation=cv2.INTER_AREA)
+
+                # Save using OpenCV
+                cv2.imwrite(thumb_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                thumb_url = f"/materials/_thumbnails/{thumb_filename}"
+
         cap.release()
     except Exception as e:
         print(f"Unexpected error generating thumbnail for {video_path}: {e}")
-    
-    return None
 
-def generate_image_thumbnail(image_path, asset_id):
+    return thumb_url, duration
+
+def generate_video_thumbnail(video_path, asset_id):
+    """Generates a thumbnail for a video and returns the relative URL path."""
+    return probe_video(video_path, asset_id)[0]
+
+def generate_image_thumbnail(image_path, asset_id, thumbnails_dir=THUMBNAILS_DIR):
     """Resizes an image for a thumbnail and returns the relative URL path."""
     thumb_filename = f"{asset_id}.jpg"
-    thumb_path = os.path.join(THUMBNAILS_DIR, thumb_filename)
-    
+    thumb_path = os.path.join(thumbnails_dir, thumb_filename)
+
     if os.path.exists(thumb_path):
         return f"/materials/_thumbnails/{thumb_filename}"
 
@@ -105,89 +138,187 @@ def generate_image_thumbnail(image_path, asset_id):
             return f"/materials/_thumbnails/{thumb_filename}"
     except Exception as e:
         print(f"Error generating image thumbnail for {image_path}: {e}")
-    
+
     return None
 
-def reconcile():
-    if not os.path.exists(SNAPSHOT_PATH):
-        print(f"Snapshot not found at {SNAPSHOT_PATH}")
+def scan_file(full_path, asset_id, thumbnails_dir):
+    """Worker: hash, thumbnail and probe a single file. Runs in the process pool."""
+    asset_type = get_asset_type(full_path)
+    fingerprint = calculate_file_hash(full_path)
+    if asset_id is None:
+        asset_id = fingerprint
+
+    entry = {"id": asset_id, "type": asset_type}
+    if fingerprint.startswith("h_"):
+        entry['fingerprint'] = fingerprint
+    if asset_type == 'video':
+        thumb_url, duration = probe_video(full_path, asset_id, thumbnails_dir)
+        if thumb_url: entry['thumbnailUrl'] = thumb_url
+        if duration: entry['duration'] = duration
+    elif asset_type == 'image':
+        thumb_url = generate_image_thumbnail(full_path, asset_id, thumbnails_dir)
+        if thumb_url: entry['thumbnailUrl'] = thumb_url
+    return entry
+
+def load_scan_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == SCAN_CACHE_VERSION:
+            return cache.get("files", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+def save_scan_cache(cache_path, files):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": SCAN_CACHE_VERSION, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def iter_material_files(materials_dir):
+    """Yields (full_path, stat) for every material file, skipping _thumbnails and dotfiles."""
+    stack = [materials_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.name.startswith('.'): continue
+                    if entry.is_dir(follow_symlinks=False):
+                        # Skip the thumbnails dir itself
+                        if entry.name != "_thumbnails":
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+        except OSError as e:
+            print(f"Cannot scan {current}: {e}")
+
+def merge_assets(existing, scanned_assets, materials_dir):
+    """Merges freshly scanned materials into the snapshot's asset list.
+
+    A stored asset that matches a scanned file keeps its id (timeline elements
+    refer to it by mediaId), its thumbnail, every field other tools attached
+    (waveformUrl, proxyPath, ...) and the user's name; only the remaining
+    scanned fields are refreshed. Materials assets whose file is gone are
+    dropped, assets outside the materials folder are left untouched.
+    """
+    materials_root = os.path.normcase(os.path.abspath(materials_dir)) + os.sep
+    materials_rel = relative_path(materials_dir)
+    materials_prefix = os.path.normcase(materials_rel + "/") if materials_rel else None
+
+    def asset_keys(asset):
+        # relativePath survives moving the workspace; filePath matches assets from older snapshots
+        keys = []
+        if asset.get("relativePath"):
+            keys.append(os.path.normcase(asset["relativePath"]))
+        if asset.get("filePath"):
+            keys.append(os.path.normcase(os.path.abspath(asset["filePath"])))
+        return keys
+
+    def in_materials(asset):
+        if materials_prefix and asset.get("relativePath"):
+            return os.path.normcase(asset["relativePath"]).startswith(materials_prefix)
+        file_path = asset.get("filePath")
+        return bool(file_path) and os.path.normcase(os.path.abspath(file_path)).startswith(materials_root)
+
+    by_key = {key: a for a in scanned_assets for key in asset_keys(a)}
+    merged = []
+    seen = set()
+    for asset in existing:
+        match = next((by_key[k] for k in asset_keys(asset) if k in by_key), None)
+        if match is not None:
+            kept = {k: asset[k] for k in ("id", "name", "thumbnailUrl") if asset.get(k)}
+            merged.append({**asset, **match, **kept})
+            seen.add(id(match))
+        elif in_materials(asset):
+            continue  # File was removed from materials
+        else:
+            merged.append(asset)
+    merged.extend(a for a in scanned_assets if id(a) not in seen)
+    return merged
+
+def reconcile(snapshot_path=SNAPSHOT_PATH, materials_dir=BASE_MATERIALS_DIR, workers=None):
+    """Incrementally syncs the snapshot's asset list with the materials folder.
+
+    Files whose (size, mtime) match the scan cache are not re-read. New or
+    changed files are hashed, thumbnailed and probed in a process pool. The
+    result is merged into the existing asset list: assets outside the
+    materials folder are left untouched, and materials assets whose file is
+    gone are dropped.
+    """
+    if not os.path.exists(snapshot_path):
+        print(f"Snapshot not found at {snapshot_path}")
         return
 
-    with open(SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Key config for mapping
-    mapping = {
-        "ai_gen_1768485094370.jpg": {"name": "赛博街道-背景图", "id": "asset_cyber_img"},
-        "ai_gen_1768486131632.jpg": {"name": "竹林深处-背景图", "id": "asset_bamboo_img"},
-        "grok_video_27146.mp4": {"name": "Grok-赛博视频", "id": "asset_grok_v1"},
-        "v1.mp3": {"name": "语音-赛博街道", "id": "asset_cyber_aud"},
-        "v2.mp3": {"name": "语音-竹林深处", "id": "asset_bamboo_aud"},
-        "scene_cyber.png": {"name": "赛博原画", "id": "asset_cyber_raw"},
-        "scene_bamboo.png": {"name": "竹林原画", "id": "asset_bamboo_raw"},
-        "scene_cyber.mp3": {"name": "背景音-赛博", "id": "asset_cyber_bgm"},
-        "scene_bamboo.mp3": {"name": "背景音-竹林", "id": "asset_bamboo_bgm"},
-        "AI还原纪录片.MP3": {"name": "还原纪录片音频", "id": "asset_documentary_aud"},
-    }
-
-    new_assets = []
-    
+    thumbnails_dir = os.path.join(materials_dir, "_thumbnails")
+    os.makedirs(thumbnails_dir, exist_ok=True)
+    cache_path = os.path.join(thumbnails_dir, SCAN_CACHE_NAME)
+    cache = load_scan_cache(cache_path)
+
+    new_cache = {}
+    pending = {}
     print("Scanning materials and generating thumbnails...")
-    for root, dirs, files in os.walk(BASE_MATERIALS_DIR):
-        # Skip the thumbnails dir itself
-        if "_thumbnails" in root: continue
-        
-        for filename in files:
-            if filename.startswith('.'): continue
-            
-            full_path = os.path.join(root, filename)
-            url_path = "/materials" + full_path.split("public\\materials")[1].replace("\\", "/")
-            asset_type = get_asset_type(filename)
-            
-            # Determine ID based on Content Hash
-            if filename in mapping:
-                asset_id = mapping[filename]['id']
-                asset_name = mapping[filename]['name']
-            else:
-                asset_id = calculate_file_hash(full_path)
-                asset_name = filename
-            
-            asset = {
-                "id": asset_id,
-                "name": asset_name,
-                "type": asset_type,
-                "url": url_path,
-                "filePath": full_path,
-                "isLinked": True
-            }
+    for full_path, stat in iter_material_files(materials_dir):
+        rel_path = os.path.relpath(full_path, materials_dir)
+        cached = cache.get(rel_path)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime") == stat.st_mtime_ns:
+            new_cache[rel_path] = cached
+        else:
+            pending[rel_path] = (full_path, stat)
 
-            # Generate Thumbnails
-            if asset_type == 'video':
-                thumb_url = generate_video_thumbnail(full_path, asset_id)
-                if thumb_url: asset['thumbnailUrl'] = thumb_url
-                
-                # Get video duration (optional but helpful)
+    if pending:
+        print(f"  {len(new_cache)} unchanged, {len(pending)} new or modified")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                rel_path: pool.submit(
+                    scan_file, full_path,
+                    MAPPING.get(os.path.basename(full_path), {}).get("id"),
+                    thumbnails_dir,
+                )
+                for rel_path, (full_path, _) in pending.items()
+            }
+            for rel_path, future in futures.items():
+                stat = pending[rel_path][1]
                 try:
-                    cap = cv2.VideoCapture(full_path)
-                    fps = cap.get(cv2.CAP_PROP_FPS)
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    if fps > 0:
-                        asset['duration'] = frame_count / fps
-                    cap.release()
-                except: pass
-
-            elif asset_type == 'image':
-                thumb_url = generate_image_thumbnail(full_path, asset_id)
-                if thumb_url: asset['thumbnailUrl'] = thumb_url
-                
-            new_assets.append(asset)
-
-    data['assets'] = new_assets
-
-    with open(SNAPSHOT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    print(f"Reconciliation successful. Total assets: {len(new_assets)}")
+                    entry = future.result()
+                except Exception as e:
+                    print(f"Failed to scan {rel_path}: {e}")
+                    continue
+                entry.update({"size": stat.st_size, "mtime": stat.st_mtime_ns})
+                new_cache[rel_path] = entry
+    else:
+        print(f"  {len(new_cache)} files unchanged, nothing to rescan")
+
+    save_scan_cache(cache_path, new_cache)
+
+    scanned_assets = []
+    for rel_path, entry in new_cache.items():
+        full_path = os.path.join(materials_dir, rel_path)
+        filename = os.path.basename(rel_path)
+        asset = {
+            "id": entry["id"],
+            "name": MAPPING.get(filename, {}).get("name", filename),
+            "type": entry["type"],
+            "url": "/materials/" + rel_path.replace(os.sep, "/"),
+            "filePath": full_path,
+            "fileSize": entry["size"],
+            "isLinked": True
+        }
+        rel_to_root = relative_path(full_path)
+        if rel_to_root:
+            asset["relativePath"] = rel_to_root
+        for key in ("thumbnailUrl", "duration", "fingerprint"):
+            if key in entry:
+                asset[key] = entry[key]
+        scanned_assets.append(asset)
+
+    def apply(data):
+        data['assets'] = merge_assets(data.get('assets', []), scanned_assets, materials_dir)
+
+    data = update_snapshot(apply, snapshot_path)
+
+    print(f"Reconciliation successful. Total assets: {len(data['assets'])}")
 
 if __name__ == "__main__":
     reconcile()
@@ -0,0 +1,120 @@
+"""
+录屏 A/V 同步自检
+
+用合成画面代替桌面采集：脚本按真实时间向 ffmpeg 管道写入 30fps 黑帧，
+在若干时刻写入一帧白帧并同时触发一次点击事件。录制结束后解码视频找到
+白帧的实际帧号，与 apply_smart_zoom.event_frame() 从事件日志 (含 sync 偏移)
+算出的帧号比较，误差应不超过 1 帧；同时检查 camera_targets() (build_camera_path
+的输入) 给出的镜头目标时间加上 LEAD_TIME 后落在同一帧。
+
+ffmpeg 的管道输入使用 -use_wallclock_as_timestamps，与 gdigrab 一样给第一帧
+打墙钟时间戳；写第一帧前的等待 (--startup-delay) 模拟采集设备的启动延迟。
+
+用法:
+    python tools/recording/av_sync_check.py [--startup-delay 0.6]
+"""
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils"))
+from event_log import EventRecorder, start_capture
+from apply_smart_zoom import LEAD_TIME, ZOOM_SCALE, camera_targets, event_frame
+
+WIDTH, HEIGHT, FPS = 64, 36, 30
+MARKERS = [1.0, 1.9, 2.7, 3.3]  # 相对第一帧的秒数
+DURATION = 4.0
+
+
+def record_synthetic(video_path, events_path, startup_delay):
+    cmd = [
+        "ffmpeg", "-y", "-use_wallclock_as_timestamps", "1",
+        "-f", "rawvideo", "-pix_fmt", "gray", "-s", f"{WIDTH}x{HEIGHT}", "-framerate", str(FPS), "-i", "pipe:0",
+        "-vsync", "cfr", "-r", str(FPS), "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", video_path,
+    ]
+    recorder = EventRecorder(events_path, screen=(WIDTH, HEIGHT), move_hz=0)
+    process = start_capture(cmd, recorder, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+
+    black = bytes(WIDTH * HEIGHT)
+    white = bytes([255]) * (WIDTH * HEIGHT)
+    marker_frames = {round(t * FPS) for t in MARKERS}
+
+    time.sleep(startup_delay)
+    first = time.perf_counter()
+    for index in range(int(DURATION * FPS)):
+        # 按真实时间节奏写帧
+        delay = first + index / FPS - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if index in marker_frames:
+            recorder.on_click(WIDTH // 2, HEIGHT // 2)
+            process.stdin.write(white)
+        else:
+            process.stdin.write(black)
+        process.stdin.flush()
+
+    process.stdin.close()
+    process.wait()
+    recorder.stop()
+    return process.returncode
+
+
+def white_frames(video_path):
+    cmd = ["ffmpeg", "-v", "error", "-i", video_path, "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"]
+    raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+    size = WIDTH * HEIGHT
+    frames = []
+    for index in range(len(raw) // size):
+        block = raw[index * size:(index + 1) * size]
+        if sum(block[::97]) / len(block[::97]) > 128:
+            frames.append(index)
+    return frames
+
+
+def check(startup_delay=0.6):
+    work_dir = tempfile.mkdtemp(prefix="aicut_avsync_")
+    video_path = os.path.join(work_dir, "synthetic.mp4")
+    events_path = os.path.join(work_dir, "synthetic_events.jsonl")
+
+    if record_synthetic(video_path, events_path, startup_delay) != 0:
+        print(f"❌ ffmpeg 录制失败 (产物保留在 {work_dir})")
+        return False
+
+    with open(events_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    sync = next((r for r in records if r["type"] == "sync"), None)
+    clicks = [r["time"] for r in records if r["type"] == "click"]
+    actual = white_frames(video_path)
+    offset = sync["firstFrameOffset"] if sync else 0.0
+
+    # 镜头路径实际使用的目标时间 (每次点击一个放大目标，点击间隔小于 idle_timeout)
+    zoom_times = [t for t, _, _, scale in camera_targets(records, 1.5, ZOOM_SCALE, FPS) if scale == ZOOM_SCALE]
+
+    print(f"sync: {sync}")
+    ok = len(actual) == len(clicks) == len(MARKERS) == len(zoom_times)
+    for event_time, frame, zoom_time in zip(clicks, actual, zoom_times):
+        synced = event_frame(event_time, offset, FPS)
+        naive = event_frame(event_time, 0.0, FPS)
+        camera = round((zoom_time + LEAD_TIME) * FPS)
+        status = "✅" if abs(synced - frame) <= 1 and camera == synced else "❌"
+        ok = ok and abs(synced - frame) <= 1 and camera == synced
+        print(f"{status} 事件 {event_time:.3f}s -> 帧 {synced} (镜头 {camera}，实际 {frame}，未对齐时 {naive})")
+
+    if ok:
+        print("✅ A/V 同步正常")
+        shutil.rmtree(work_dir, ignore_errors=True)
+    else:
+        print(f"❌ A/V 同步异常 (产物保留在 {work_dir})")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="录屏事件与视频帧对齐自检")
+    parser.add_argument("--startup-delay", type=float, default=0.6, help="模拟采集设备启动延迟 (秒)")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.startup_delay) else 1)
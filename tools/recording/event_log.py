@@ -0,0 +1,303 @@
+"""
+录屏行为事件日志 - 低开销采集
+
+输入钩子 (pynput 回调) 上只做一件事：把 (perf_counter_ns, 类型, x, y) 写入预分配的
+环形缓冲区。归一化、JSON 序列化和写盘都在后台线程完成，按 flush_interval 追加
+到 JSONL 文件，录制中途崩溃也只会丢失最后一个刷新周期内的事件。
+
+日志格式 (每行一个 JSON):
+    {"type": "header", "version": 1, "screen": [1920, 1080], "clock": "perf_counter_ns", "originNs": ..., "originWallNs": ...}
+    {"type": "sync", "firstFrameOffset": 0.412, "source": "ffmpeg-start"}
+    {"type": "click", "time": 1.234, "x": 0.512, "y": 0.301}
+    {"type": "input", "time": 1.502, "x": 0.512, "y": 0.301}
+    {"type": "move",  "time": 1.533, "x": 0.515, "y": 0.299}
+
+time 为相对 originNs (录屏 ffmpeg 启动时刻) 的秒数。ffmpeg 启动到采集第一帧之间
+还有一段延迟，start_capture() 从 ffmpeg 输出的输入流 start 时间戳 (gdigrab/x11grab
+等设备使用墙钟时间) 算出第一帧相对原点的偏移，写入 sync 记录：
+
+    视频内时间 = time - firstFrameOffset
+
+sync 记录总是写在所有输入事件之前 (等待期间事件留在缓冲区)，读取方可以流式处理。
+等待超过 SYNC_TIMEOUT 后事件照常写出；此后才到达的 sync 先追加在末尾，
+stop() 时把它移到日志头之后，保证关闭后的文件仍然满足这一顺序。
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+import subprocess
+from functools import lru_cache
+
+LOG_VERSION = 1
+DEFAULT_CAPACITY = 16384
+DEFAULT_MOVE_HZ = 30
+DEFAULT_FLUSH_INTERVAL = 0.25
+SYNC_TIMEOUT = 10.0  # 等待 ffmpeg 第一帧时间戳的最长秒数，超时后不再阻塞写盘
+
+EVENT_CLICK = 0
+EVENT_INPUT = 1
+EVENT_MOVE = 2
+EVENT_NAMES = {EVENT_CLICK: "click", EVENT_INPUT: "input", EVENT_MOVE: "move"}
+
+
+@lru_cache(maxsize=1)
+def get_display_geometry():
+    """主显示器分辨率 (只查询一次)"""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            user32 = ctypes.windll.user32
+            user32.SetProcessDPIAware()
+            return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+        except Exception:
+            pass
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        return root.winfo_screenwidth(), root.winfo_screenheight()
+    finally:
+        root.destroy()
+
+
+def events_path_for(video_path):
+    return os.path.splitext(video_path)[0] + "_events.jsonl"
+
+
+class EventRecorder:
+    """环形缓冲 + 后台写盘的事件记录器
+
+    用法:
+        recorder = EventRecorder(events_path)
+        recorder.start(origin_ns)          # 录屏进程启动时刻
+        mouse.Listener(on_click=recorder.on_click, on_move=recorder.on_move)
+        keyboard.Listener(on_press=recorder.on_press)
+        ...
+        recorder.stop()
+    """
+
+    def __init__(self, path, move_hz=DEFAULT_MOVE_HZ, capacity=DEFAULT_CAPACITY,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, screen=None):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.move_interval_ns = int(1e9 / move_hz) if move_hz else None
+        self.screen = screen or get_display_geometry()
+        self.origin_ns = None
+        self.sync_offset = None
+        self._late_sync = False
+        self.dropped = 0
+        self.count = 0
+
+        # 预分配的槽位，head 为下一个写入位置，size 为未写盘的事件数
+        self._times = [0] * capacity
+        self._kinds = [0] * capacity
+        self._xs = [0] * capacity
+        self._ys = [0] * capacity
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()        # 只保护缓冲区，写盘时不持有
+        self._file_lock = threading.Lock()
+
+        self._last_pos = (self.screen[0] // 2, self.screen[1] // 2)
+        self._last_move_ns = 0
+        self._stop = threading.Event()
+        self._synced = threading.Event()
+        self._thread = None
+        self._file = None
+
+    # --- 生命周期 ---
+
+    def start(self, origin_ns=None, origin_wall_ns=None, wait_for_sync=False):
+        """写入日志头并启动后台写盘线程
+
+        Args:
+            origin_ns: 时间原点 (perf_counter_ns)，默认为当前时刻
+            origin_wall_ns: 同一时刻的墙钟时间 (time_ns)，用于和 ffmpeg 时间戳对齐
+            wait_for_sync: 在 set_sync() 之前暂缓写出输入事件 (最多 SYNC_TIMEOUT 秒)
+        """
+        self.origin_ns = origin_ns if origin_ns is not None else time.perf_counter_ns()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.write_record({
+            "type": "header",
+            "version": LOG_VERSION,
+            "screen": list(self.screen),
+            "clock": "perf_counter_ns",
+            "originNs": self.origin_ns,
+            "originWallNs": origin_wall_ns,
+        })
+        if not wait_for_sync:
+            self._synced.set()
+        self._thread = threading.Thread(target=self._flush_loop, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写出剩余事件"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._file:
+            self._flush()
+            self._file.close()
+            self._file = None
+            if self._late_sync:
+                self._move_sync_first()
+
+    def set_sync(self, offset, source="ffmpeg-start"):
+        """记录视频第一帧相对时间原点的偏移 (秒)，之后开始写出输入事件
+
+        超时后才到达 (已有事件写出) 的 sync 先追加在末尾，stop() 时移到事件之前。
+        """
+        if self._synced.is_set() and self.sync_offset is not None:
+            return
+        self.sync_offset = offset
+        record = {"type": "sync", "firstFrameOffset": round(offset, 4), "source": source}
+        with self._file_lock:
+            if self.count:
+                self._late_sync = True
+                print(f"⚠️ sync 晚于 {SYNC_TIMEOUT:g} 秒超时到达，已写出 {self.count} 个事件，停止录制时重排日志")
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        self._synced.set()
+
+    def write_record(self, record):
+        """追加一条非输入类记录 (日志头、同步信息等)，立即落盘"""
+        with self._file_lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    # --- 输入钩子: 只写缓冲区 ---
+
+    def _push(self, kind, x, y, now_ns):
+        with self._lock:
+            if self._size == self.capacity:
+                # 缓冲区满 (写盘线程跟不上)：丢弃最旧的事件
+                self.dropped += 1
+                self._size -= 1
+            i = self._head
+            self._times[i] = now_ns
+            self._kinds[i] = kind
+            self._xs[i] = x
+            self._ys[i] = y
+            self._head = (i + 1) % self.capacity
+            self._size += 1
+
+    def on_click(self, x, y, button=None, pressed=True):
+        if pressed:
+            self._last_pos = (x, y)
+            self._push(EVENT_CLICK, x, y, time.perf_counter_ns())
+
+    def on_press(self, key=None):
+        # 键盘输入的位置取当前鼠标位置 (通常是输入框)
+        x, y = self._last_pos
+        self._push(EVENT_INPUT, x, y, time.perf_counter_ns())
+
+    def on_move(self, x, y):
+        self._last_pos = (x, y)
+        if self.move_interval_ns is None:
+            return
+        now_ns = time.perf_counter_ns()
+        if now_ns - self._last_move_ns >= self.move_interval_ns:
+            self._last_move_ns = now_ns
+            self._push(EVENT_MOVE, x, y, now_ns)
+
+    # --- 后台写盘 ---
+
+    def _drain(self):
+        with self._lock:
+            size = self._size
+            start = (self._head - size) % self.capacity
+            indices = [(start + k) % self.capacity for k in range(size)]
+            batch = [(self._times[i], self._kinds[i], self._xs[i], self._ys[i]) for i in indices]
+            self._size = 0
+        return batch
+
+    def _flush(self):
+        batch = self._drain()
+        if not batch:
+            return
+        width, height = self.screen
+        lines = []
+        for t_ns, kind, x, y in batch:
+            lines.append(json.dumps({
+                "type": EVENT_NAMES[kind],
+                "time": round((t_ns - self.origin_ns) / 1e9, 4),
+                "x": round(x / width, 4),
+                "y": round(y / height, 4),
+            }))
+        with self._file_lock:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            self.count += len(batch)
+
+    def _move_sync_first(self):
+        """把迟到的 sync 记录移到日志头之后 (两遍流式读取，原子替换)"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            sync_line = next((line for line in f if line.startswith('{"type": "sync"')), None)
+        if sync_line is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(self.path, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            dst.write(src.readline())
+            dst.write(sync_line)
+            for line in src:
+                if line != sync_line:
+                    dst.write(line)
+        os.replace(tmp_path, self.path)
+        self._late_sync = False
+
+    def _flush_loop(self):
+        started = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            if not self._synced.is_set():
+                if time.monotonic() - started < SYNC_TIMEOUT:
+                    continue
+                self._synced.set()
+            self._flush()
+
+
+_START_RE = re.compile(r"\bstart:\s*(-?\d+(?:\.\d+)?)")
+
+
+def start_capture(cmd, recorder, log_path=None, **popen_kwargs):
+    """启动录屏 ffmpeg 并把事件时钟与其第一帧对齐
+
+    时间原点取 Popen 之前的时刻；后台线程读取 ffmpeg stderr，解析输入流的
+    start 时间戳 (墙钟秒) 后调用 recorder.set_sync()。对 testsrc 这类非墙钟时间戳
+    的输入无法对齐，偏移记为 0。stderr 会被持续读取 (可选写入 log_path)，
+    避免管道写满阻塞 ffmpeg。
+
+    Returns:
+        subprocess.Popen
+    """
+    origin_wall_ns = time.time_ns()
+    origin_ns = time.perf_counter_ns()
+    process = subprocess.Popen(cmd, stderr=subprocess.PIPE, **popen_kwargs)
+    recorder.start(origin_ns, origin_wall_ns=origin_wall_ns, wait_for_sync=True)
+
+    def read_stderr():
+        log = open(log_path, "w", encoding="utf-8") if log_path else None
+        try:
+            for raw in process.stderr:
+                line = raw.decode("utf-8", errors="replace")
+                if log:
+                    log.write(line)
+                if recorder.sync_offset is None:
+                    match = _START_RE.search(line)
+                    if match and "Duration" in line:
+                        start = float(match.group(1))
+                        # 墙钟时间戳 (秒) 远大于 1e9；否则不是墙钟时间，无法对齐
+                        if start > 1e9:
+                            recorder.set_sync(start - origin_wall_ns / 1e9)
+                        else:
+                            recorder.set_sync(0.0, source="unsynced")
+        finally:
+            if log:
+                log.close()
+
+    threading.Thread(target=read_stderr, name="ffmpeg-stderr", daemon=True).start()
+    return process
@@ -1,12 +1,11 @@
 import tkinter as tk
 from tkinter import messagebox
-import threading
 import subprocess
 import time
 import os
-import json
 import sys
 from pynput import mouse, keyboard
+from event_log import EventRecorder, events_path_for, start_capture
 
 class RecordingController:
     def __init__(self, output_path):
@@ -14,12 +13,10 @@ class RecordingController:
         os.makedirs(os.path.dirname(abs_output), exist_ok=True)
         
         self.output_path = abs_output
-        self.events_path = abs_output.replace(".mp4", "_events.json")
+        self.events_path = events_path_for(abs_output)
         self.is_recording = False
-        self.start_time = 0
-        self.events = []
+        self.recorder = None
         self.process = None
-        self.last_mouse_pos = (0.5, 0.5)
         
         # UI
         self.root = tk.Tk()
@@ -37,38 +34,6 @@ class RecordingController:
         self.stop_btn = tk.Button(self.root, text="🛑 Stop & Save", command=self.stop_recording, 
                                  bg="#f44336", fg="white", width=20, height=2, state=tk.DISABLED)
         self.stop_btn.pack(pady=5)
-        
-        self.screen_width = self.root.winfo_screenwidth()
-        self.screen_height = self.root.winfo_screenheight()
-
-    def update_mouse_pos(self, x, y):
-        self.last_mouse_pos = (round(x / self.screen_width, 3), round(y / self.screen_height, 3))
-
-    def on_click(self, x, y, button, pressed):
-        if self.is_recording and pressed:
-            self.update_mouse_pos(x, y)
-            rel_time = time.time() - self.start_time
-            self.events.append({
-                "type": "click",
-                "time": round(rel_time, 3),
-                "x": self.last_mouse_pos[0],
-                "y": self.last_mouse_pos[1]
-            })
-
-    def on_press(self, key):
-        if self.is_recording:
-            rel_time = time.time() - self.start_time
-            # 输入时，坐标采用当前的鼠标位置（通常是输入框所在位置）
-            self.events.append({
-                "type": "input",
-                "time": round(rel_time, 3),
-                "x": self.last_mouse_pos[0],
-                "y": self.last_mouse_pos[1]
-            })
-
-    def on_move(self, x, y):
-        if self.is_recording:
-            self.update_mouse_pos(x, y)
 
     def start_countdown(self):
         self.start_btn.config(state=tk.DISABLED)
@@ -80,26 +45,23 @@ class RecordingController:
 
     def start_actual_recording(self):
         self.is_recording = True
-        self.start_time = time.time()
-        self.events = []
         self.status_label.config(text="● RECORDING ACTION", fg="red")
         self.stop_btn.config(state=tk.NORMAL)
-        
-        self.m_listener = mouse.Listener(on_click=self.on_click, on_move=self.on_move)
-        self.k_listener = keyboard.Listener(on_press=self.on_press)
-        self.m_listener.start()
-        self.k_listener.start()
-        
-        threading.Thread(target=self.run_ffmpeg, daemon=True).start()
 
-    def run_ffmpeg(self):
+        # 先启动 ffmpeg，事件时间与其第一帧对齐
         cmd = [
             'ffmpeg', '-y', '-f', 'gdigrab', '-framerate', '30',
             '-i', 'desktop', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
             '-crf', '20', self.output_path
         ]
-        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
-        self.process.wait()
+        self.recorder = EventRecorder(self.events_path)
+        self.process = start_capture(cmd, self.recorder, stdin=subprocess.PIPE)
+
+        # 钩子直接写入事件缓冲区，不做任何 UI 操作
+        self.m_listener = mouse.Listener(on_click=self.recorder.on_click, on_move=self.recorder.on_move)
+        self.k_listener = keyboard.Listener(on_press=self.recorder.on_press)
+        self.m_listener.start()
+        self.k_listener.start()
 
     def stop_recording(self):
         if not self.is_recording: return
@@ -118,10 +80,9 @@ class RecordingController:
             except:
                 self.process.kill()
             
-        with open(self.events_path, "w") as f:
-            json.dump(self.events, f, indent=4)
+        self.recorder.stop()
             
-        messagebox.showinfo("Success", f"Capture Done!\n{len(self.events)} interactions recorded.")
+        messagebox.showinfo("Success", f"Capture Done!\n{self.recorder.count} interactions recorded.")
         self.root.destroy()
 
     def run(self):
@@ -1,76 +1,39 @@
-
 import subprocess
 import time
 import os
 import sys
-import json
 from pynput import mouse, keyboard
-from threading import Thread
-import tkinter as tk
-
-# 记录点击和按键事件
-events = []
-start_time = 0
-
-def on_click(x, y, button, pressed):
-    if pressed:
-        rel_time = time.time() - start_time
-        # 获取屏幕尺寸用于归一化
-        root = tk.Tk()
-        screen_width = root.winfo_screenwidth()
-        screen_height = root.winfo_screenheight()
-        root.destroy()
-        
-        events.append({
-            "type": "click",
-            "time": round(rel_time, 3),
-            "x": round(x / screen_width, 3),
-            "y": round(y / screen_height, 3)
-        })
-        print(f"🖱️ Click at ({x}, {y}) at {rel_time:.2f}s")
+from event_log import EventRecorder, events_path_for, start_capture
 
-def on_press(key):
-    rel_time = time.time() - start_time
-    events.append({
-        "type": "keypress",
-        "time": round(rel_time, 3)
-    })
-    # print(f"⌨️ Key pressed at {rel_time:.2f}s")
-
-def record_logic(duration, output_path):
-    global start_time
+def record_logic(duration, output_path, move_hz=30):
     print(f"🎬 准备录制桌面 + 行为...")
     print(f"⏳ 请在 5 秒内切换到录制窗口...")
     time.sleep(5)
     
-    start_time = time.time()
-    
-    # 启动事件监听
-    mouse_listener = mouse.Listener(on_click=on_click)
-    key_listener = keyboard.Listener(on_press=on_press)
-    mouse_listener.start()
-    key_listener.start()
-    
-    # 启动 FFmpeg 录屏
+    # 启动 FFmpeg 录屏，事件时间与其第一帧对齐
     cmd = [
         'ffmpeg', '-y', '-f', 'gdigrab', '-framerate', '30',
         '-i', 'desktop', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
         '-t', str(duration), output_path
     ]
+    recorder = EventRecorder(events_path_for(output_path), move_hz=move_hz)
+    process = start_capture(cmd, recorder, stdout=subprocess.DEVNULL)
+    
+    # 启动事件监听 (回调只写入缓冲区，由后台线程追加写盘)
+    mouse_listener = mouse.Listener(on_click=recorder.on_click, on_move=recorder.on_move)
+    key_listener = keyboard.Listener(on_press=recorder.on_press)
+    mouse_listener.start()
+    key_listener.start()
     
     print(f"🔴 录制中... 请开始你的操作！")
-    subprocess.run(cmd, capture_output=True)
+    process.wait()
     
-    # 停止监听
+    # 停止监听并写出剩余事件
     mouse_listener.stop()
     key_listener.stop()
+    recorder.stop()
     
-    # 保存行为数据
-    data_path = output_path.replace(".mp4", "_events.json")
-    with open(data_path, "w") as f:
-        json.dump(events, f, indent=4)
-    
-    print(f"✅ 录制完成！视频: {output_path}, 行为数据: {data_path}")
+    print(f"✅ 录制完成！视频: {output_path}, 行为数据: {recorder.path} ({recorder.count} 个事件)")
 
 if __name__ == "__main__":
     path = sys.argv[1] if len(sys.argv) > 1 else "remotion-studio/public/assets/projects/promo/pro_demo.mp4"
@@ -1,5 +1,9 @@
-import json
 import time
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
+from snapshot_store import read_snapshot, write_snapshot, get_revision
 
 SNAPSHOT_PATH = "ai_workspace/project-snapshot.json"
 TARGET_ELEMENT_ID = "el_panda_1768554094"
@@ -9,8 +13,8 @@ NEW_ASSET_URL = "/materials/images/scene_bamboo.png"
 
 def replace_clip():
     print(f"Reading snapshot...")
-    with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-        snapshot = json.load(f)
+    snapshot = read_snapshot(SNAPSHOT_PATH)
+    base_revision = get_revision(snapshot)
 
     # 1. 查找或注册新素材
     assets = snapshot.get("assets", [])
@@ -54,8 +58,7 @@ def replace_clip():
 
     if replaced:
         print("Saving snapshot...")
-        with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
-            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        write_snapshot(snapshot, SNAPSHOT_PATH, expected_revision=base_revision)
         print("Done! Element replaced.")
     else:
         print(f"Error: Element {TARGET_ELEMENT_ID} not found.")
@@ -1,6 +1,9 @@
 
-import json
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
+from snapshot_store import read_snapshot, write_snapshot, get_revision
 
 SNAPSHOT_PATH = os.path.join(os.getcwd(), "ai_workspace", "project-snapshot.json")
 TARGET_ELEMENT_ID = "df570d75-7ee3-4a53-92d1-d27ab59697d3"
@@ -15,8 +18,8 @@ def replace_with_image():
         return
 
     try:
-        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-            snapshot = json.load(f)
+        snapshot = read_snapshot(SNAPSHOT_PATH)
+        base_revision = get_revision(snapshot)
     except Exception as e:
         print(f"Error reading snapshot: {e}")
         return
@@ -50,8 +53,7 @@ def replace_with_image():
 
     if found:
         try:
-            with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
-                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            write_snapshot(snapshot, SNAPSHOT_PATH, expected_revision=base_revision)
             print("Successfully replaced element with test image.")
         except Exception as e:
             print(f"Error saving snapshot: {e}")
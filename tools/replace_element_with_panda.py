@@ -1,7 +1,10 @@
 
-import json
 import os
 import time
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
+from snapshot_store import read_snapshot, write_snapshot, get_revision
 
 SNAPSHOT_PATH = os.path.join(os.getcwd(), "ai_workspace", "project-snapshot.json")
 IMAGE_REL_PATH = "/materials/images/panda_test.jpg"
@@ -18,8 +21,8 @@ def replace_panda():
         return
 
     try:
-        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-            snapshot = json.load(f)
+        snapshot = read_snapshot(SNAPSHOT_PATH)
+        base_revision = get_revision(snapshot)
     except Exception as e:
         print(f"Error reading snapshot: {e}")
         return
@@ -66,8 +69,7 @@ def replace_panda():
     
     if found:
         try:
-            with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
-                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            write_snapshot(snapshot, SNAPSHOT_PATH, expected_revision=base_revision)
             print("Successfully replaced element with Panda image.")
         except Exception as e:
             print(f"Error saving snapshot: {e}")
@@ -0,0 +1,161 @@
+"""
+下载管理器自检 (不需要网络)
+
+启动一个支持 Range / If-Range 的本地 HTTP 服务，用临时目录里的登记表下载随机内容的文件，检查：
+
+- 下载中途连接断开后，重试用 Range 从 .part 末尾续传，结果与服务端文件逐字节一致
+- 中断期间服务端文件变了 (ETag 不同) 时，If-Range 让服务器返回整个新文件，从头下载
+- 同一 URL 再次下载直接复用 (不发请求)，不同 URL 的相同内容硬链接到已有文件
+
+用法:
+    python tools/scrapers/download_check.py [--size-mb 4]
+"""
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from download_manager import DownloadManager
+
+
+def _etag(data: bytes) -> str:
+    return '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+
+
+class RangeStubHandler(BaseHTTPRequestHandler):
+    """GET /<name>：支持 Range (bytes=N-) 和 If-Range；文件内容在 server.files"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        name = self.path.lstrip("/")
+        with server.lock:
+            data = server.files.get(name)
+            server.requests.append((name, self.headers.get("Range"), self.headers.get("If-Range")))
+        if data is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if range_header.startswith("bytes=") and (if_range is None or if_range == _etag(data)):
+            start = int(range_header[len("bytes="):].split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", _etag(data))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        with server.lock:
+            cut = server.cut_once.pop(name, None)
+        if cut is None:
+            self.wfile.write(body)
+            return
+        # 模拟中途断线：只发一部分就关闭连接
+        self.wfile.write(body[:cut])
+        self.wfile.flush()
+        self.close_connection = True
+        with server.lock:
+            if name in server.replace_after_cut:
+                server.files[name] = server.replace_after_cut.pop(name)
+
+
+def serve_stub(files):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeStubHandler)
+    server.files = dict(files)
+    server.cut_once = {}           # name -> 第一次响应只发送的字节数
+    server.replace_after_cut = {}  # name -> 断线后服务端换成的新内容
+    server.requests = []           # (name, Range, If-Range)
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _same_content(path, data: bytes) -> bool:
+    with open(path, "rb") as f:
+        return f.read() == data
+
+
+def check(size_mb=4):
+    work_dir = tempfile.mkdtemp(prefix="aicut_download_")
+    size = size_mb * 1024 * 1024
+    original = os.urandom(size)
+    changed = os.urandom(size)
+    server = serve_stub({"a.mp4": original, "b.mp4": original, "copy.mp4": original})
+    base = f"http://127.0.0.1:{server.server_port}"
+    manager = DownloadManager(workers=2, registry_path=os.path.join(work_dir, "downloads.json"))
+    ok = True
+
+    def report(passed, message):
+        nonlocal ok
+        print(("✅ " if passed else "❌ ") + message)
+        ok &= bool(passed)
+
+    try:
+        # 1. 中途断线后续传
+        cut = size // 3
+        server.cut_once["a.mp4"] = cut
+        first = os.path.join(work_dir, "p1", "a.mp4")
+        result = manager.download(f"{base}/a.mp4", first)
+        ranges = [r for name, r, _ in server.requests if name == "a.mp4"]
+        # .part 只保存断线前写完的整块，续传起点在 (0, cut] 内
+        offset = int(ranges[-1][len("bytes="):].rstrip("-")) if ranges[-1] else 0
+        report(result.status == "resumed" and 0 < offset <= cut,
+               f"断线后续传: status={result.status}, Range={ranges[-1]}")
+        report(_same_content(first, original), "续传结果与服务端文件一致")
+        report(not os.path.exists(first + ".part") and not os.path.exists(first + ".part.json"),
+               "完成后 .part / .part.json 已清理")
+
+        # 2. 断线期间服务端文件变化：If-Range 不匹配，从头下载新内容
+        server.cut_once["b.mp4"] = cut
+        server.replace_after_cut["b.mp4"] = changed
+        second = os.path.join(work_dir, "p1", "b.mp4")
+        result = manager.download(f"{base}/b.mp4", second)
+        last = [(r, v) for name, r, v in server.requests if name == "b.mp4"][-1]
+        report(result.status == "downloaded" and last[0] and last[1] == _etag(original),
+               f"文件变化后 If-Range 重新下载: status={result.status}, If-Range={last[1]}")
+        report(_same_content(second, changed), "重新下载得到的是新内容")
+
+        # 3. 同一 URL 复用、相同内容硬链接
+        before = len(server.requests)
+        reused = os.path.join(work_dir, "p2", "a.mp4")
+        result = manager.download(f"{base}/a.mp4", reused)
+        report(result.status == "reused" and len(server.requests) == before and os.path.samefile(first, reused),
+               f"同一 URL 不再请求，硬链接到已有文件: status={result.status}")
+        duplicate = os.path.join(work_dir, "p2", "copy.mp4")
+        result = manager.download(f"{base}/copy.mp4", duplicate)
+        report(result.ok and os.path.samefile(first, duplicate),
+               f"不同 URL 的相同内容按 SHA-256 去重为硬链接: status={result.status}")
+    finally:
+        manager.close()
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下载管理器自检 (本地 Range 替身服务)")
+    parser.add_argument("--size-mb", type=int, default=4)
+    args = parser.parse_args()
+    sys.exit(0 if check(args.size_mb) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ import requests
 import os
 from dotenv import load_dotenv
 
+from download_manager import get_manager
+
 # Load environment variables
 load_dotenv()
 
@@ -62,18 +64,7 @@ def download_from_pexels(query, filename):
     filepath = os.path.join(OUTPUT_DIR, filename)
     
     print(f"  ⬇️ Downloading from Pexels...")
-    video_response = requests.get(download_url, stream=True)
-    
-    if video_response.status_code == 200:
-        with open(filepath, "wb") as f:
-            for chunk in video_response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        size_mb = os.path.getsize(filepath) / (1024 * 1024)
-        print(f"  ✅ Saved: {filename} ({size_mb:.1f} MB)")
-        return True
-    else:
-        print(f"  ❌ Download failed: {video_response.status_code}")
-        return False
+    return get_manager().download(download_url, filepath, key=f"pexels:{video.get('id')}:{download_url}").ok
 
 def download_from_pixabay(query, filename):
     """Fallback to Pixabay"""
@@ -112,18 +103,7 @@ def download_from_pixabay(query, filename):
     filepath = os.path.join(OUTPUT_DIR, filename)
     
     print(f"  ⬇️ Downloading from Pixabay...")
-    video_response = requests.get(video_url, stream=True)
-    
-    if video_response.status_code == 200:
-        with open(filepath, "wb") as f:
-            for chunk in video_response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        size_mb = os.path.getsize(filepath) / (1024 * 1024)
-        print(f"  ✅ Saved: {filename} ({size_mb:.1f} MB)")
-        return True
-    else:
-        print(f"  ❌ Download failed")
-        return False
+    return get_manager().download(video_url, filepath, key=f"pixabay:{video.get('id')}:{video_url}").ok
 
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -0,0 +1,331 @@
+"""
+共享下载管理器 - 并发、断点续传、去重
+
+- 有界线程池 + 复用连接的 requests.Session，流式分块写入 `<目标>.part`
+- 中断后再次下载时用 HTTP Range 从 .part 末尾续传 (If-Range 校验 ETag/Last-Modified，
+  服务器文件已变化时自动从头下载)
+- 全局登记表 (ai_workspace/cache/downloads.json) 按 URL/key 和内容 SHA-256 记录已下载文件：
+  同一素材在任何项目里都不会被重复下载，已有相同内容时直接硬链接/复制
+
+用法:
+    from download_manager import DownloadManager
+
+    manager = DownloadManager(workers=4)
+    manager.download(url, Path("videos/beach.mp4"), key="pixabay:12345:large")
+    results = manager.download_many([(url1, path1), (url2, path2)])
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from snapshot_store import snapshot_lock
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REGISTRY_PATH = os.path.join(PROJECT_ROOT, "ai_workspace", "cache", "downloads.json")
+
+CHUNK_SIZE = 1024 * 1024
+MAX_ATTEMPTS = 3
+TIMEOUT = (10, 60)  # (连接, 读取) 秒
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient(error: Exception) -> bool:
+    """网络错误、超时、5xx、408/429 可重试；其余 4xx 重试也不会成功"""
+    response = getattr(error, "response", None)
+    if response is not None and response.status_code is not None:
+        return response.status_code in RETRY_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError))
+
+
+def request_with_retry(session: requests.Session, method: str, url: str,
+                       attempts: int = MAX_ATTEMPTS, **kwargs) -> requests.Response:
+    """带退避重试的请求 (只重试临时错误)，返回已通过 raise_for_status 的响应"""
+    kwargs.setdefault("timeout", TIMEOUT)
+    for attempt in range(attempts):
+        try:
+            response = session.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response
+        except requests.RequestException as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+            time.sleep(2 ** attempt)
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    path: Optional[Path]
+    sha256: Optional[str] = None
+    size: int = 0
+    status: str = "failed"      # downloaded / resumed / reused / failed
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+def file_sha256(path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class DownloadRegistry:
+    """已下载文件登记表 (URL/key -> 文件，SHA-256 -> 文件)，跨进程加文件锁"""
+
+    def __init__(self, path: str = REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("keys", {})
+        data.setdefault("hashes", {})
+        return data
+
+    def _save(self, data: Dict):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def find(self, key: str) -> Optional[Dict]:
+        """返回 key 对应、且文件仍完好 (大小一致) 的记录"""
+        with self._lock:
+            entry = self._load()["keys"].get(key)
+        if entry and os.path.exists(entry["path"]) and os.path.getsize(entry["path"]) == entry["size"]:
+            return entry
+        return None
+
+    def find_hash(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            paths = self._load()["hashes"].get(sha256, [])
+        return next((p for p in paths if os.path.exists(p)), None)
+
+    def record(self, key: str, path: Path, sha256: str, size: int):
+        path = str(Path(path).resolve())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, snapshot_lock(self.path):
+            data = self._load()
+            data["keys"][key] = {"path": path, "sha256": sha256, "size": size, "time": int(time.time())}
+            paths = [p for p in data["hashes"].get(sha256, []) if p != path and os.path.exists(p)]
+            data["hashes"][sha256] = paths + [path]
+            self._save(data)
+
+
+def _place(source: str, target: Path):
+    """把已有文件放到目标位置：优先硬链接 (不占额外空间)，跨盘时复制"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists() and os.path.samefile(source, target):
+        return
+    tmp = target.with_name(target.name + ".link")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+
+
+class DownloadManager:
+    """有界并发下载器
+
+    Args:
+        workers: 同时下载数
+        registry_path: 登记表路径 (测试时可指向临时目录)；None 表示不登记、不去重
+            (生成类接口每次返回一次性 URL，登记没有意义)
+        session: 自定义 requests.Session (测试替身 / 代理设置)
+    """
+
+    def __init__(self, workers: int = 4, registry_path: Optional[str] = REGISTRY_PATH,
+                 session: Optional[requests.Session] = None, headers: Optional[Dict] = None):
+        self.registry = DownloadRegistry(registry_path) if registry_path else None
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        if headers:
+            self.session.headers.update(headers)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+        # 同一目标文件同时只允许一个下载
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    # --- 对外接口 ---
+
+    def submit(self, url: str, target, key: Optional[str] = None) -> Future:
+        target = Path(target)
+        inflight_key = str(target.resolve())
+        with self._inflight_lock:
+            future = self._inflight.get(inflight_key)
+            if future is None or future.done():
+                future = self._pool.submit(self.download, url, target, key)
+                self._inflight[inflight_key] = future
+        return future
+
+    def download_many(self, jobs: Iterable[Tuple]) -> List[DownloadResult]:
+        """jobs: (url, target) 或 (url, target, key)；结果与输入顺序一致"""
+        futures = [self.submit(*job) for job in jobs]
+        return [f.result() for f in futures]
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def download(self, url: str, target, key: Optional[str] = None,
+                 cookies: Optional[Dict] = None) -> DownloadResult:
+        """下载单个文件 (同步)；已登记的相同 URL/key 直接复用本地文件
+
+        cookies 只随本次请求发送，不写入共享会话 (不会泄露给其他站点的下载)
+        """
+        target = Path(target)
+        key = key or url
+
+        existing = self.registry.find(key) if self.registry else None
+        if existing:
+            _place(existing["path"], target)
+            print(f"⏭️  已下载过，复用: {target.name}")
+            return DownloadResult(url, target, existing["sha256"], existing["size"], "reused")
+
+        status = None
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                status = self._fetch(url, target, cookies)
+                break
+            except (requests.RequestException, OSError) as e:
+                last_error = e
+                # 临时错误退避后从 .part 续传
+                if not is_transient(e):
+                    break
+                if attempt < MAX_ATTEMPTS - 1:
+                    time.sleep(2 ** attempt)
+        if status is None:
+            print(f"❌ 下载失败: {target.name} ({last_error})")
+            return DownloadResult(url, None, status="failed", error=str(last_error))
+
+        size = target.stat().st_size
+        sha256 = None
+        if self.registry:
+            sha256 = file_sha256(target)
+            duplicate = self.registry.find_hash(sha256)
+            if duplicate and os.path.abspath(duplicate) != str(target.resolve()):
+                # 内容已存在 (不同 URL 的同一素材)：换成硬链接，节省空间
+                _place(duplicate, target)
+            self.registry.record(key, target, sha256, size)
+        print(f"✅ 下载成功: {target} ({size / 1024 / 1024:.1f} MB)")
+        return DownloadResult(url, target, sha256, size, status)
+
+    # --- 内部实现 ---
+
+    def _fetch(self, url: str, target: Path, cookies: Optional[Dict] = None) -> str:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        part = target.with_name(target.name + ".part")
+        meta_path = target.with_name(target.name + ".part.json")
+        offset = part.stat().st_size if part.exists() else 0
+        meta = {}
+        if offset and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except ValueError:
+                meta = {}
+
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            validator = meta.get("etag") or meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, cookies=cookies, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 416 and offset:
+                # 请求范围超出文件：.part 可能已经完整
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and int(total) == offset:
+                    os.replace(part, target)
+                    meta_path.unlink(missing_ok=True)
+                    return "resumed"
+                part.unlink()
+                return self._fetch(url, target, cookies)
+            response.raise_for_status()
+
+            resumed = response.status_code == 206 and offset > 0
+            if not resumed:
+                offset = 0
+            meta_path.write_text(json.dumps({
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }), encoding="utf-8")
+
+            expected = response.headers.get("Content-Length")
+            expected = int(expected) + offset if expected and expected.isdigit() else None
+            if not resumed:
+                print(f"⏬ 正在下载: {target.name}")
+            else:
+                print(f"⏯️  续传: {target.name} (从 {offset / 1024 / 1024:.1f} MB 处)")
+
+            with open(part, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+
+        size = part.stat().st_size
+        if expected is not None and size != expected:
+            raise requests.ConnectionError(f"incomplete download: {size}/{expected} bytes")
+        os.replace(part, target)
+        meta_path.unlink(missing_ok=True)
+        return "resumed" if resumed else "downloaded"
+
+
+_default_manager = None
+_direct_manager = None
+_default_lock = threading.Lock()
+
+
+def get_manager(workers: int = 4) -> DownloadManager:
+    """进程内共享的下载管理器 (供各爬虫脚本直接使用)"""
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            _default_manager = DownloadManager(workers=workers)
+        return _default_manager
+
+
+def fetch_file(url: str, target, cookies: Optional[Dict] = None) -> DownloadResult:
+    """下载一次性 URL (AI 生成结果等)：流式写盘、断点续传、重试，但不登记、不去重"""
+    global _direct_manager
+    with _default_lock:
+        if _direct_manager is None:
+            _direct_manager = DownloadManager(workers=8, registry_path=None)
+    return _direct_manager.download(url, target, cookies=cookies)
@@ -10,18 +10,22 @@ import json
 import os
 from dotenv import load_dotenv
 
+from download_manager import get_manager
+from search_cache import SearchCache, get_cache, normalize_pexels, normalize_pixabay
+
 # 加载环境变量
 load_dotenv()
 
 class PixabayAPI:
     """Pixabay 视频素材 API 封装"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[SearchCache] = None):
         """
         初始化 Pixabay API
         
         Args:
             api_key: API Key (可选,默认从环境变量 PIXABAY_API_KEY 读取)
+            cache: 搜索缓存 (默认使用共享的 ai_workspace/cache/stock_search.db)
         """
         self.api_key = api_key or os.getenv('PIXABAY_API_KEY')
         if not self.api_key:
@@ -31,20 +35,29 @@ class PixabayAPI:
                 "或访问 https://pixabay.com/api/docs/ 获取免费 API key"
             )
         self.base_url = "https://pixabay.com/api/videos/"
+        self.cache = cache or get_cache()
     
     def search_videos(
         self,
         query: str,
         per_page: int = 20,
-        page: int = 1
+        page: int = 1,
+        force: bool = False
     ) -> List[Dict]:
-        """搜索视频素材
+        """搜索视频素材 (优先读本地缓存)
         
         注意: Pixabay 视频 API 的 per_page 范围是 3-200
         """
         # 确保 per_page 在有效范围内
         per_page = max(3, min(200, per_page))
-        
+        return self.cache.search(
+            "pixabay", query,
+            fetch=lambda p: self._request(query, per_page, p),
+            normalize=normalize_pixabay,
+            page=page, per_page=per_page, force=force,
+        )
+    
+    def _request(self, query: str, per_page: int, page: int) -> List[Dict]:
         params = {
             "key": self.api_key,
             "q": query,
@@ -86,12 +99,13 @@ class PexelsAPI:
     4. 在 .env 文件中设置 PEXELS_API_KEY
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[SearchCache] = None):
         """
         初始化 Pexels API
         
         Args:
             api_key: API Key (可选,默认从环境变量 PEXELS_API_KEY 读取)
+            cache: 搜索缓存 (默认使用共享的 ai_workspace/cache/stock_search.db)
         """
         self.api_key = api_key or os.getenv('PEXELS_API_KEY')
         if not self.api_key:
@@ -102,15 +116,25 @@ class PexelsAPI:
             )
         self.base_url = "https://api.pexels.com/videos"
         self.headers = {"Authorization": self.api_key}
+        self.cache = cache or get_cache()
     
     def search_videos(
         self, 
         query: str, 
         per_page: int = 15,
         page: int = 1,
-        orientation: Optional[str] = None
+        orientation: Optional[str] = None,
+        force: bool = False
     ) -> List[Dict]:
-        """搜索视频素材"""
+        """搜索视频素材 (优先读本地缓存)"""
+        return self.cache.search(
+            "pexels", query,
+            fetch=lambda p: self._request(query, per_page, p, orientation),
+            normalize=normalize_pexels,
+            page=page, per_page=per_page, params={"orientation": orientation}, force=force,
+        )
+    
+    def _request(self, query: str, per_page: int, page: int, orientation: Optional[str]) -> List[Dict]:
         url = f"{self.base_url}/search"
         params = {
             "query": query,
@@ -150,31 +174,9 @@ class PexelsAPI:
         return None
 
 
-def download_video(url: str, output_path: Path) -> bool:
-    """下载视频文件"""
-    try:
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        print(f"⏬ 正在下载: {output_path.name}")
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = (downloaded / total_size) * 100
-                    print(f"\r  进度: {percent:.1f}%", end='')
-        
-        print(f"\n✅ 下载成功: {output_path}")
-        return True
-    except Exception as e:
-        print(f"\n❌ 下载失败: {e}")
-        return False
+def download_video(url: str, output_path: Path, key: Optional[str] = None) -> bool:
+    """下载视频文件 (断点续传，已下载过的同一素材直接复用)"""
+    return get_manager().download(url, output_path, key=key).ok
 
 
 def batch_download_from_pixabay(
@@ -191,6 +193,7 @@ def batch_download_from_pixabay(
         videos_per_keyword: 每个关键词下载几个视频
     """
     pixabay = PixabayAPI()
+    jobs = []
     
     for keyword in keywords:
         print(f"\n🔍 搜索: '{keyword}'")
@@ -210,10 +213,14 @@ def batch_download_from_pixabay(
                 if url:
                     filename = f"{keyword.replace(' ', '_')}_{i+1}.mp4"
                     output_path = output_dir / filename
-                    download_video(url, output_path)
+                    jobs.append((url, output_path, f"pixabay:{video['id']}:{url}"))
         
         except Exception as e:
             print(f"  ❌ 搜索失败: {e}")
+    
+    # 搜索完成后并发下载
+    results = get_manager().download_many(jobs)
+    print(f"\n📦 下载完成: {sum(r.ok for r in results)}/{len(jobs)}")
 
 
 # 使用示例
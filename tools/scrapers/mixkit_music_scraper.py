@@ -5,30 +5,42 @@ Mixkit 免费音乐爬虫
 
 import requests
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
-import time
+
+from download_manager import get_manager
+from search_cache import SearchCache, get_cache, normalize_mixkit
 
 class MixkitMusicScraper:
     """Mixkit 音乐爬虫"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[SearchCache] = None):
+        self.cache = cache or get_cache()
         self.base_url = "https://mixkit.co"
         self.asset_url = "https://assets.mixkit.co/music"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
     
-    def get_music_by_mood(self, mood: str = "energetic") -> List[Dict]:
+    def get_music_by_mood(self, mood: str = "energetic", force: bool = False) -> List[Dict]:
         """
-        获取指定心情分类的音乐列表
+        获取指定心情分类的音乐列表 (解析结果缓存在本地，TTL 内不再请求/解析页面)
         
         Args:
             mood: 心情分类 (energetic, calm, epic, happy, sad, etc.)
+            force: 忽略缓存重新抓取
             
         Returns:
             音乐列表,每个包含 id, title, author, mp3_url
         """
+        return self.cache.search(
+            "mixkit", mood,
+            fetch=lambda page: self._scrape_mood(mood),
+            normalize=normalize_mixkit,
+            paginated=False, force=force,
+        )
+    
+    def _scrape_mood(self, mood: str) -> List[Dict]:
         url = f"{self.base_url}/free-stock-music/mood/{mood}/"
         
         print(f"🔍 正在获取 {mood} 音乐列表...")
@@ -75,6 +87,11 @@ class MixkitMusicScraper:
         print(f"✅ 找到 {len(tracks)} 首音乐")
         return tracks
     
+    def _track_path(self, track: Dict, output_dir: Path) -> Path:
+        # 清理文件名
+        safe_title = "".join(c for c in track['title'] if c.isalnum() or c in (' ', '-', '_')).strip()
+        return output_dir / f"{safe_title}_{track['id']}.mp3"
+    
     def download_track(self, track: Dict, output_dir: Path) -> bool:
         """
         下载单首音乐
@@ -88,35 +105,14 @@ class MixkitMusicScraper:
         """
         try:
             output_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 清理文件名
-            safe_title = "".join(c for c in track['title'] if c.isalnum() or c in (' ', '-', '_')).strip()
-            filename = f"{safe_title}_{track['id']}.mp3"
-            output_path = output_dir / filename
+            output_path = self._track_path(track, output_dir)
             
             # 如果已存在,跳过
             if output_path.exists():
-                print(f"⏭️  已存在: {filename}")
+                print(f"⏭️  已存在: {output_path.name}")
                 return True
             
-            print(f"⏬ 正在下载: {track['title']}")
-            
-            response = requests.get(track['mp3_url'], stream=True, timeout=30)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r  进度: {percent:.1f}%", end='')
-            
-            print(f"\n✅ 下载成功: {output_path}")
-            return True
+            return get_manager().download(track['mp3_url'], output_path, key=f"mixkit:{track['id']}").ok
             
         except Exception as e:
             print(f"\n❌ 下载失败: {e}")
@@ -143,12 +139,20 @@ class MixkitMusicScraper:
         
         print(f"\n📦 开始批量下载 {len(tracks)} 首音乐...")
         
+        output_dir.mkdir(parents=True, exist_ok=True)
+        jobs = []
         success_count = 0
-        for i, track in enumerate(tracks, 1):
-            print(f"\n[{i}/{len(tracks)}]")
-            if self.download_track(track, output_dir):
+        for track in tracks:
+            output_path = self._track_path(track, output_dir)
+            if output_path.exists():
+                print(f"⏭️  已存在: {output_path.name}")
                 success_count += 1
-            time.sleep(0.5)  # 避免请求过快
+            else:
+                jobs.append((track['mp3_url'], output_path, f"mixkit:{track['id']}"))
+        
+        # 共享下载管理器的有界线程池并发下载
+        results = get_manager().download_many(jobs)
+        success_count += sum(r.ok for r in results)
         
         print(f"\n{'='*60}")
         print(f"✅ 下载完成! 成功: {success_count}/{len(tracks)}")
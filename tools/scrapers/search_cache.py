@@ -0,0 +1,326 @@
+"""
+素材搜索缓存 - SQLite + TTL
+
+Pexels / Pixabay / Mixkit 的搜索结果按 (提供方, 规范化查询, 页码) 存入
+ai_workspace/cache/stock_search.db：
+
+- 重复查询在 TTL 内直接读本地，不再请求网络 / 重新解析 HTML
+- 查询词规范化 (小写、去重、排序)，"City Night" 与 "night city" 命中同一条缓存
+- 每条素材同时保存原始数据 (供 get_best_quality_url 等使用) 和统一格式的记录；
+  统一记录带指纹 (时长 + 分辨率 + 作者 / 标题 + 作者)，跨提供方的同一素材只保留一份
+- 网络失败时返回过期缓存；search_offline() 按标题/标签在全部已缓存素材中查找，
+  新查询与旧查询有重叠时也能离线给出结果
+- 返回第 N 页后在后台预取第 N+1 页
+
+用法:
+    from search_cache import get_cache
+
+    cache = get_cache()
+    hits = cache.search("pixabay", "city night", fetch=lambda page: api_call(page),
+                        normalize=normalize_pixabay, per_page=20)
+    records = cache.search_offline("city", kind="video")
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(PROJECT_ROOT, "ai_workspace", "cache", "stock_search.db")
+
+DEFAULT_TTL = 7 * 24 * 3600  # 素材站搜索结果一周内基本不变
+PREFETCH_WORKERS = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    provider   TEXT NOT NULL,
+    query_key  TEXT NOT NULL,
+    page       INTEGER NOT NULL,
+    uids       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (provider, query_key, page)
+);
+CREATE TABLE IF NOT EXISTS assets (
+    uid         TEXT PRIMARY KEY,
+    provider    TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    search_text TEXT NOT NULL,
+    raw         TEXT NOT NULL,
+    record      TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_fingerprint ON assets (fingerprint);
+CREATE INDEX IF NOT EXISTS assets_kind ON assets (kind);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """小写、去标点、去重并排序词项"""
+    return " ".join(sorted(set(re.findall(r"\w+", query.lower()))))
+
+
+def _words_from_url(url: str) -> str:
+    # https://www.pexels.com/video/aerial-view-of-city-1234/ -> "aerial view of city"
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    return " ".join(w for w in slug.split("-") if not w.isdigit())
+
+
+def _fingerprint(kind: str, record: Dict) -> str:
+    author = re.sub(r"\W+", "", (record.get("author") or "").lower())
+    if kind == "video":
+        return f"video:{round(record.get('duration') or 0)}:{record.get('width')}x{record.get('height')}:{author}"
+    title = re.sub(r"\W+", "", (record.get("title") or "").lower())
+    return f"{kind}:{title}:{author}"
+
+
+# --- 各提供方原始数据 -> 统一记录 ---
+
+def normalize_pixabay(hit: Dict) -> Dict:
+    videos = hit.get("videos", {})
+    best = next((videos[q] for q in ("large", "medium", "small", "tiny") if videos.get(q, {}).get("url")), {})
+    return {
+        "provider": "pixabay",
+        "kind": "video",
+        "id": str(hit.get("id")),
+        "title": hit.get("tags", ""),
+        "tags": [t.strip() for t in hit.get("tags", "").split(",") if t.strip()],
+        "author": hit.get("user"),
+        "duration": hit.get("duration"),
+        "width": best.get("width"),
+        "height": best.get("height"),
+        "url": best.get("url"),
+        "page_url": hit.get("pageURL"),
+    }
+
+
+def normalize_pexels(video: Dict) -> Dict:
+    files = sorted(video.get("video_files", []), key=lambda f: f.get("width") or 0, reverse=True)
+    return {
+        "provider": "pexels",
+        "kind": "video",
+        "id": str(video.get("id")),
+        "title": _words_from_url(video.get("url", "")),
+        "tags": video.get("tags") or [],
+        "author": (video.get("user") or {}).get("name"),
+        "duration": video.get("duration"),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "url": files[0].get("link") if files else None,
+        "page_url": video.get("url"),
+    }
+
+
+def normalize_mixkit(track: Dict) -> Dict:
+    return {
+        "provider": "mixkit",
+        "kind": "music",
+        "id": str(track.get("id")),
+        "title": track.get("title"),
+        "tags": [track["mood"]] if track.get("mood") else [],
+        "author": track.get("author"),
+        "duration": None,
+        "width": None,
+        "height": None,
+        "url": track.get("mp3_url"),
+        "page_url": None,
+    }
+
+
+class SearchCache:
+    """带 TTL 的素材搜索缓存 (线程安全，每个线程一个 SQLite 连接)
+
+    Args:
+        path: 数据库路径 (测试时可指向临时目录)
+        ttl: 缓存有效期 (秒)
+        prefetch: 是否在后台预取下一页
+    """
+
+    def __init__(self, path: str = DB_PATH, ttl: float = DEFAULT_TTL, prefetch: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.prefetch = prefetch
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="search-prefetch")
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- 读写 ---
+
+    def _lookup(self, provider: str, query_key: str, page: int):
+        """返回 (原始结果列表, 是否过期)；未缓存时返回 (None, True)"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT uids, fetched_at FROM queries WHERE provider=? AND query_key=? AND page=?",
+            (provider, query_key, page),
+        ).fetchone()
+        if row is None:
+            return None, True
+        uids = json.loads(row[0])
+        raws = {}
+        # SQLite 单条语句的参数个数有上限，分批查询
+        for i in range(0, len(uids), 500):
+            batch = uids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            for uid, raw in conn.execute(f"SELECT uid, raw FROM assets WHERE uid IN ({marks})", batch):
+                raws[uid] = json.loads(raw)
+        if len(raws) != len(uids):
+            return None, True
+        return [raws[uid] for uid in uids], time.time() - row[1] > self.ttl
+
+    def _store(self, provider: str, query_key: str, page: int, items: List[Dict], normalize: Callable):
+        now = time.time()
+        rows, uids = [], []
+        for item in items:
+            record = normalize(item)
+            uid = f"{record['provider']}:{record['id']}"
+            search_text = " ".join([record.get("title") or "", " ".join(record.get("tags") or [])]).lower()
+            rows.append((uid, record["provider"], record["kind"], _fingerprint(record["kind"], record),
+                         search_text, json.dumps(item, ensure_ascii=False),
+                         json.dumps(record, ensure_ascii=False), now))
+            uids.append(uid)
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?)",
+                (provider, query_key, page, json.dumps(uids), now),
+            )
+
+    # --- 对外接口 ---
+
+    def search(
+        self,
+        provider: str,
+        query: str,
+        fetch: Callable[[int], List[Dict]],
+        normalize: Callable[[Dict], Dict],
+        page: int = 1,
+        per_page: int = 20,
+        params: Optional[Dict] = None,
+        paginated: bool = True,
+        force: bool = False,
+    ) -> List[Dict]:
+        """缓存优先的搜索，返回提供方原始结果
+
+        Args:
+            fetch: 实际请求函数 fetch(page) -> 原始结果列表
+            normalize: 原始结果 -> 统一记录
+            params: 影响结果的其它参数 (如 orientation)，参与缓存键
+            paginated: 提供方是否支持翻页 (决定是否预取下一页)
+            force: 忽略缓存强制请求
+        """
+        query_key = self._query_key(query, per_page, params)
+        items, expired = (None, True) if force else self._lookup(provider, query_key, page)
+        if items is None or expired:
+            try:
+                fresh = fetch(page)
+            except Exception:
+                if items is None:
+                    raise
+                print(f"⚠️  [{provider}] 网络请求失败，使用过期缓存: {query}")
+                return items
+            self._store(provider, query_key, page, fresh, normalize)
+            items = fresh
+
+        # 结果满页说明可能还有下一页
+        if self.prefetch and paginated and len(items) >= per_page:
+            self._prefetch(provider, query_key, page + 1, fetch, normalize)
+        return items
+
+    def search_offline(self, query: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """在全部已缓存素材中按标题/标签匹配 (所有词都需出现)，跨提供方去重"""
+        words = normalize_query(query).split()
+        sql = "SELECT record, fingerprint, provider FROM assets WHERE 1=1"
+        args = []
+        if kind:
+            sql += " AND kind=?"
+            args.append(kind)
+        for word in words:
+            sql += " AND search_text LIKE ?"
+            args.append(f"%{word}%")
+        sql += " ORDER BY updated_at DESC"
+
+        # 指纹只用于识别跨提供方的重复 (同一作者同时长同分辨率的片段在同一站内可以有多个)
+        results, owners = [], {}
+        for record, fingerprint, provider in self._connect().execute(sql, args):
+            if owners.setdefault(fingerprint, provider) != provider:
+                continue
+            results.append(json.loads(record))
+            if len(results) >= limit:
+                break
+        return results
+
+    def purge_expired(self) -> int:
+        """删除过期查询及不再被任何查询引用的素材，返回删除的查询数"""
+        conn = self._connect()
+        with conn:
+            removed = conn.execute("DELETE FROM queries WHERE fetched_at < ?", (time.time() - self.ttl,)).rowcount
+            referenced = set()
+            for (uids,) in conn.execute("SELECT uids FROM queries"):
+                referenced.update(json.loads(uids))
+            stale = [uid for (uid,) in conn.execute("SELECT uid FROM assets") if uid not in referenced]
+            conn.executemany("DELETE FROM assets WHERE uid=?", [(uid,) for uid in stale])
+        return removed
+
+    def wait_prefetch(self):
+        """等待后台预取完成 (脚本退出前 / 测试用)"""
+        self._pool.shutdown(wait=True)
+        self._pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="search-prefetch")
+
+    # --- 内部实现 ---
+
+    @staticmethod
+    def _query_key(query: str, per_page: int, params: Optional[Dict]) -> str:
+        extra = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()) if v is not None)
+        return f"{normalize_query(query)}|{per_page}|{extra}"
+
+    def _prefetch(self, provider, query_key, page, fetch, normalize):
+        token = (provider, query_key, page)
+        with self._pending_lock:
+            if token in self._pending:
+                return
+            self._pending.add(token)
+
+        def run():
+            try:
+                items, expired = self._lookup(provider, query_key, page)
+                if items is None or expired:
+                    self._store(provider, query_key, page, fetch(page), normalize)
+            except Exception:
+                pass  # 预取失败不影响前台，下次按需请求
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(token)
+
+        self._pool.submit(run)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> SearchCache:
+    """进程内共享的搜索缓存"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SearchCache()
+        return _default_cache
@@ -1,8 +1,14 @@
 import asyncio
+import base64
+import mimetypes
 import os
-from playwright.async_api import async_playwright
 import argparse
 
+import requests
+from playwright.async_api import async_playwright
+
+from chunked_upload import ChunkedUploader, UposProtocol
+
 # 视频发布配置
 VIDEO_PATH = r"f:\桌面\开发\AIcut\remotion-studio\out\product_promo_v7_final.mp4"
 COVER_PATH = r"f:\桌面\开发\AIcut\remotion-studio\public\assets\projects\product_promo\v6_promo_cover16x9.png"
@@ -12,11 +18,57 @@ DESC = """AIcut 迎来史诗级更新！深度集成 Grok 3 文生视频能力
 在 Antigravity IDE 中，由 Gemini 3 驱动，全自动开启调试模式浏览器，Python + JS 脚本自动化实现从创意到剪辑的全链路闭环。
 本视频完整复盘了 2026 新年快乐短片的诞生成果。
 项目已开源在 Github，想要地址的请一键三连，私信博主，并附上关键词：AIcut"""
+TID = None  # 分区 ID，投稿 (--submit) 时必须用 --tid 指定，不做猜测
+
+MEMBER_URL = "https://member.bilibili.com"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def make_session(cookies):
+    """用浏览器里已登录的 cookies 构造 requests 会话"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT, "Referer": f"{MEMBER_URL}/platform/upload/video/frame"})
+    for cookie in cookies:
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie.get("path", "/"))
+    return session
+
+
+def _check(response):
+    response.raise_for_status()
+    data = response.json()
+    if data.get("code") != 0:
+        raise RuntimeError(f"{response.url} 返回错误: {data.get('code')} {data.get('message')}")
+    return data.get("data") or {}
+
+
+def upload_cover(session, csrf, cover_path):
+    mime = mimetypes.guess_type(cover_path)[0] or "image/png"
+    with open(cover_path, "rb") as f:
+        cover = f"data:{mime};base64," + base64.b64encode(f.read()).decode("ascii")
+    return _check(session.post(f"{MEMBER_URL}/x/vu/web/cover/up", data={"cover": cover, "csrf": csrf}, timeout=60))["url"]
+
+
+def submit_video(session, csrf, filename, cover_url, tid):
+    payload = {
+        "copyright": 1, "source": "", "tid": tid, "cover": cover_url,
+        "title": TITLE, "tag": ",".join(TAGS), "desc": DESC, "dynamic": "", "no_reprint": 1,
+        "videos": [{"filename": filename, "title": "", "desc": ""}],
+    }
+    return _check(session.post(f"{MEMBER_URL}/x/vu/web/add/v3", params={"csrf": csrf}, json=payload, timeout=60))
+
+
+async def upload_bilibili(video_path=VIDEO_PATH, cover_path=COVER_PATH, tid=TID, workers=3, submit=False, filename=None):
+    """默认只上传视频并打印文件名，由人工检查后投稿；submit=True 时才通过接口直接发布
+
+    filename 为之前上传得到的文件名时跳过上传，直接投稿该视频。
+    """
+    if submit and tid is None:
+        print("❌ 直接投稿需要指定分区 ID (--tid)")
+        return
 
-async def upload_bilibili():
     async with async_playwright() as p:
         try:
-           # 尝试连接当前已打开的调试浏览器 (就像 Grok 脚本那样)
+           # 尝试连接当前已打开的调试浏览器 (就像 Grok 脚本那样)，只借用其中的登录状态
             browser = await p.chromium.connect_over_cdp("http://localhost:9222")
             print("✅ 已成功连接到 Chrome 调试端口")
         except Exception as e:
@@ -24,84 +76,49 @@ async def upload_bilibili():
             print("请确保 Chrome 已使用 --remote-debugging-port=9222 启动")
             return
 
-        context = browser.contexts[0]
-        page = context.pages[0] # 使用当前标签页或者新建一个
-
-        # 1. 导航到投稿页
-        print("🚀 正在跳转到 Bilibili 投稿页...")
-        await page.goto("https://member.bilibili.com/platform/upload/video/frame")
-        await page.wait_for_load_state("domcontentloaded")
-        
-        # 2. 上传视频 (跳过大文件)
-        print("⚠️ 检测到视频文件超过 50MB (Playwright CDP 限制)，请手动拖入视频文件！")
-        print(f"📁 视频路径: {VIDEO_PATH}")
-        # video_input = page.locator('input[type="file"]').first 
-        # await video_input.set_input_files(VIDEO_PATH)
-
-        # 3. 填写标题
-        print(f"📝 正在填写标题... {TITLE}")
-        title_input = page.locator('input.input-val[placeholder*="标题"]')
-        await title_input.click()
-        await title_input.fill(TITLE)
-        
-        # 4. 上传封面 (关键步骤)
-        print(f"🖼️ 正在上传封面: {os.path.basename(COVER_PATH)}")
-        # 很多时候需要先点击“设置封面”才能激活 input
-        cover_trigger = page.locator('div.cover-upload-btn, div.cover-clk') # 尝试定位封面区域
-        if await cover_trigger.count() > 0:
-             await cover_trigger.first.click()
-             await asyncio.sleep(1) # 等待模态框
-
-        # 在模态框或页面中寻找图片上传 input
-        # 策略：找 accept 包含 image 的 input
-        image_input = page.locator('input[type="file"][accept*="image"]')
-        if await image_input.count() > 0:
-            await image_input.set_input_files(COVER_PATH)
-            
-            # 处理封面裁剪确认 (如果有)
-            confirm_btn = page.locator('div.cropper-confirm-btn, div.modal-footer button.primary')
-            try:
-                await confirm_btn.wait_for(timeout=5000)
-                await confirm_btn.click()
-                print("✅ 封面裁剪已确认")
-            except:
-                print("ℹ️ 无需裁剪或自动通过")
-        else:
-            print("❌ 未找到封面上传入口，跳过封面上传")
-
-        # 5. 选择分区 (科技 -> 人工智能)
-        print("🗂️ 正在选择分区: 科技 -> 人工智能")
-        type_select = page.locator('.bcc-select') # 分区下拉框
-        if await type_select.count() > 0:
-            await type_select.first.click()
-            await asyncio.sleep(0.5)
-            # 点击“科技”
-            await page.get_by_text("科技", exact=True).click() 
-            await asyncio.sleep(0.5)
-            # 点击“人工智能”
-            await page.get_by_text("人工智能").click()
-        
-        # 6. 填写标签
-        print("🏷️ 正在添加标签...")
-        tag_input = page.locator('input.input-val[placeholder*="标签"]')
-        await tag_input.click()
-        for tag in TAGS:
-            await tag_input.fill(tag)
-            await page.keyboard.press("Enter")
-            await asyncio.sleep(0.2)
-
-        # 7. 填写简介
-        print("📄 正在填写简介...")
-        desc_editor = page.locator('div.editor-content-input') # 简介编辑框通常是 contenteditable div
-        if await desc_editor.count() == 0:
-             desc_editor = page.locator('textarea.input-val[placeholder*="简介"]') # 或者是 textarea
-
-        if await desc_editor.count() > 0:
-            await desc_editor.first.click()
-            await desc_editor.first.fill(DESC)
-        
-        print("✅ 所有信息填写完毕！")
-        print("⏳ 请在该脚本结束后，人工检查并点击【立即投稿】按钮。")
+        cookies = await browser.contexts[0].cookies(["https://www.bilibili.com", MEMBER_URL])
+
+    csrf = next((c["value"] for c in cookies if c["name"] == "bili_jct"), None)
+    if not csrf:
+        print("❌ 浏览器中未登录 Bilibili (缺少 bili_jct cookie)，请先在该浏览器登录")
+        return
+    session = make_session(cookies)
+
+    # 1. 分块上传视频 (大文件不再受 Playwright CDP 50MB 限制；中断后重新运行即续传)
+    if filename:
+        state = {"filename": filename}
+        print(f"♻️ 使用已上传的视频: {filename}")
+    else:
+        print(f"📁 正在上传视频: {video_path} ({os.path.getsize(video_path) / 1048576:.1f} MB)")
+        uploader = ChunkedUploader(UposProtocol(session), workers=workers)
+        state = await asyncio.to_thread(uploader.upload, video_path)
+        print(f"✅ 视频上传完成: {state['filename']}")
+    if not submit:
+        print("ℹ️ 未投稿。检查以下信息后，用以下参数重新运行即可发布 (不会重复上传):")
+        print(f"   --submit --tid <分区ID> --filename {state['filename']}")
+        print(f"   标题: {TITLE}")
+        print(f"   标签: {', '.join(TAGS)}")
+        print(f"   封面: {cover_path}")
+        return state
+
+    # 2. 上传封面
+    print(f"🖼️ 正在上传封面: {os.path.basename(cover_path)}")
+    cover_url = await asyncio.to_thread(upload_cover, session, csrf, cover_path)
+
+    # 3. 投稿 (标题 / 分区 / 标签 / 简介)
+    print(f"📝 正在投稿: {TITLE} (分区 {tid})")
+    result = await asyncio.to_thread(submit_video, session, csrf, state["filename"], cover_url, tid)
+    print(f"🎉 投稿成功: https://www.bilibili.com/video/{result.get('bvid')}")
+    return result
+
 
 if __name__ == "__main__":
-    asyncio.run(upload_bilibili())
+    parser = argparse.ArgumentParser(description="Bilibili 投稿 (分块断点续传上传)")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--cover", default=COVER_PATH)
+    parser.add_argument("--tid", type=int, default=TID, help="分区 ID (--submit 时必填)")
+    parser.add_argument("--workers", type=int, default=3, help="并行上传的分块数")
+    parser.add_argument("--submit", action="store_true", help="上传后直接通过接口投稿 (默认只上传)")
+    parser.add_argument("--filename", help="之前上传得到的文件名，指定时跳过上传")
+    args = parser.parse_args()
+    asyncio.run(upload_bilibili(args.video, args.cover, args.tid, args.workers, args.submit, args.filename))
@@ -0,0 +1,245 @@
+"""
+分块断点续传上传器
+
+- 文件按固定大小分块，每块上传时才从磁盘读取 (内存占用 ≈ 并发数 × 分块大小)，有界线程池并行上传
+- 每块单独按退避重试 (复用 download_manager.request_with_retry，只重试临时错误)
+- 上传会话 (upload_id、上传凭证、已完成的分块) 持久化在 ai_workspace/cache/uploads/，
+  中断后再次上传同一文件 (路径、大小、修改时间都相同) 时只补传缺失的分块
+- on_progress 回调报告已上传字节、本次速度与剩余时间
+
+协议为 B 站网页投稿使用的 UPOS 分块上传:
+    GET  {base}/preupload?name=&size=&r=upos&profile=ugcupos/bup  -> endpoint, upos_uri, auth, biz_id, chunk_size
+    POST {endpoint}/{key}?uploads&output=json                       -> upload_id
+    PUT  {endpoint}/{key}?partNumber=&uploadId=&chunk=&chunks=&size=&start=&end=&total=
+    POST {endpoint}/{key}?output=json&name=&profile=&uploadId=&biz_id=   {"parts": [...]}
+upload_check.py 里的本地服务实现了同一协议，可以离线自检。
+
+用法:
+    from chunked_upload import ChunkedUploader, UposProtocol
+
+    uploader = ChunkedUploader(UposProtocol(session), workers=3)
+    state = uploader.upload("out/final.mp4")
+    print(state["filename"])   # 投稿接口里 videos[].filename
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers"))
+from download_manager import MAX_ATTEMPTS, request_with_retry
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SESSION_DIR = os.path.join(PROJECT_ROOT, "ai_workspace", "cache", "uploads")
+
+PREUPLOAD_BASE = "https://member.bilibili.com"
+CHUNK_SIZE = 10 * 1024 * 1024
+PART_TIMEOUT = 120
+# 续传时这些状态码说明会话已过期 (凭证失效 / upload_id 被回收)，需要重新开始
+EXPIRED_STATUS = {401, 403, 404}
+
+
+@dataclass
+class UploadProgress:
+    done: int          # 已上传字节 (含之前会话已完成的分块)
+    total: int
+    speed: float       # 本次运行的平均速度 (字节/秒)
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.done / self.total if self.total else 100.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        return (self.total - self.done) / self.speed if self.speed > 0 else None
+
+
+def print_progress(progress: UploadProgress):
+    eta = progress.eta
+    eta_text = time.strftime("%M:%S", time.gmtime(eta)) if eta is not None else "--:--"
+    print(f"\r⏫ 上传中 {progress.percent:5.1f}% ({progress.done / 1048576:.1f}/{progress.total / 1048576:.1f} MB) "
+          f"{progress.speed / 1048576:.1f} MB/s 剩余 {eta_text}", end="", flush=True)
+    if progress.done >= progress.total:
+        print()
+
+
+class UposProtocol:
+    """B 站 UPOS 分块上传协议；session 需带已登录的 cookies"""
+
+    def __init__(self, session: requests.Session, base_url: str = PREUPLOAD_BASE,
+                 profile: str = "ugcupos/bup", attempts: int = MAX_ATTEMPTS):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.profile = profile
+        self.attempts = attempts
+
+    def _url(self, state: Dict) -> str:
+        endpoint = state["endpoint"]
+        if endpoint.startswith("//"):
+            endpoint = f"{urlsplit(self.base_url).scheme}:{endpoint}"
+        return f"{endpoint}/{state['upos_uri'].replace('upos://', '')}"
+
+    def start(self, name: str, size: int) -> Dict:
+        """申请上传位置并初始化分块上传，返回需要持久化的会话状态"""
+        response = request_with_retry(self.session, "GET", f"{self.base_url}/preupload", self.attempts, params={
+            "name": name, "size": size, "r": "upos", "profile": self.profile, "ssl": 0,
+        })
+        data = response.json()
+        if data.get("OK") != 1:
+            raise RuntimeError(f"preupload 失败: {data}")
+        state = {
+            "endpoint": data["endpoint"], "upos_uri": data["upos_uri"], "auth": data["auth"],
+            "biz_id": data.get("biz_id"), "chunk_size": data.get("chunk_size"),
+        }
+        response = request_with_retry(self.session, "POST", f"{self._url(state)}?uploads&output=json",
+                                      self.attempts, headers={"X-Upos-Auth": state["auth"]})
+        state["upload_id"] = response.json()["upload_id"]
+        return state
+
+    def upload_part(self, state: Dict, index: int, chunks: int, start: int, data: bytes, total: int):
+        request_with_retry(self.session, "PUT", self._url(state), self.attempts, data=data, timeout=PART_TIMEOUT,
+                           headers={"X-Upos-Auth": state["auth"], "Content-Type": "application/octet-stream"},
+                           params={
+                               "partNumber": index + 1, "uploadId": state["upload_id"],
+                               "chunk": index, "chunks": chunks, "size": len(data),
+                               "start": start, "end": start + len(data), "total": total,
+                           })
+
+    def complete(self, state: Dict, name: str, chunks: int) -> Dict:
+        response = request_with_retry(self.session, "POST", self._url(state), self.attempts,
+                                      headers={"X-Upos-Auth": state["auth"]},
+                                      params={
+                                          "output": "json", "name": name, "profile": self.profile,
+                                          "uploadId": state["upload_id"], "biz_id": state["biz_id"],
+                                      },
+                                      json={"parts": [{"partNumber": i + 1, "eTag": "etag"} for i in range(chunks)]})
+        data = response.json()
+        if data.get("OK") != 1:
+            raise RuntimeError(f"合并分块失败: {data}")
+        # 投稿接口用的文件名: upos://bucket/n240101abc.mp4 -> n240101abc
+        state["filename"] = os.path.splitext(os.path.basename(state["upos_uri"]))[0]
+        return state
+
+
+class ChunkedUploader:
+    def __init__(self, protocol: UposProtocol, workers: int = 3, chunk_size: Optional[int] = None,
+                 session_dir: Optional[str] = SESSION_DIR,
+                 on_progress: Optional[Callable[[UploadProgress], None]] = print_progress):
+        """chunk_size 为 None 时使用服务器建议的分块大小；session_dir=None 时不持久化会话 (不能续传)"""
+        self.protocol = protocol
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.session_dir = session_dir
+        self.on_progress = on_progress
+        self._lock = threading.Lock()
+
+    # ---------- 会话持久化 ----------
+
+    def _session_path(self, path: str, stat: os.stat_result) -> Optional[str]:
+        if not self.session_dir:
+            return None
+        key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+        return os.path.join(self.session_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _load_session(session_path: Optional[str]) -> Optional[Dict]:
+        if not session_path:
+            return None
+        try:
+            with open(session_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_session(self, session_path: Optional[str], session: Dict):
+        if not session_path:
+            return
+        os.makedirs(os.path.dirname(session_path), exist_ok=True)
+        tmp_path = f"{session_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(tmp_path, session_path)
+
+    @staticmethod
+    def _drop_session(session_path: Optional[str]):
+        if session_path and os.path.exists(session_path):
+            os.remove(session_path)
+
+    # ---------- 上传 ----------
+
+    def upload(self, path: str) -> Dict:
+        """上传整个文件，返回协议的会话状态 (含 filename)；失败时会话保留，再次调用即续传"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        session_path = self._session_path(path, stat)
+        session = self._load_session(session_path)
+        if session:
+            try:
+                return self._run(path, stat.st_size, session, session_path)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in EXPIRED_STATUS:
+                    raise
+                print(f"\nℹ️ 上传会话已过期 ({e.response.status_code})，重新开始上传")
+                self._drop_session(session_path)
+        return self._run(path, stat.st_size, None, session_path)
+
+    def _run(self, path: str, size: int, session: Optional[Dict], session_path: Optional[str]) -> Dict:
+        name = os.path.basename(path)
+        if session is None:
+            state = self.protocol.start(name, size)
+            chunk_size = self.chunk_size or state.get("chunk_size") or CHUNK_SIZE
+            session = {"path": path, "size": size, "chunk_size": chunk_size, "state": state, "parts": []}
+            self._save_session(session_path, session)
+        else:
+            print(f"♻️ 续传上次的上传会话 (已完成 {len(session['parts'])} 块)")
+
+        state, chunk_size = session["state"], session["chunk_size"]
+        chunks = max(1, -(-size // chunk_size))
+        finished = set(session["parts"])
+        pending = [i for i in range(chunks) if i not in finished]
+        done = sum(min(chunk_size, size - i * chunk_size) for i in finished)
+        resumed_bytes = done
+        started = time.monotonic()
+
+        def report():
+            elapsed = time.monotonic() - started
+            speed = (done - resumed_bytes) / elapsed if elapsed > 0 else 0.0
+            self.on_progress(UploadProgress(done, size, speed))
+
+        def upload_chunk(index: int):
+            nonlocal done
+            start = index * chunk_size
+            with open(path, "rb") as f:
+                f.seek(start)
+                data = f.read(chunk_size)
+            self.protocol.upload_part(state, index, chunks, start, data, size)
+            with self._lock:
+                session["parts"].append(index)
+                self._save_session(session_path, session)
+                done += len(data)
+                if self.on_progress:
+                    report()
+
+        if self.on_progress:
+            report()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(upload_chunk, i) for i in pending]
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+        for future in futures:
+            if not future.cancelled() and future.exception():
+                raise future.exception()
+
+        state = self.protocol.complete(state, name, chunks)
+        self._drop_session(session_path)
+        return state
@@ -0,0 +1,191 @@
+"""
+分块上传自检 (不需要 B 站账号)
+
+启动一个实现 UPOS 分块上传协议的本地 HTTP 服务，上传一个随机内容的临时文件，检查：
+
+- 部分分块第一次 PUT 返回 503 时会被重试，合并后的文件与原文件逐字节一致
+- 上传中途失败后再次上传，只补传缺失的分块 (会话从 ai_workspace/cache/uploads/ 续传)
+- 上传完成后会话文件被删除，并报告吞吐量
+
+用法:
+    python tools/uploaders/upload_check.py [--size-mb 48] [--chunk-mb 4] [--workers 4]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from chunked_upload import ChunkedUploader, UposProtocol
+
+AUTH = "stub-auth-token"
+
+
+class UposStubHandler(BaseHTTPRequestHandler):
+    """preupload / 初始化 / 分块 PUT / 合并；分块存放在 server.store_dir"""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, data=None):
+        body = json.dumps(data or {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parse(self):
+        parts = urlsplit(self.path)
+        return parts.path.lstrip("/"), {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+
+    def do_GET(self):
+        path, query = self._parse()
+        if path != "preupload":
+            return self._reply(404)
+        server = self.server
+        self._reply(200, {
+            "OK": 1, "auth": AUTH, "biz_id": 42, "chunk_size": server.chunk_size, "threads": 3,
+            "endpoint": f"//127.0.0.1:{server.server_port}", "upos_uri": f"upos://stub/n{int(time.time())}.mp4",
+        })
+
+    def do_POST(self):
+        key, query = self._parse()
+        if self.headers.get("X-Upos-Auth") != AUTH:
+            return self._reply(403)
+        server = self.server
+        if "uploads" in query:
+            with server.lock:
+                server.upload_count += 1
+                upload_id = f"up{server.upload_count}"
+            os.makedirs(os.path.join(server.store_dir, upload_id))
+            return self._reply(200, {"OK": 1, "upload_id": upload_id, "key": key})
+
+        parts = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["parts"]
+        part_dir = os.path.join(server.store_dir, query["uploadId"])
+        with open(os.path.join(server.store_dir, query["name"]), "wb") as out:
+            for part in parts:
+                with open(os.path.join(part_dir, str(part["partNumber"])), "rb") as f:
+                    shutil.copyfileobj(f, out)
+        self._reply(200, {"OK": 1})
+
+    def do_PUT(self):
+        _, query = self._parse()
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        if self.headers.get("X-Upos-Auth") != AUTH:
+            return self._reply(403)
+        part_dir = os.path.join(server.store_dir, query["uploadId"])
+        if not os.path.isdir(part_dir):
+            return self._reply(404)
+        part = int(query["partNumber"])
+        with server.lock:
+            server.puts += 1
+            first_try = part not in server.attempted
+            server.attempted.add(part)
+            stored = len(os.listdir(part_dir))
+        if first_try and part % server.flaky_every == 0:
+            return self._reply(503)
+        if server.stop_after is not None and stored >= server.stop_after:
+            return self._reply(400, {"OK": 0, "message": "stub: stop_after"})
+        if len(data) != int(query["size"]):
+            return self._reply(400, {"OK": 0, "message": "size mismatch"})
+        with open(os.path.join(part_dir, str(part)), "wb") as f:
+            f.write(data)
+        self._reply(200, {"OK": 1})
+
+
+def serve_stub(store_dir: str, chunk_size: int, flaky_every: int = 5):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UposStubHandler)
+    server.store_dir = store_dir
+    server.chunk_size = chunk_size
+    server.flaky_every = flaky_every  # 编号为其倍数的分块第一次 PUT 返回 503
+    server.stop_after = None          # 已存够这么多分块后，新的 PUT 返回 400 (模拟中途失败)
+    server.lock = threading.Lock()
+    server.upload_count = 0
+    server.puts = 0
+    server.attempted = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check(size_mb=48, chunk_mb=4, workers=4):
+    work_dir = tempfile.mkdtemp(prefix="aicut_upload_")
+    store_dir = os.path.join(work_dir, "server")
+    session_dir = os.path.join(work_dir, "sessions")
+    os.makedirs(store_dir)
+    source = os.path.join(work_dir, "video.mp4")
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    chunks = -(-size_mb // chunk_mb)
+
+    server = serve_stub(store_dir, chunk_mb * 1024 * 1024)
+    protocol = UposProtocol(requests.Session(), base_url=f"http://127.0.0.1:{server.server_port}")
+    uploader = ChunkedUploader(protocol, workers=workers, session_dir=session_dir)
+    ok = True
+    try:
+        # 1. 中途失败
+        server.stop_after = chunks // 2
+        try:
+            uploader.upload(source)
+            print("\n❌ 预期上传中途失败")
+            ok = False
+        except requests.HTTPError as e:
+            print(f"\n✅ 上传中途失败: {e.response.status_code}")
+        stored = len(os.listdir(os.path.join(store_dir, "up1")))
+        sessions = os.listdir(session_dir)
+        if len(sessions) != 1:
+            print(f"❌ 会话文件数: {len(sessions)}")
+            ok = False
+
+        # 2. 续传
+        server.stop_after = None
+        puts_before = server.puts
+        started = time.monotonic()
+        state = uploader.upload(source)
+        elapsed = time.monotonic() - started
+        resent = server.puts - puts_before
+        if server.upload_count != 1:
+            print(f"❌ 续传时重新初始化了上传 ({server.upload_count} 次)")
+            ok = False
+        flaky_missing = len([p for p in range(stored + 1, chunks + 1) if p % server.flaky_every == 0])
+        if resent > chunks - stored + flaky_missing:
+            print(f"❌ 续传补传了 {resent} 次 PUT，缺失分块只有 {chunks - stored} 块")
+            ok = False
+        else:
+            print(f"✅ 续传只补传缺失的 {chunks - stored}/{chunks} 块 ({resent} 次 PUT，含 503 重试)")
+
+        merged = os.path.join(store_dir, os.path.basename(source))
+        with open(source, "rb") as a, open(merged, "rb") as b:
+            same = a.read() == b.read()
+        print(("✅" if same else "❌") + f" 合并文件与原文件一致: {same} (filename={state['filename']})")
+        ok &= same
+        if os.listdir(session_dir):
+            print("❌ 上传完成后会话文件未删除")
+            ok = False
+        print(f"⏱️ 续传 {(chunks - stored) * chunk_mb} MB 用时 {elapsed:.2f}s")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块上传自检 (本地 UPOS 替身服务)")
+    parser.add_argument("--size-mb", type=int, default=48)
+    parser.add_argument("--chunk-mb", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    sys.exit(0 if check(args.size_mb, args.chunk_mb, args.workers) else 1)
+
+
+if __name__ == "__main__":
+    main()
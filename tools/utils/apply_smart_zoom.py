@@ -1,73 +1,233 @@
 import json
-import sys
 import os
+import argparse
 
-def process_events(events_path, fps=30, idle_timeout=1.5):
+# 镜头参数 (坐标均为归一化屏幕坐标 0-1)
+ZOOM_SCALE = 2.2          # 活跃时的放大倍数
+LEAD_TIME = 0.35          # 提前多少秒开始向事件位置移动
+SMOOTH_TIME = 0.45        # 临界阻尼弹簧的平滑时间 (越大越柔和)
+MAX_PAN_SPEED = 0.9       # 每秒最多平移多少个屏幕宽/高
+MAX_ZOOM_SPEED = 2.0      # 每秒最多改变多少倍缩放
+TOLERANCE = {"x": 0.002, "y": 0.002, "scale": 0.01}  # 关键帧精简的最大插值误差
+
+FOCUS_EVENTS = {"click", "input", "keypress"}
+
+
+def iter_events(events_path):
+    """逐行流式读取事件日志 (JSONL)；兼容旧版整段 JSON 数组文件"""
+    with open(events_path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            f.seek(0)
+            yield from json.load(f)
+            return
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def smooth_damp(current, target, velocity, smooth_time, max_speed, dt):
+    """临界阻尼弹簧一步 (带最大速度限制)，返回 (新值, 新速度)
+
+    与 Unity SmoothDamp 相同的近似解：无超调、对帧率稳定。
     """
-    智能分析事件轨迹，生成 Remotion Zoom 特效数据
-    idle_timeout: 动作停止超过 1.5 秒后自动拉远镜头
+    omega = 2.0 / smooth_time
+    x = omega * dt
+    decay = 1.0 / (1.0 + x + 0.48 * x * x + 0.235 * x * x * x)
+    max_change = max_speed * smooth_time
+    change = max(-max_change, min(max_change, current - target))
+    clamped_target = current - change
+    temp = (velocity + omega * change) * dt
+    velocity = (velocity - omega * temp) * decay
+    output = clamped_target + (change + temp) * decay
+    # 防止越过目标
+    if (target - current > 0) == (output > target):
+        output, velocity = target, 0.0
+    return output, velocity
+
+
+def event_frame(event_time, sync_offset, fps):
+    """事件时间 -> 视频帧号 (第 n 帧覆盖 [n/fps, (n+1)/fps))"""
+    return max(0, int((event_time - sync_offset) * fps))
+
+
+def camera_targets(events, idle_timeout, scale, fps=30):
+    """把事件流转换为 (生效时间, 目标x, 目标y, 目标缩放) 序列
+
+    每个带坐标的事件让镜头对准该位置；空闲超过 idle_timeout 后回到全景。
+    事件时间经 event_frame() 换算为所在视频帧的起始时间 (扣除 sync 记录中的第一帧偏移)，
+    与 av_sync_check 校验的是同一换算。
     """
-    with open(events_path, "r") as f:
-        events = json.load(f)
-    
-    if not events: return []
-
-    zoom_segments = []
-    current_segment = None
-    
+    last_active = None
+    last_pos = (0.5, 0.5)
+    offset = 0.0
     for event in events:
-        event_time = event["time"]
-        frame = int(event_time * fps)
-        
-        # 如果当前没有在记录缩放段，或者距离上一个事件太久，则开启新段
-        if current_segment is None:
-            current_segment = {
-                "startFrame": max(0, frame - 10), # 提前10帧开始推镜头
-                "last_active": frame,
-                "x": event.get("x", 0.5),
-                "y": event.get("y", 0.5),
-                "scale": 2.2 # 默认放大倍数
-            }
+        if event.get("type") == "sync":
+            # 录制器记录的第一帧偏移：事件时间 - 偏移 = 视频内时间
+            offset = event.get("firstFrameOffset") or 0.0
+            continue
+        if event.get("type") not in FOCUS_EVENTS:
+            continue
+        event_time = event_frame(event["time"], offset, fps) / fps
+        t = max(0.0, event_time - LEAD_TIME)
+        if last_active is not None and last_active + idle_timeout < t:
+            yield last_active + idle_timeout, 0.5, 0.5, 1.0
+        if "x" in event and "y" in event:
+            last_pos = (event["x"], event["y"])
+        yield t, last_pos[0], last_pos[1], scale
+        last_active = event_time
+    if last_active is not None:
+        yield last_active + idle_timeout, 0.5, 0.5, 1.0
+
+
+class KeyframeSimplifier:
+    """流式分段线性精简：只保留插值误差超过容差处的关键帧 (每点 O(1))
+
+    以上一个关键帧为锚点维护允许斜率区间；新点的斜率落在区间外时，
+    把前一个点提交为关键帧并以其为新锚点。
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.keys = []
+        self.anchor = None
+        self.prev = None
+        self.bounds = None
+
+    def add(self, frame, value):
+        if self.anchor is None:
+            self.anchor = (frame, value)
+            self.keys.append((frame, value))
+            return
+        af, av = self.anchor
+        dt = frame - af
+        slope = (value - av) / dt
+        lo, hi = (value - self.tolerance - av) / dt, (value + self.tolerance - av) / dt
+        if self.bounds is not None and not (self.bounds[0] <= slope <= self.bounds[1]):
+            self.anchor = self.prev
+            self.keys.append(self.prev)
+            af, av = self.anchor
+            dt = frame - af
+            lo, hi = (value - self.tolerance - av) / dt, (value + self.tolerance - av) / dt
+            self.bounds = (lo, hi)
         else:
-            # 还在活跃期（距离上次动作小于 idle_timeout）
-            if frame - current_segment["last_active"] < idle_timeout * fps:
-                current_segment["last_active"] = frame
-                # 如果这个事件有新坐标，可以缓慢平移镜头（可选简化处理：保持原位）
-            else:
-                # 动作断档了，结束这一段并开启下一段
-                current_segment["endFrame"] = current_segment["last_active"] + 15
-                zoom_segments.append(current_segment)
-                current_segment = {
-                    "startFrame": frame - 10,
-                    "last_active": frame,
-                    "x": event.get("x", 0.5),
-                    "y": event.get("y", 0.5),
-                    "scale": 2.2
-                }
-                
-    if current_segment:
-        current_segment["endFrame"] = current_segment["last_active"] + 15
-        zoom_segments.append(current_segment)
-
-    # 转化为 Remotion Effect 格式
-    effects = []
-    for seg in zoom_segments:
-        effects.append({
-            "type": "Zoom",
-            "props": {
-                "startFrame": seg["startFrame"],
-                "endFrame": seg["endFrame"],
-                "scale": seg["scale"],
-                "x": seg["x"],
-                "y": seg["y"]
-            }
-        })
-    return effects
+            self.bounds = (lo, hi) if self.bounds is None else (max(self.bounds[0], lo), min(self.bounds[1], hi))
+        self.prev = (frame, value)
+
+    def finish(self):
+        if self.prev is not None and self.keys[-1] != self.prev:
+            self.keys.append(self.prev)
+        return self.keys
+
+
+def build_camera_path(events, fps=30, idle_timeout=1.5, scale=ZOOM_SCALE):
+    """模拟平滑镜头，逐帧前进一次 (总耗时与录制时长线性相关)
+
+    Returns:
+        {"fps", "x": [[frame, value], ...], "y": [...], "scale": [...]}
+    """
+    dt = 1.0 / fps
+    targets = camera_targets(events, idle_timeout, scale, fps)
+    pending = next(targets, None)
+    if pending is None:
+        return {"fps": fps, "x": [], "y": [], "scale": []}
+
+    state = {"x": 0.5, "y": 0.5, "scale": 1.0}
+    velocity = {"x": 0.0, "y": 0.0, "scale": 0.0}
+    target = dict(state)
+    simplifiers = {key: KeyframeSimplifier(TOLERANCE[key]) for key in state}
+
+    frame = 0
+    while True:
+        t = frame * dt
+        while pending is not None and pending[0] <= t:
+            target = {"x": pending[1], "y": pending[2], "scale": pending[3]}
+            pending = next(targets, None)
+
+        state["scale"], velocity["scale"] = smooth_damp(
+            state["scale"], target["scale"], velocity["scale"], SMOOTH_TIME, MAX_ZOOM_SPEED, dt)
+        for axis in ("x", "y"):
+            state[axis], velocity[axis] = smooth_damp(
+                state[axis], target[axis], velocity[axis], SMOOTH_TIME, MAX_PAN_SPEED, dt)
+
+        # 视口不能移出画面: 中心点限制在 [0.5/scale, 1 - 0.5/scale]
+        margin = 0.5 / state["scale"]
+        for axis in ("x", "y"):
+            simplifiers[axis].add(frame, round(min(max(state[axis], margin), 1 - margin), 4))
+        simplifiers["scale"].add(frame, round(state["scale"], 4))
+
+        settled = all(abs(state[k] - target[k]) < 1e-4 and abs(velocity[k]) < 1e-4 for k in state)
+        if pending is None and settled:
+            break
+        frame += 1
+
+    path = {"fps": fps}
+    for key, simplifier in simplifiers.items():
+        path[key] = [[f, v] for f, v in simplifier.finish()]
+    return path
+
+
+def to_element_keyframes(path, width=1920, height=1080):
+    """把镜头路径转换为时间轴元素的 x/y/scale 关键帧 (让画面中的焦点移到画布中心)"""
+    fps = path["fps"]
+
+    def sampler(track):
+        # 查询帧单调递增，游标只前进，整体线性时间
+        cursor = [0]
+
+        def sample(frame):
+            i = cursor[0]
+            while i + 1 < len(track) and track[i + 1][0] <= frame:
+                i += 1
+            cursor[0] = i
+            f0, v0 = track[i]
+            if i + 1 == len(track) or frame <= f0:
+                return v0
+            f1, v1 = track[i + 1]
+            return v0 + (v1 - v0) * (frame - f0) / float(f1 - f0)
+
+        return sample
+
+    frames = sorted({f for key in ("x", "y", "scale") for f, _ in path[key]})
+    sample_x, sample_y, sample_scale = sampler(path["x"]), sampler(path["y"]), sampler(path["scale"])
+    keyframes = {"x": [], "y": [], "scale": []}
+    for i, frame in enumerate(frames):
+        s = sample_scale(frame)
+        values = {
+            "x": round(width / 2 + (0.5 - sample_x(frame)) * width * s, 1),
+            "y": round(height / 2 + (0.5 - sample_y(frame)) * height * s, 1),
+            "scale": round(s, 4),
+        }
+        for key, value in values.items():
+            keyframes[key].append({"id": f"cam_{key}_{i}", "time": round(frame / fps, 3), "value": value, "easing": "linear"})
+    return keyframes
+
+
+def process_events(events_path, fps=30, idle_timeout=1.5):
+    """
+    智能分析事件轨迹，生成 Remotion 镜头路径特效数据
+    idle_timeout: 动作停止超过 1.5 秒后自动拉远镜头
+    """
+    path = build_camera_path(iter_events(events_path), fps=fps, idle_timeout=idle_timeout)
+    if not path["scale"]:
+        return []
+    return [{"type": "CameraPath", "props": path}]
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python apply_smart_zoom.py <events_json>")
-        sys.exit(1)
-    
-    effects = process_events(sys.argv[1])
-    print(json.dumps(effects, indent=4))
+    parser = argparse.ArgumentParser(description="从录屏事件日志生成平滑镜头路径")
+    parser.add_argument("events", help="事件日志 (.jsonl，兼容旧版 _events.json)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--idle-timeout", type=float, default=1.5)
+    parser.add_argument("--element-keyframes", action="store_true", help="输出时间轴元素 x/y/scale 关键帧")
+    args = parser.parse_args()
+
+    effects = process_events(args.events, fps=args.fps, idle_timeout=args.idle_timeout)
+    if args.element_keyframes and effects:
+        print(json.dumps(to_element_keyframes(effects[0]["props"]), indent=4))
+    else:
+        print(json.dumps(effects))
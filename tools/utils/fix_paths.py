@@ -1,80 +1,239 @@
+"""
+路径迁移 - 移动磁盘/目录后批量改写工作区 JSON 里的绝对路径
+
+带 relativePath/fingerprint 的素材 (见 tools/core/asset_paths.py) 移动工作区后无需改写；
+本工具用于只有绝对路径的旧快照，或一次性替换 URL、历史记录里残留的旧前缀。
+
+所有前缀映射 (old -> new) 会展开成它们在 JSON 文本里可能出现的形式:
+- 原样 (JSON 转义后的反斜杠 `F:\\\\桌面\\\\...`)，以及 ensure_ascii 写出的 `\\uXXXX` 形式
+- URL 编码 (/api/media/serve?path=F%3A%5C...)
+- 以上各种形式的正斜杠写法 (F:/桌面/...)
+然后编译成一个由前缀树生成的正则，对原始 JSON 文本做一次扫描替换：不解析 JSON，
+按块流式读写 (大文件内存占用恒定)，文件格式与其余内容逐字节保持不变。
+前缀只在路径分隔处匹配 (F:\\AIcut 不会改写 F:\\AIcut2)；Windows 盘符路径不区分大小写。
+
+覆盖范围: projects/*/snapshot.json、projects/projectIdMap.json、ai_workspace/history/*.json
+以及 ai_workspace/project-snapshot.json (后者经 snapshot_store 加锁写入并递增 revision)。
+多个文件由进程池并行处理，每个文件先写临时文件再原子替换。
+
+用法:
+    python tools/utils/fix_paths.py --dry-run
+    python tools/utils/fix_paths.py --map "F:\\old\\AIcut=D:\\Desktop\\AIcut" --workers 8
+"""
+import argparse
+import glob
 import json
 import os
+import re
+import sys
+import tempfile
 import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+from snapshot_store import update_snapshot
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 路径映射 (old 前缀 -> new 前缀)，靠前的映射优先
+DEFAULT_MAPPINGS = [
+    (r"F:\桌面\AIcut小白教程\需要剪辑的素材", r"D:\Desktop\AIcut\source"),
+    (r"F:\桌面\开发\AIcut", r"D:\Desktop\AIcut"),
+]
+
+CHUNK_CHARS = 1 << 20
+# 前缀之后必须是路径分隔符或值的结尾 (quote 写出大写 %2F/%5C，其他工具可能写小写；非 Windows 映射区分大小写)
+BOUNDARY = r'(?=\\\\|/|"|(?i:%2f|%5c)|&|$)'
+WINDOWS_PATH = re.compile(r"^[A-Za-z]:[\\/]")
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """把一组字符串编译成前缀树形状的正则 (公共前缀只比较一次，长的优先)"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = None
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        ends_here = "" in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if ends_here else group
+
+    return build(trie)
+
+
+def _variants(old: str, new: str) -> List[Tuple[str, str]]:
+    """一个映射在 JSON 文本中的各种写法: [(旧文本, 新文本)]"""
+    pairs = []
+    for sep in ("\\", "/"):
+        o, n = old.replace("\\", sep), new.replace("\\", sep)
+        pairs.append((json.dumps(o, ensure_ascii=False)[1:-1], json.dumps(n, ensure_ascii=False)[1:-1]))
+        pairs.append((json.dumps(o)[1:-1], json.dumps(n)[1:-1]))
+        pairs.append((urllib.parse.quote(o, safe=""), urllib.parse.quote(n, safe="")))
+    return pairs
+
+
+class PathRewriter:
+    def __init__(self, mappings: Sequence[Tuple[str, str]], ignore_case: Optional[bool] = None):
+        """ignore_case 为 None 时，所有 old 都是 Windows 盘符路径才不区分大小写"""
+        if ignore_case is None:
+            ignore_case = all(WINDOWS_PATH.match(old) for old, _ in mappings)
+        self.ignore_case = ignore_case
+        self.mappings = list(mappings)
+        self._targets: Dict[str, Tuple[str, int]] = {}
+        for index, (old, new) in enumerate(self.mappings):
+            for old_text, new_text in _variants(old.rstrip("\\/"), new.rstrip("\\/")):
+                key = old_text.lower() if ignore_case else old_text
+                self._targets.setdefault(key, (new_text, index))
+        flags = re.IGNORECASE if ignore_case else 0
+        self.pattern = re.compile(f"({_trie_regex(list(self._targets))}){BOUNDARY}", flags)
+        # 块边界处保留的尾部长度: 最长的前缀 + 分隔符
+        self._keep = max(map(len, self._targets)) + 4
+
+    def _replace(self, match: re.Match, counts: List[int]) -> str:
+        text = match.group(1)
+        new_text, index = self._targets[text.lower() if self.ignore_case else text]
+        counts[index] += 1
+        return new_text
+
+    def sub(self, text: str, counts: Optional[List[int]] = None) -> str:
+        counts = counts if counts is not None else [0] * len(self.mappings)
+        return self.pattern.sub(lambda m: self._replace(m, counts), text)
+
+    def rewrite_stream(self, src, dst, counts: Optional[List[int]] = None) -> List[int]:
+        """按块从 src 读文本、替换后写入 dst；返回每个映射的替换次数"""
+        counts = counts if counts is not None else [0] * len(self.mappings)
+        buffer = ""
+        while True:
+            chunk = src.read(CHUNK_CHARS)
+            buffer += chunk
+            final = not chunk
+            # 起点在 limit 之前的匹配一定完整地落在缓冲区里，之后的留到下一块
+            limit = len(buffer) if final else len(buffer) - self._keep
+            pos = 0
+            for match in self.pattern.finditer(buffer):
+                if match.start() >= limit:
+                    break
+                dst.write(buffer[pos:match.start()])
+                dst.write(self._replace(match, counts))
+                pos = match.end()
+            cut = max(pos, limit)
+            dst.write(buffer[pos:cut])
+            buffer = buffer[cut:]
+            if final:
+                return counts
+
+
+@lru_cache(maxsize=4)
+def _rewriter(mappings: Tuple[Tuple[str, str], ...]) -> PathRewriter:
+    return PathRewriter(mappings)
+
+
+def migrate_paths(json_path: str, mappings=DEFAULT_MAPPINGS, dry_run: bool = False) -> List[int]:
+    """改写单个 JSON 文件 (原子替换；没有需要改写的路径时不动文件)，返回每个映射的替换次数"""
+    rewriter = _rewriter(tuple(map(tuple, mappings)))
+    directory = os.path.dirname(os.path.abspath(json_path))
+    with open(json_path, "r", encoding="utf-8", newline="") as src:
+        if dry_run:
+            with open(os.devnull, "w", encoding="utf-8") as dst:
+                return rewriter.rewrite_stream(src, dst)
+        fd, tmp_path = tempfile.mkstemp(prefix=".fix-paths-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as dst:
+                counts = rewriter.rewrite_stream(src, dst)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    if any(counts):
+        os.replace(tmp_path, json_path)
+    else:
+        os.remove(tmp_path)
+    return counts
+
+
+def migrate_live_snapshot(snapshot_path: str, mappings=DEFAULT_MAPPINGS, dry_run: bool = False) -> List[int]:
+    """project-snapshot.json 可能正被编辑器写入，通过 snapshot_store 加锁改写"""
+    counts = migrate_paths(snapshot_path, mappings, dry_run=True)
+    if dry_run or not any(counts):
+        return counts
+    rewriter = _rewriter(tuple(map(tuple, mappings)))
+    counts = [0] * len(mappings)
+    update_snapshot(lambda snapshot: json.loads(rewriter.sub(json.dumps(snapshot, ensure_ascii=False), counts)),
+                    path=snapshot_path)
+    return counts
+
+
+def workspace_files(root: str = PROJECT_ROOT) -> List[str]:
+    files = sorted(glob.glob(os.path.join(root, "projects", "*", "snapshot.json")))
+    id_map = os.path.join(root, "projects", "projectIdMap.json")
+    if os.path.exists(id_map):
+        files.append(id_map)
+    files += sorted(glob.glob(os.path.join(root, "ai_workspace", "history", "*.json")))
+    return files
+
+
+def migrate_workspace(root: str = PROJECT_ROOT, mappings=DEFAULT_MAPPINGS, dry_run: bool = False,
+                      workers: Optional[int] = None) -> Dict[str, List[int]]:
+    """并行改写工作区内所有快照，返回 {文件: 每个映射的替换次数}"""
+    mappings = [tuple(m) for m in mappings]
+    files = workspace_files(root)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(migrate_paths, path, mappings, dry_run) for path in files}
+        results = {path: future.result() for path, future in futures.items()}
+
+    live = os.path.join(root, "ai_workspace", "project-snapshot.json")
+    if os.path.exists(live):
+        results[live] = migrate_live_snapshot(live, mappings, dry_run)
+    return results
+
+
+def print_report(results: Dict[str, List[int]], mappings, root: str, dry_run: bool):
+    totals = [0] * len(mappings)
+    changed = 0
+    for path, counts in results.items():
+        if any(counts):
+            changed += 1
+            print(f"  {os.path.relpath(path, root)}: {sum(counts)}")
+        totals = [a + b for a, b in zip(totals, counts)]
+    for (old, new), total in zip(mappings, totals):
+        print(f"  {old} -> {new}: {total}")
+    verb = "Would rewrite" if dry_run else "Rewrote"
+    print(f"{verb} {sum(totals)} paths in {changed} of {len(results)} files")
+
+
+def parse_mapping(text: str) -> Tuple[str, str]:
+    old, sep, new = text.partition("=")
+    if not sep or not old or not new:
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW, got {text!r}")
+    return old, new
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite absolute path prefixes in workspace snapshots")
+    parser.add_argument("--root", default=PROJECT_ROOT, help="workspace root (contains projects/ and ai_workspace/)")
+    parser.add_argument("--map", dest="mappings", action="append", type=parse_mapping, metavar="OLD=NEW",
+                        help="prefix mapping, repeatable (default: built-in DEFAULT_MAPPINGS)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument("files", nargs="*", help="migrate only these JSON files")
+    args = parser.parse_args()
+
+    mappings = args.mappings or DEFAULT_MAPPINGS
+    if args.files:
+        results = {path: migrate_paths(path, mappings, args.dry_run) for path in args.files}
+    else:
+        results = migrate_workspace(args.root, mappings, args.dry_run, args.workers)
+    print_report(results, mappings, args.root, args.dry_run)
 
-def migrate_paths(json_path):
-    if not os.path.exists(json_path):
-        print(f"File not found: {json_path}")
-        return
-
-    print(f"Migrating paths in {json_path}...")
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # 路径映射
-    old_prefixes = [
-        r"F:\桌面\AIcut小白教程\需要剪辑的素材",
-        r"F:\桌面\开发\AIcut"
-    ]
-    new_prefix = r"D:\Desktop\AIcut"
-    
-    def fix_value(val):
-        if not isinstance(val, str):
-            return val
-        
-        # 处理原始路径
-        for old in old_prefixes:
-            if old in val:
-                # 特殊处理：如果旧路径包含“需要剪辑的素材”，可能是在 source 目录下
-                if "需要剪辑的素材" in old:
-                    target = os.path.join(new_prefix, "source")
-                else:
-                    target = new_prefix
-                
-                val = val.replace(old, target)
-                
-                # 处理可能出现的重复斜杠或编码问题
-                val = val.replace("\\\\", "\\")
-        
-        # 处理 URL 编码路径
-        for old in old_prefixes:
-            old_encoded = urllib.parse.quote(old, safe='')
-            if old_encoded in val:
-                if "需要剪辑的素材" in old:
-                    target = os.path.join(new_prefix, "source")
-                else:
-                    target = new_prefix
-                new_encoded = urllib.parse.quote(target, safe='')
-                val = val.replace(old_encoded, new_encoded)
-            
-        return val
-
-    def traverse(obj):
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                if isinstance(v, (dict, list)):
-                    traverse(v)
-                else:
-                    obj[k] = fix_value(v)
-        elif isinstance(obj, list):
-            for i in range(len(obj)):
-                if isinstance(obj[i], (dict, list)):
-                    traverse(obj[i])
-                else:
-                    obj[i] = fix_value(obj[i])
-
-    traverse(data)
-
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Done migrating {json_path}")
 
 if __name__ == "__main__":
-    files_to_fix = [
-        r"d:\Desktop\AIcut\ai_workspace\project-snapshot.json",
-        r"d:\Desktop\AIcut\ai_workspace\history\snapshot_2026-01-18T13-13-35.json"
-    ]
-    for f in files_to_fix:
-        migrate_paths(f)
+    main()